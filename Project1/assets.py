@@ -1,22 +1,49 @@
 import pygame
 import math
 import random
+import numpy as np
+from collections import OrderedDict
+from explosion import EXPLOSION_SIZES, EXPLOSION_FRAMES
+
+# Variants are cached on quantized keys so nearby requests share a surface
+ANGLE_STEP = 5
+ALPHA_STEP = 8
+VARIANT_BUDGET = 16 * 1024 * 1024  # bytes of pixel data kept in the variant cache
 
 class AssetManager:
-    def __init__(self):
+    def __init__(self, variant_budget=VARIANT_BUDGET, cache=None):
+        # cache is an optional SpriteCache that keeps the generated sprites
+        # on disk between runs
+        self.cache = cache
         self.sprites = {}
-        self.create_all_sprites()
+        self.variants = OrderedDict()
+        self.variant_budget = variant_budget
+        self.variant_bytes = 0
+        self.explosion_atlases = {}
+        self.explosion_frames = {}
+        # What each sprite is drawn with. Nothing is drawn up front: a sprite
+        # is built (or loaded from the disk cache) the first time something
+        # asks for it, so startup only pays for what the first frame shows.
+        self.generators = {
+            'player': (self.create_player_ship,),
+            'enemy1': (self.create_enemy_ship, 1),
+            'enemy2': (self.create_enemy_ship, 2),
+            'enemy3': (self.create_enemy_ship, 3),
+            'missile': (self.create_missile,),
+            'laser': (self.create_laser_beam,),
+        }
+    
+    def generate(self, name, generator, *args):
+        if self.cache is None:
+            return generator(*args)
+        return self.cache.get(name, generator, *args)
     
     def create_all_sprites(self):
-        self.sprites['player'] = self.create_player_ship()
-        self.sprites['enemy1'] = self.create_enemy_ship(1)
-        self.sprites['enemy2'] = self.create_enemy_ship(2)
-        self.sprites['enemy3'] = self.create_enemy_ship(3)
-        self.sprites['missile'] = self.create_missile()
-        self.sprites['laser'] = self.create_laser_beam()
-        self.sprites['shield'] = None  
-        self.sprites['explosion_frames'] = [] 
-        self.sprites['star_field'] = None 
+        # Build everything now rather than on first use
+        for name in self.generators:
+            self.get_sprite(name)
+        for size_name in EXPLOSION_SIZES:
+            self.get_explosion_frames(size_name)
         
     def create_player_ship(self):
      
@@ -97,6 +124,171 @@ class AssetManager:
         
         return surface
     
+    def create_explosion_atlas(self, size, frames=EXPLOSION_FRAMES):
+        # One row of frames: a fireball that swells and fades while its hot
+        # core burns out, with sparks flying off
+        atlas = pygame.Surface((size * frames, size), pygame.SRCALPHA)
+        rng = random.Random(size)
+        sparks = [(rng.uniform(0, 2 * math.pi), rng.uniform(0.6, 1.0)) for _ in range(10)]
+        half = size / 2
+        
+        for i in range(frames):
+            t = i / max(1, frames - 1)
+            cx = i * size + half
+            cy = half
+            grow = 1 - (1 - t) ** 2
+            radius = half * (0.35 + 0.6 * grow)
+            fade = 1 - t
+            
+            pygame.draw.circle(atlas, (255, 90, 0, int(170 * fade)), (cx, cy), radius)
+            pygame.draw.circle(atlas, (255, 170, 30, int(230 * fade)), (cx, cy), radius * 0.75)
+            if t < 0.85:
+                pygame.draw.circle(atlas, (255, 250, 200, int(255 * fade)), (cx, cy),
+                                   max(1, radius * 0.45 * (1 - t)))
+            for angle, speed in sparks:
+                reach = (half - 2) * min(1.0, 0.3 + grow * speed)
+                x = cx + math.cos(angle) * reach
+                y = cy + math.sin(angle) * reach
+                pygame.draw.circle(atlas, (255, 220, 120, int(255 * fade)), (x, y),
+                                   max(1, size // 30))
+        
+        if pygame.display.get_init() and pygame.display.get_surface() is not None:
+            atlas = atlas.convert_alpha()
+        return atlas
+    
+    def create_star_layer(self, width, height, count, size, brightness, seed, opaque):
+        # One parallax layer: `count` stars of `size` pixels scattered over
+        # a black tile. Written straight into the pixel array, so tens of
+        # thousands of stars cost no more than a few.
+        surface = pygame.Surface((width, height))
+        surface.fill((0, 0, 0))
+        rng = np.random.default_rng(seed)
+        x = rng.integers(0, width - size + 1, count)
+        y = rng.integers(0, height - size + 1, count)
+        level = rng.integers(brightness // 2, brightness + 1, count)
+        # A touch of blue or yellow on some stars, never pure black so
+        # the colorkey leaves them alone
+        tint = rng.integers(-30, 31, count)
+        colors = np.stack([level + np.minimum(tint, 0), level, level - np.maximum(tint, 0)], axis=1)
+        colors = np.clip(colors, 1, 255).astype(np.uint8)
+        
+        pixels = pygame.surfarray.pixels3d(surface)
+        for dx in range(size):
+            for dy in range(size):
+                pixels[x + dx, y + dy] = colors
+        del pixels
+        
+        if not opaque:
+            surface.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+        return surface
+    
+    def get_star_layer(self, index, width, height, count, size, brightness, opaque):
+        # Star layers depend on the requested density, so they are keyed on
+        # everything that shapes them, not just a name
+        key = ('star_layer', index, width, height, count, size, brightness, opaque)
+        layer = self.sprites.get(key)
+        if layer is None:
+            layer = self.sprites[key] = self.generate(f'star_layer_{index}', self.create_star_layer,
+                                                      width, height, count, size, brightness,
+                                                      index, opaque)
+        return layer
+    
+    def split_atlas(self, atlas, size):
+        # Subsurfaces share the atlas pixels, so these cost nothing extra
+        return [atlas.subsurface((x, 0, size, size))
+                for x in range(0, atlas.get_width(), size)]
+    
+    def get_explosion_frames(self, size_name):
+        frames = self.explosion_frames.get(size_name)
+        if frames is None:
+            size = EXPLOSION_SIZES[size_name]
+            atlas = self.explosion_atlases[size_name] = self.generate(f'explosion_{size_name}',
+                                                                      self.create_explosion_atlas,
+                                                                      size, EXPLOSION_FRAMES)
+            frames = self.explosion_frames[size_name] = self.split_atlas(atlas, size)
+        return frames
+    
     def get_sprite(self, name):
+        # None for names with no sprite (like 'shield', which is drawn by hand)
+        sprite = self.sprites.get(name)
+        if sprite is None:
+            if name in self.generators:
+                sprite = self.sprites[name] = self.generate(name, *self.generators[name])
+            elif name == 'explosion_frames':
+                sprite = self.sprites[name] = self.get_explosion_frames('medium')
+        return sprite
+    
+    def get_variant(self, name, angle=0, size=None, tint=None, alpha=None, frame=None):
+        # Rotated/scaled/tinted/faded copy of a sprite, built once and then
+        # served from an LRU cache. `frame` picks an entry out of list sprites
+        # like explosion_frames. Returns None if the sprite doesn't exist.
+        angle = (round(angle / ANGLE_STEP) * ANGLE_STEP) % 360
+        if alpha is not None:
+            alpha = min(255, round(alpha / ALPHA_STEP) * ALPHA_STEP)
+            if alpha >= 255:
+                alpha = None
+        if size is not None:
+            size = (int(size[0]), int(size[1]))
+        if tint is not None:
+            tint = tuple(tint)
+            
+        key = (name, frame, angle, size, tint, alpha)
+        surface = self.variants.get(key)
+        if surface is not None:
+            self.variants.move_to_end(key)
+            return surface
+            
+        base = self.get_sprite(name)
+        if frame is not None:
+            base = base[frame] if base and 0 <= frame < len(base) else None
+        if base is None:
+            return None
+            
+        surface = self.build_variant(base, angle, size, tint, alpha)
+        self.variants[key] = surface
+        self.variant_bytes += self.surface_bytes(surface)
+        self.evict_variants()
+        return surface
+    
+    def build_variant(self, base, angle, size, tint, alpha):
+        surface = base
+        if size is not None and size != base.get_size():
+            surface = pygame.transform.scale(surface, size)
+        if angle:
+            surface = pygame.transform.rotate(surface, angle)
+        if tint is not None:
+            # Same as blitting a translucent overlay over the sprite
+            if surface is base:
+                surface = surface.copy()
+            overlay = pygame.Surface(surface.get_size(), pygame.SRCALPHA)
+            overlay.fill(tint)
+            surface.blit(overlay, (0, 0))
+            
+        # Match the display format so blits don't convert every frame. Needs
+        # a display mode, so headless runs just keep the raw surface.
+        if pygame.display.get_init() and pygame.display.get_surface() is not None:
+            if surface.get_flags() & pygame.SRCALPHA:
+                surface = surface.convert_alpha()
+            else:
+                surface = surface.convert()
+        elif surface is base:
+            surface = surface.copy()
+            
+        # convert() drops per-surface alpha, so fade last
+        if alpha is not None:
+            surface.set_alpha(alpha)
+        return surface
+    
+    def surface_bytes(self, surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+    
+    def evict_variants(self):
+        # Drop least recently used variants until we fit the budget, but
+        # always keep the one that was just added
+        while self.variant_bytes > self.variant_budget and len(self.variants) > 1:
+            _, surface = self.variants.popitem(last=False)
+            self.variant_bytes -= self.surface_bytes(surface)
     
-        return self.sprites.get(name, None)
\ No newline at end of file
+    def clear_variants(self):
+        self.variants.clear()
+        self.variant_bytes = 0
\ No newline at end of file
@@ -0,0 +1,231 @@
+import os
+import sys
+import csv
+import ast
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Batch runner for balance sweeps: plays lots of headless games across
+# every core and writes one row per game to a columnar file.
+#
+#   python batch.py --games 500 --policy random \
+#       --param ENEMY_SPEED=1,1.5,2 --param POWERUP_TYPES.SHIELD.duration=4000,8000 \
+#       --out sweep.npz
+#
+# Every combination of --param values is a parameter set, and every set
+# plays the same seeds so the sets can be compared game for game. Names are
+# anything in constants.py; dotted names reach into dicts such as
+# POWERUP_TYPES. Work goes out to the pool in chunks of games so the
+# workers stay busy without paying pickling overhead per game.
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+POLICIES = ('sweep', 'random', 'idle', 'walker', 'dodger', 'aimer')
+RESULT_COLUMNS = ('params', 'seed', 'policy', 'score', 'level', 'ticks',
+                  'game_over', 'ms_per_tick')
+
+# One AssetManager per worker process, building sprites is not free
+worker_assets = None
+
+
+def parse_param(text):
+    # NAME=v1,v2,... with each value a Python literal
+    name, sep, values = text.partition('=')
+    if not sep or not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE[,VALUE...], got {text!r}")
+    try:
+        parsed = [ast.literal_eval(value.strip()) for value in values.split(',')]
+    except (ValueError, SyntaxError):
+        raise argparse.ArgumentTypeError(f"values for {name} must be Python literals")
+    return name.strip(), parsed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run many headless games for balance sweeps")
+    parser.add_argument('--games', type=int, default=100,
+                        help="games per parameter set (default 100)")
+    parser.add_argument('--ticks', type=int, default=3600,
+                        help="tick limit per game (default 3600, one minute of play)")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="first seed, games use seed, seed+1, ... (default 0)")
+    parser.add_argument('--policy', choices=POLICIES, default='random',
+                        help="who plays: sweep (scripted), random, idle or one of the bots "
+                             "(walker, dodger, aimer) (default random)")
+    parser.add_argument('--param', type=parse_param, action='append', default=[],
+                        metavar='NAME=V1,V2', help="constant to override, repeat for a grid")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument('--chunk', type=int, default=None,
+                        help="games per work item (default: a few items per worker)")
+    parser.add_argument('--out', default='batch_results.npz',
+                        help="results file, .npz or .csv (default batch_results.npz)")
+    return parser.parse_args(argv)
+
+
+def param_grid(params):
+    # Every combination of the overridden values, as a list of dicts
+    names = [name for name, _ in params]
+    return [dict(zip(names, values))
+            for values in itertools.product(*(values for _, values in params))]
+
+
+def check_param_names(names):
+    import constants
+    for name in names:
+        path = name.split('.')
+        if not hasattr(constants, path[0]):
+            raise SystemExit(f"unknown constant {path[0]}")
+        target = getattr(constants, path[0])
+        for key in path[1:]:
+            if not isinstance(target, dict) or key not in target:
+                raise SystemExit(f"{name}: no {key!r} in {path[0]}")
+            target = target[key]
+
+
+def apply_overrides(overrides):
+    # Modules pull constants in with `import *`, so each module has its own
+    # copy of the name. Patch every copy that still holds the original
+    # value, and return a function that puts everything back.
+    import constants
+    undo = []
+    for name, value in overrides.items():
+        path = name.split('.')
+        if len(path) > 1:
+            target = getattr(constants, path[0])
+            for key in path[1:-1]:
+                target = target[key]
+            undo.append((target.__setitem__, path[-1], target[path[-1]]))
+            target[path[-1]] = value
+            continue
+
+        original = getattr(constants, name)
+        for module in list(sys.modules.values()):
+            namespace = getattr(module, '__dict__', None)
+            if namespace is not None and namespace.get(name, None) is original:
+                undo.append((namespace.__setitem__, name, original))
+                namespace[name] = value
+
+    def restore():
+        for setter, key, value in reversed(undo):
+            setter(key, value)
+    return restore
+
+
+def make_policy(policy, seed):
+    from controls import SweepInput, RandomInput, NullInput
+    from bots import BOTS
+    if policy in BOTS:
+        return BOTS[policy](seed)
+    if policy == 'sweep':
+        return SweepInput()
+    if policy == 'random':
+        return RandomInput(seed)
+    return NullInput()
+
+
+def run_game(seed, policy, ticks, asset_manager):
+    from simulation import Simulation
+    sim = Simulation(seed, asset_manager, input_source=make_policy(policy, seed))
+    start = time.perf_counter()
+    sim.run(ticks)
+    elapsed = time.perf_counter() - start
+    return (seed, sim.score, sim.level, sim.tick, sim.game_over,
+            elapsed * 1000 / max(1, sim.tick))
+
+
+def run_chunk(params_index, overrides, seeds, policy, ticks):
+    # Runs in a worker: a batch of games under one parameter set
+    global worker_assets
+    import simulation
+    from assets import AssetManager
+    from sprite_cache import SpriteCache
+    if worker_assets is None:
+        worker_assets = AssetManager(cache=SpriteCache())
+
+    restore = apply_overrides(overrides)
+    try:
+        return params_index, [run_game(seed, policy, ticks, worker_assets) for seed in seeds]
+    finally:
+        restore()
+
+
+def write_results(path, columns):
+    if path.endswith('.csv'):
+        names = list(columns)
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(names)
+            writer.writerows(zip(*(columns[name] for name in names)))
+        return
+
+    import numpy as np
+    np.savez_compressed(path, **{name: np.asarray(values) for name, values in columns.items()})
+
+
+def summarize(grid, columns):
+    print(f"{'set':>4} {'games':>6} {'score':>9} {'level':>6} {'ticks':>7} "
+          f"{'died':>5} {'ms/tick':>8}  params")
+    for index, overrides in enumerate(grid):
+        rows = [i for i, p in enumerate(columns['params']) if p == index]
+        if not rows:
+            continue
+        n = len(rows)
+
+        def mean(name):
+            return sum(columns[name][i] for i in rows) / n
+
+        died = sum(1 for i in rows if columns['game_over'][i])
+        label = ' '.join(f"{name}={value!r}" for name, value in overrides.items()) or '(defaults)'
+        print(f"{index:>4} {n:>6} {mean('score'):>9.0f} {mean('level'):>6.2f} "
+              f"{mean('ticks'):>7.0f} {died / n:>5.0%} {mean('ms_per_tick'):>8.3f}  {label}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    grid = param_grid(args.param)
+    check_param_names(grid[0])
+
+    workers = args.workers or os.cpu_count() or 1
+    seeds = list(range(args.seed, args.seed + args.games))
+    chunk = args.chunk or max(1, len(seeds) * len(grid) // (workers * 4))
+
+    columns = {name: [] for name in RESULT_COLUMNS}
+    for name in grid[0]:
+        columns[name] = []
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_chunk, index, overrides, seeds[i:i + chunk],
+                               args.policy, args.ticks)
+                   for index, overrides in enumerate(grid)
+                   for i in range(0, len(seeds), chunk)]
+        for future in as_completed(futures):
+            index, rows = future.result()
+            for seed, score, level, ticks, game_over, ms_per_tick in rows:
+                columns['params'].append(index)
+                columns['seed'].append(seed)
+                columns['policy'].append(args.policy)
+                columns['score'].append(score)
+                columns['level'].append(level)
+                columns['ticks'].append(ticks)
+                columns['game_over'].append(game_over)
+                columns['ms_per_tick'].append(ms_per_tick)
+                for name, value in grid[index].items():
+                    columns[name].append(value)
+    elapsed = time.perf_counter() - start
+
+    # Workers finish out of order, put rows back in (params, seed) order
+    order = sorted(range(len(columns['seed'])),
+                   key=lambda i: (columns['params'][i], columns['seed'][i]))
+    columns = {name: [values[i] for i in order] for name, values in columns.items()}
+
+    write_results(args.out, columns)
+    summarize(grid, columns)
+    print(f"{len(order)} games on {workers} workers in {elapsed:.1f}s, wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
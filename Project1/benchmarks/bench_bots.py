@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from constants import *
+from enemy import EnemyWave
+from controls import NullInput
+from simulation import Simulation
+from assets import AssetManager
+from bots import BOTS, make_bot
+
+# What the bots cost to run in the heavy states they are for: a level 15
+# wave with spread shot and homing running and the enemies firing hard.
+# For each bot, the time one poll takes and the ticks per second of a game
+# it plays, against a game nobody plays (idle), and how often the ship got
+# hit. The player can't die so every game lasts the full length.
+
+LEVEL = 15
+EFFECTS = ('SPREAD_SHOT', 'HOMING', 'RAPID_FIRE')
+
+
+def heavy_sim(seed, source, assets):
+    sim = Simulation(seed, assets, input_source=source)
+    sim.level = LEVEL
+    sim.enemy_wave = EnemyWave(LEVEL, assets, sim.rng, registry=sim.enemy_registry,
+                               fire_chance=0.01, front_row_only=False)
+    sim.rebuild_enemy_grid()
+    for effect in EFFECTS:
+        sim.powerup_manager.activate_powerup(effect, 0, 10 ** 9)
+    sim.player.invulnerable = True
+    sim.player.invulnerable_end = 10 ** 9
+    return sim
+
+
+def play(name, seed, ticks, assets):
+    source = make_bot(name, seed) if name in BOTS else NullInput()
+    poll = source.poll
+    spent = [0.0]
+
+    def timed_poll(world):
+        start = time.perf_counter()
+        state = poll(world)
+        spent[0] += time.perf_counter() - start
+        return state
+    source.poll = timed_poll
+
+    sim = heavy_sim(seed, source, assets)
+    hits = [0]
+    take_damage = sim.player.take_damage
+
+    def counted_damage(current_time):
+        hits[0] += 1
+        return take_damage(current_time)
+    sim.player.take_damage = counted_damage
+
+    bullets = 0
+    start = time.perf_counter()
+    for _ in range(ticks):
+        sim.step()
+        bullets += len(sim.enemy_bullets)
+    elapsed = time.perf_counter() - start
+    return spent[0] / ticks, ticks / elapsed, bullets / ticks, hits[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bot poll cost in a heavy game")
+    parser.add_argument('--ticks', type=int, default=1200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    assets = AssetManager()
+    print(f"level {LEVEL}, {', '.join(EFFECTS).lower()}, {args.ticks} ticks")
+    print(f"{'bot':>8} {'poll us':>8} {'ticks/s':>8} {'bullets':>8} {'hits':>5}")
+    for name in ('idle',) + tuple(BOTS):
+        per_poll, rate, bullets, hits = play(name, args.seed, args.ticks, assets)
+        print(f"{name:>8} {per_poll * 1e6:>8.1f} {rate:>8.0f} {bullets:>8.1f} {hits:>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import os
+import sys
+import random
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from constants import *
+from bullet import BulletPool
+from legacy_bullet import Bullet
+from enemy import EnemyWave
+from collision import SpatialHash
+
+# Memory allocated in the bullet path, measured with tracemalloc. Per frame
+# it takes what the frame leaves behind (net) and the most it held at once
+# above where it started (peak, reset every frame), so garbage made and
+# dropped inside a frame shows up too. Peak is per live bullet and checked
+# against a budget per path:
+#
+#   objects  the compact Bullet objects (benchmarks/legacy_bullet.py)
+#   legacy   the same with get_rect as it was before: a new Rect every call,
+#            sized from the sprite or type each time. Held to the objects
+#            budget and expected to fail it, so the check is shown to bite.
+#   pool     BulletPool, the game's path: firing, culling and the
+#            per-tick reject plus sweep queries of check_collisions
+#
+# Exits non-zero if a path goes over budget or the legacy baseline doesn't,
+# so it works as a check as well as a benchmark.
+
+BULLETS = 2000
+FRAMES = 200
+WARMUP = 20
+POOL_LEVEL = 5
+NET_BUDGET = 64  # bytes per frame, allowing for tracemalloc's own noise
+SIZE_BUDGET = 320  # bytes held per Bullet
+# Peak bytes per live bullet. The objects frame holds a list slot per
+# bullet. The pool works in its own scratch arrays, so all it holds is per
+# call rather than per bullet: the hit lists and numpy's sort buffer.
+PEAK_BUDGET = {'objects': 16, 'legacy': 16, 'pool': 16}
+
+
+class LegacyBullet(Bullet):
+    __slots__ = ()
+
+    def get_rect(self):
+        if self.sprite:
+            return pygame.Rect(self.x - self.sprite.get_width() // 2,
+                               self.y - self.sprite.get_height() // 2,
+                               self.sprite.get_width(), self.sprite.get_height())
+        return pygame.Rect(self.x - self.width // 2, self.y - self.height // 2,
+                           self.width, self.height)
+
+
+def measure(frame):
+    # frame() returns how many bullets were live. Gives net bytes per frame
+    # and the highest peak per live bullet seen in any frame.
+    for _ in range(WARMUP):
+        frame()
+    here = tracemalloc.Filter(False, tracemalloc.__file__)
+    worst = 0
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        for _ in range(FRAMES):
+            start, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            live = frame()
+            _, peak = tracemalloc.get_traced_memory()
+            worst = max(worst, (peak - start) / max(live, 1))
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    stats = after.filter_traces([here]).compare_to(before.filter_traces([here]), 'filename')
+    net = sum(stat.size_diff for stat in stats)
+    return net / FRAMES, worst
+
+
+def bullet_size(rng):
+    # Bytes held per Bullet, averaged over a batch of them
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        bullets = [Bullet(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT),
+                          piercing=rng.random() < 0.5) for _ in range(BULLETS)]
+        held, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (held - start - sys.getsizeof(bullets)) / len(bullets)
+
+
+def object_frame(rng, bullet_class=Bullet):
+    # Slow drifters so nobody leaves the screen, half of them piercing. The
+    # rects are kept for a batch test against the player, so anything
+    # get_rect allocates is still held at the end of the frame rather than
+    # freed before the next call.
+    bullets = []
+    for _ in range(BULLETS):
+        bullet = bullet_class(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT),
+                              piercing=rng.random() < 0.5)
+        bullet.vx = rng.uniform(-0.05, 0.05)
+        bullet.vy = rng.uniform(-0.05, 0.05)
+        bullets.append(bullet)
+    player_rect = pygame.Rect(SCREEN_WIDTH // 2 - 25, SCREEN_HEIGHT - 65, 50, 30)
+
+    def frame():
+        for bullet in bullets:
+            bullet.update()
+        rects = [bullet.get_rect() for bullet in bullets]
+        player_rect.collidelistall(rects)
+        return len(bullets)
+    return frame
+
+
+def legacy_frame(rng):
+    return object_frame(rng, LegacyBullet)
+
+
+def pool_frame(rng):
+    # Steady fire from the bottom of the screen up through a wave, culled
+    # off the top, with the bullet-enemy pass of Simulation.check_collisions
+    pool = BulletPool(capacity=BULLETS)
+    wave = EnemyWave(POOL_LEVEL, rng=random.Random(0))
+    grid = SpatialHash()
+    grid.rebuild(wave.live(), wave.boxes())
+    bounds = wave.bounds()
+    player_rect = pygame.Rect(SCREEN_WIDTH // 2 - 25, SCREEN_HEIGHT - 65, 50, 30)
+    xs = [rng.uniform(0, SCREEN_WIDTH) for _ in range(64)]
+    shot = [0]
+
+    def frame():
+        for _ in range(8):
+            pool.spawn(xs[shot[0] % len(xs)], SCREEN_HEIGHT, piercing=shot[0] % 2 == 0)
+            shot[0] += 1
+        pool.update()
+        candidates = pool.passing(*bounds)
+        vx = pool.vx
+        vy = pool.vy
+        for i in candidates.tolist():
+            grid.query_sweep(pool.get_rect(i), vx.item(i), vy.item(i))
+        pool.collide_rect(player_rect)
+        live = len(pool)
+        pool.flush()
+        return live
+
+    # Keep firing until the first shots are off the top, so every frame
+    # measured has the steady number of bullets in flight
+    last, live = -1, 0
+    while live > last:
+        last, live = live, frame()
+    return frame
+
+
+def main():
+    failed = []
+    size = bullet_size(random.Random(0))
+    print(f"{size:.0f} bytes per Bullet (budget {SIZE_BUDGET})")
+    if size > SIZE_BUDGET:
+        failed.append("Bullet size")
+    print(f"{'path':>8} {'net B/frame':>12} {'peak B/bullet':>14} {'budget':>7}")
+    for name, make in (('objects', object_frame), ('legacy', legacy_frame),
+                       ('pool', pool_frame)):
+        net, peak = measure(make(random.Random(0)))
+        print(f"{name:>8} {net:>12.1f} {peak:>14.1f} {PEAK_BUDGET[name]:>7}")
+        over = net > NET_BUDGET or peak > PEAK_BUDGET[name]
+        if name == 'legacy':
+            if not over:
+                failed.append("legacy baseline passed, so the check can't see get_rect allocating")
+        elif over:
+            failed.append(f"{name} path")
+    if failed:
+        raise SystemExit("over budget: " + ", ".join(failed))
+
+
+if __name__ == "__main__":
+    main()
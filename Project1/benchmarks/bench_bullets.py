@@ -0,0 +1,75 @@
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from constants import *
+from bullet import BulletPool
+from legacy_bullet import Bullet
+
+# Per-frame bullet cost with thousands of bullets alive: the old list of
+# Bullet objects (update, rebuild the list, test every rect against the
+# player) against one BulletPool doing the same work in array passes.
+
+FRAMES = 30
+
+
+def make_specs(count, seed=0):
+    rng = random.Random(seed)
+    specs = []
+    for _ in range(count):
+        # Slow drift so nothing leaves the screen while we are timing
+        specs.append((rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT),
+                      rng.uniform(-0.05, 0.05), rng.uniform(-0.05, 0.05)))
+    return specs
+
+
+def run_objects(specs, player_rect):
+    bullets = []
+    for x, y, vx, vy in specs:
+        bullet = Bullet(x, y)
+        bullet.vx = vx
+        bullet.vy = vy
+        bullets.append(bullet)
+
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        bullets = [b for b in bullets if b.update()]
+        hits = 0
+        for bullet in bullets:
+            if bullet.get_rect().colliderect(player_rect):
+                hits += 1
+    return (time.perf_counter() - start) / FRAMES, len(bullets)
+
+
+def run_pool(specs, player_rect):
+    pool = BulletPool(capacity=len(specs))
+    for x, y, vx, vy in specs:
+        i = pool.spawn(x, y)
+        pool.set_velocity(i, vx, vy)
+
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        pool.update()
+        hits = len(pool.collide_rect(player_rect))
+    return (time.perf_counter() - start) / FRAMES, len(pool)
+
+
+def main():
+    player_rect = pygame.Rect(SCREEN_WIDTH // 2 - 25, SCREEN_HEIGHT - 65, 50, 30)
+    print(f"{'bullets':>8} {'objects ms':>11} {'pool ms':>9} {'speedup':>8}")
+    for count in (5000, 10000, 20000):
+        specs = make_specs(count)
+        objects_time, objects_alive = run_objects(specs, player_rect)
+        pool_time, pool_alive = run_pool(specs, player_rect)
+        if objects_alive != pool_alive:
+            raise SystemExit(f"pool kept {pool_alive} bullets, objects kept {objects_alive}")
+        print(f"{count:>8} {objects_time * 1000:>11.2f} {pool_time * 1000:>9.2f} "
+              f"{objects_time / pool_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
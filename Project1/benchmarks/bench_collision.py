@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from constants import *
+from enemy import EnemyWave
+from legacy_bullet import Bullet
+from collision import SpatialHash
+
+# Player bullets vs a full wave: the old nested loop against the spatial hash.
+# Both paths have to agree on every (bullet, enemy) hit before we time them.
+
+
+def make_scene(bullet_count, level=20, seed=0):
+    rng = random.Random(seed)
+    wave = EnemyWave(level)
+    bullets = []
+    for _ in range(bullet_count):
+        bullet = Bullet(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT),
+                        piercing=rng.random() < 0.5)
+        bullets.append(bullet)
+    return bullets, wave.enemies
+
+
+def brute_force_hits(bullets, enemies):
+    hits = []
+    for bi, bullet in enumerate(bullets):
+        for enemy in enemies:
+            if bullet.get_rect().colliderect(enemy.rect):
+                hits.append((bi, id(enemy)))
+                if not bullet.piercing:
+                    break
+    return hits
+
+
+def grid_hits(bullets, enemies, grid):
+    grid.rebuild(enemies)
+    hits = []
+    for bi, bullet in enumerate(bullets):
+        for enemy in grid.query_rect(bullet.get_rect()):
+            hits.append((bi, id(enemy)))
+            if not bullet.piercing:
+                break
+    return hits
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    grid = SpatialHash()
+    print(f"{'bullets':>8} {'enemies':>8} {'brute ms':>10} {'grid ms':>10} {'speedup':>8}")
+    for count in (1000, 10000):
+        bullets, enemies = make_scene(count)
+        expected = brute_force_hits(bullets, enemies)
+        if grid_hits(bullets, enemies, grid) != expected:
+            raise SystemExit(f"grid disagrees with brute force at {count} bullets")
+
+        repeat = 5 if count <= 1000 else 2
+        brute = best_of(lambda: brute_force_hits(bullets, enemies), repeat)
+        fast = best_of(lambda: grid_hits(bullets, enemies, grid), repeat)
+        print(f"{count:>8} {len(enemies):>8} {brute * 1000:>10.2f} {fast * 1000:>10.2f} "
+              f"{brute / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
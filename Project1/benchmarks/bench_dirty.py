@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Headless by default. SDL's offscreen driver does the work of a present
+# in software, the dummy driver skips it; set SDL_VIDEODRIVER to time
+# against a real display.
+os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+from constants import *
+from controls import SweepInput
+
+# Full redraw and flip against the dirty-rectangle renderer in an ordinary
+# game: a normal wave, the player sweeping and firing, a few bullets each
+# way, the stars scrolling. Both play the same seeded frames. Reports the
+# time for update + draw with the driver's own display.update/flip, how
+# much of that was presenting, how much of the screen dirty mode presented
+# and how often it fell back to a full flip.
+
+
+def play(dirty_rects, frames, warmup):
+    from game import Game
+    game = Game(seed=0, input_source=SweepInput(), dirty_rects=dirty_rects)
+    game.sim.player.invulnerable = True
+    game.sim.player.invulnerable_end = 10 ** 9
+    for _ in range(warmup):
+        game.update()
+        game.draw()
+
+    presented = [0, 0, 0.0]  # pixels, full flips, seconds presenting
+    update = pygame.display.update
+    flip = pygame.display.flip
+
+    def counted_update(rects):
+        presented[0] += sum(rect.width * rect.height for rect in rects)
+        start = time.perf_counter()
+        update(rects)
+        presented[2] += time.perf_counter() - start
+
+    def counted_flip():
+        presented[0] += SCREEN_WIDTH * SCREEN_HEIGHT
+        presented[1] += 1
+        start = time.perf_counter()
+        flip()
+        presented[2] += time.perf_counter() - start
+    pygame.display.update = counted_update
+    pygame.display.flip = counted_flip
+    try:
+        start = time.perf_counter()
+        for _ in range(frames):
+            game.update()
+            game.draw()
+        elapsed = time.perf_counter() - start
+    finally:
+        pygame.display.update = update
+        pygame.display.flip = flip
+    share = presented[0] / (frames * SCREEN_WIDTH * SCREEN_HEIGHT)
+    return elapsed * 1000 / frames, presented[2] * 1000 / frames, share, presented[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full flip against dirty rects")
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--warmup', type=int, default=300)
+    args = parser.parse_args()
+
+    pygame.display.init()
+    pygame.font.init()
+    print(f"driver {pygame.display.get_driver()}, {args.frames} frames")
+    print(f"{'mode':>7} {'ms/frame':>9} {'present ms':>11} {'presented':>10} {'flips':>6}")
+    results = {}
+    for name, dirty_rects in (('full', False), ('dirty', True)):
+        ms, present, share, flips = play(dirty_rects, args.frames, args.warmup)
+        results[name] = ms
+        print(f"{name:>7} {ms:>9.3f} {present:>11.3f} {share:>10.0%} {flips:>6}")
+    print(f"dirty mode {results['full'] / results['dirty']:.2f}x the frame rate")
+
+
+if __name__ == "__main__":
+    main()
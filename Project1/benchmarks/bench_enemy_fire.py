@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import *
+from enemy import EnemyWave
+
+# Enemy fire per tick: the old roll-per-enemy loop against the wave's
+# geometric-skip sampler. Also checks the two agree on how often each
+# enemy fires, so the game plays the same.
+
+TICKS = 200000
+
+
+def roll_each(wave, rng, chance):
+    return [enemy for enemy in wave.enemies if rng.random() < chance]
+
+
+def count_shots(wave, pick):
+    counts = [0] * len(wave.enemies)
+    slot = {enemy: i for i, enemy in enumerate(wave.enemies)}
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        for enemy in pick():
+            counts[slot[enemy]] += 1
+    return (time.perf_counter() - start) / TICKS, counts
+
+
+def main():
+    print(f"{'level':>6} {'enemies':>8} {'scale':>6} {'rolls us':>9} {'batch us':>9} "
+          f"{'speedup':>8} {'rolls/tick':>11} {'batch/tick':>11}")
+    for level, scale in ((1, 1.0), (1, SLOW_TIME_FIRE_SCALE), (15, 1.0)):
+        wave = EnemyWave(level, rng=random.Random(1))
+        chance = wave.fire_chance * scale
+        rng = random.Random(2)
+        roll_time, roll_counts = count_shots(wave, lambda: roll_each(wave, rng, chance))
+        batch_time, batch_counts = count_shots(wave, lambda: wave.get_shooters(scale))
+
+        # Same mean, and no enemy is favoured: the busiest and quietest
+        # slots should sit within a few standard deviations of the mean
+        expected = TICKS * chance
+        spread = 5 * expected ** 0.5
+        for name, counts in (('rolls', roll_counts), ('batch', batch_counts)):
+            if max(counts) > expected + spread or min(counts) < expected - spread:
+                raise SystemExit(f"{name} per-enemy fire counts {min(counts)}..{max(counts)} "
+                                 f"are off the expected {expected:.0f}")
+
+        print(f"{level:>6} {len(wave.enemies):>8} {scale:>6.1f} {roll_time * 1e6:>9.2f} "
+              f"{batch_time * 1e6:>9.2f} {roll_time / batch_time:>7.1f}x "
+              f"{sum(roll_counts) / TICKS:>11.4f} {sum(batch_counts) / TICKS:>11.4f}")
+
+    # Front row only: never more shooters than columns
+    wave = EnemyWave(15, rng=random.Random(3), front_row_only=True)
+    front = wave.front_row()
+    lowest = {}
+    for enemy in wave.enemies:
+        column = int(wave.column[enemy.index])
+        if column not in lowest or enemy.y > lowest[column].y:
+            lowest[column] = enemy
+    if front != sorted(lowest.values(), key=lambda enemy: enemy.index):
+        raise SystemExit("front_row() did not pick the lowest enemy of each column")
+    print(f"front row: {len(front)} of {len(wave.enemies)} enemies can shoot")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import *
+from enemy import EnemyWave
+from collision import SpatialHash
+from simulation import NEAREST_SCAN_MAX
+
+# Homing target lookups: scanning every live enemy for the closest one in
+# Python, EnemyWave.nearest's argmin over the wave's arrays, and
+# SpatialHash.nearest over the grid the simulation already builds. All
+# three have to pick the same enemy for every query before we time them.
+# The simulation uses the argmin up to NEAREST_SCAN_MAX enemies and the
+# grid past that; the last waves are stress sizes either side of it.
+# Exits non-zero if the one it uses is well behind the other.
+
+QUERIES = 2000
+SLACK = 1.5  # how far behind the other lookup the one used may be
+
+
+def scan_nearest(enemies, x, y):
+    best = None
+    best_dist = None
+    for enemy in enemies:
+        dx = enemy.rect.centerx - x
+        dy = enemy.rect.centery - y
+        dist = dx * dx + dy * dy
+        if best_dist is None or dist < best_dist:
+            best = enemy
+            best_dist = dist
+    return best
+
+
+def per_query(find, points):
+    start = time.perf_counter()
+    for x, y in points:
+        find(x, y)
+    return (time.perf_counter() - start) / len(points)
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'level':>6} {'enemies':>8} {'scan us':>8} {'argmin us':>10} {'grid us':>8} "
+          f"{'uses':>7}")
+    # (level, rows, cols, share of the wave already shot down)
+    for level, rows, cols, kill in ((1, None, None, 0.0), (25, None, None, 0.0),
+                                    (25, None, None, 0.8), (25, 16, 16, 0.0),
+                                    (25, 32, 32, 0.0), (25, 32, 64, 0.0),
+                                    (25, 64, 64, 0.0)):
+        wave = EnemyWave(level, rng=random.Random(1), rows=rows, cols=cols)
+        for enemy in wave.live():
+            if rng.random() < kill:
+                wave.remove(enemy)
+        wave.flush()
+        enemies = wave.live()
+        grid = SpatialHash()
+        grid.rebuild(enemies, wave.boxes())
+        points = [(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT))
+                  for _ in range(QUERIES)]
+
+        # Firing asks from the ship's rect, in whole pixels
+        checks = points + [(int(x), int(y)) for x, y in points]
+        for x, y in checks:
+            found = scan_nearest(enemies, x, y)
+            if found is not grid.nearest(x, y) or found is not wave.nearest(x, y):
+                raise SystemExit(f"scan, argmin and grid disagree at ({x:.1f}, {y:.1f})")
+
+        scan_time = per_query(lambda x, y: scan_nearest(enemies, x, y), points)
+        argmin_time = per_query(wave.nearest, points)
+        grid_time = per_query(grid.nearest, points)
+        uses = 'argmin' if len(enemies) <= NEAREST_SCAN_MAX else 'grid'
+        print(f"{level:>6} {len(enemies):>8} {scan_time * 1e6:>8.1f} {argmin_time * 1e6:>10.1f} "
+              f"{grid_time * 1e6:>8.1f} {uses:>7}")
+        used, other = ((argmin_time, grid_time) if uses == 'argmin'
+                       else (grid_time, argmin_time))
+        if used > other * SLACK:
+            raise SystemExit(f"{uses} is the slower lookup for {len(enemies)} enemies")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+from constants import *
+from controls import SweepInput
+from simulation import TICK_MS
+
+# Tick steadiness under render stalls: the normal loop against --pipelined.
+# Every few frames draw() sleeps as if a frame hitched, and we record when
+# each simulation tick actually ran. The single-threaded loop stops ticking
+# for the whole stall and then catches up in a burst; the pipelined one
+# should keep ticking every TICK_MS regardless.
+
+
+def run(pipelined, seconds, stall_ms, stall_every):
+    from game import Game
+    pygame.init()
+    game = Game(seed=0, input_source=SweepInput(), pipelined=pipelined)
+    game.sim.player.invulnerable = True
+    game.sim.player.invulnerable_end = 10 ** 9
+
+    tick_times = []
+    step = game.sim.step
+
+    def timed_step(controls=None):
+        tick_times.append(time.perf_counter())
+        step(controls)
+    game.sim.step = timed_step
+
+    frames = [0]
+    draw = game.draw
+
+    def stalling_draw():
+        frames[0] += 1
+        if frames[0] % stall_every == 0:
+            time.sleep(stall_ms / 1000)
+        draw()
+    game.draw = stalling_draw
+
+    pygame.time.set_timer(pygame.QUIT, int(seconds * 1000), loops=1)
+    start = time.perf_counter()
+    game.run()
+    elapsed = time.perf_counter() - start
+
+    gaps = sorted((b - a) * 1000 for a, b in zip(tick_times, tick_times[1:]))
+    if not gaps:
+        return len(tick_times) / elapsed, frames[0] / elapsed, 0.0, 0.0, 0.0
+    p50 = gaps[len(gaps) // 2]
+    p99 = gaps[min(len(gaps) - 1, int(len(gaps) * 0.99))]
+    return len(tick_times) / elapsed, frames[0] / elapsed, p50, p99, gaps[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tick timing under render stalls")
+    parser.add_argument('--seconds', type=float, default=4.0)
+    parser.add_argument('--stall', type=float, default=50.0, help="ms each stall lasts")
+    parser.add_argument('--every', type=int, default=10, help="frames between stalls")
+    args = parser.parse_args()
+
+    print(f"tick budget {TICK_MS:.2f}ms, {args.stall:.0f}ms stall every {args.every} frames")
+    print(f"{'mode':>10} {'ticks/s':>8} {'frames/s':>9} {'gap p50':>8} {'gap p99':>8} {'gap max':>8}")
+    for name, pipelined in (('serial', False), ('pipelined', True)):
+        rate, fps, p50, p99, worst = run(pipelined, args.seconds, args.stall, args.every)
+        print(f"{name:>10} {rate:>8.1f} {fps:>9.1f} {p50:>8.2f} {p99:>8.2f} {worst:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
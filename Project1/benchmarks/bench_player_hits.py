@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from constants import *
+from bullet import BulletPool
+
+# Enemy bullets against the player: collide_rect, which boxes and tests every
+# live bullet, against sweep_rect, which only looks at bullets in the
+# player's y band and columns.
+# At the normal bullet speed the two have to agree on every frame before
+# they are timed. Then the tunnelling check: bullets fast enough to jump
+# over the ship in one tick, fired straight down at it, and how many of
+# them each test sees hit.
+
+FRAMES = 200
+FAST_SPEEDS = (20, 50, 120)
+
+
+def rain(count, rng, speed=BULLET_SPEED):
+    # Enemy fire spread over the whole screen, all falling at one speed
+    pool = BulletPool(capacity=count)
+    for _ in range(count):
+        i = pool.spawn(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT), 1, RED)
+        pool.set_velocity(i, 0, speed)
+    return pool
+
+
+def timed(pool, test, player_rect):
+    # Frames of update + test, with bullets that leave the bottom put back
+    # at the top so the count holds steady
+    spent = 0.0
+    hits = []
+    for _ in range(FRAMES):
+        pool.update()
+        start = time.perf_counter()
+        hits.append(test(player_rect).tolist())
+        spent += time.perf_counter() - start
+        low = pool.y[:pool.size] > SCREEN_HEIGHT
+        pool.y[:pool.size][low] -= SCREEN_HEIGHT
+    return spent / FRAMES, hits
+
+
+def tunnelling(speed, player_rect, shots=200):
+    # Each shot starts somewhere above the ship, lined up with it, and falls
+    # until it is past; the share of shots each test ever catches
+    rng = random.Random(speed)
+    starts = [(rng.uniform(player_rect.left, player_rect.right),
+               player_rect.top - rng.uniform(20, 20 + speed)) for _ in range(shots)]
+    caught = []
+    for test in (BulletPool.collide_rect, BulletPool.sweep_rect):
+        hits = 0
+        for x, y in starts:
+            pool = BulletPool(capacity=1)
+            pool.set_velocity(pool.spawn(x, y, 1, RED), 0, speed)
+            while len(pool):
+                pool.update()
+                if len(test(pool, player_rect)):
+                    hits += 1
+                    break
+        caught.append(hits / shots)
+    return caught
+
+
+def main():
+    player_rect = pygame.Rect(SCREEN_WIDTH // 2 - 25, SCREEN_HEIGHT - 65, 50, 30)
+    print(f"{'bullets':>8} {'all us':>8} {'band us':>8} {'speedup':>8}")
+    for count in (30, 100, 1000, 5000):
+        pool = rain(count, random.Random(count))
+        all_time, all_hits = timed(pool, pool.collide_rect, player_rect)
+        pool = rain(count, random.Random(count))
+        band_time, band_hits = timed(pool, pool.sweep_rect, player_rect)
+        if all_hits != band_hits:
+            raise SystemExit(f"band test disagrees with the full test at {count} bullets")
+        print(f"{count:>8} {all_time * 1e6:>8.1f} {band_time * 1e6:>8.1f} "
+              f"{all_time / band_time:>7.1f}x")
+
+    print()
+    print(f"ship {player_rect.height}px tall, shots aimed straight at it")
+    print(f"{'speed':>6} {'discrete':>9} {'swept':>7}")
+    for speed in (BULLET_SPEED,) + FAST_SPEEDS:
+        discrete, swept = tunnelling(speed, player_rect)
+        print(f"{speed:>6} {discrete:>9.0%} {swept:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
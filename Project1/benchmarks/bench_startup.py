@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+# Cold start: how long from launching main.py until something is on the
+# screen (the splash) and until the first real game frame, plus what the
+# imports cost along the way (python -X importtime). Each run is a fresh
+# interpreter; "cold" starts with an empty sprite cache, "warm" reuses the
+# one the previous run filled. Exits non-zero if the warm splash misses
+# SPLASH_BUDGET, so it works as a check as well as a benchmark.
+
+PROJECT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SPLASH_BUDGET = 400  # ms from launch to the splash, warm
+
+# Runs main.py in the child and reports the clock at each of the first two
+# frames put on screen, then exits. CLOCK_MONOTONIC is shared between
+# processes, so the parent can subtract its own launch time. The display
+# is hooked as soon as main.py imports pygame rather than importing it
+# here first, so the probe doesn't change what startup has to do.
+PROBE = """
+import os, sys, time, builtins
+frames = []
+def presented(*args, **kwargs):
+    frames.append(time.monotonic())
+    if len(frames) == 2:
+        print(*frames, flush=True)
+        os._exit(0)
+    return real_flip() if not args else real_update(*args, **kwargs)
+def watching_import(*args, **kwargs):
+    global real_flip, real_update
+    module = real_import(*args, **kwargs)
+    display = sys.modules.get('pygame.display')
+    if display is not None and builtins.__import__ is watching_import:
+        builtins.__import__ = real_import
+        real_flip, real_update = display.flip, display.update
+        display.flip = display.update = presented
+    return module
+real_import = builtins.__import__
+builtins.__import__ = watching_import
+sys.argv = ['main.py'] + sys.argv[1:]
+exec(compile(open('main.py').read(), 'main.py', 'exec'), {'__name__': '__main__'})
+"""
+
+
+def launch(cache_dir, game_args):
+    env = dict(os.environ, SPRITE_CACHE_DIR=cache_dir, PYGAME_HIDE_SUPPORT_PROMPT='1')
+    env.setdefault('SDL_VIDEODRIVER', 'dummy')
+    env.setdefault('SDL_AUDIODRIVER', 'dummy')
+    start = time.monotonic()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE, *game_args],
+                            cwd=PROJECT, env=env, capture_output=True, text=True, timeout=60)
+    stamps = result.stdout.split()
+    if result.returncode != 0 or len(stamps) != 2:
+        raise SystemExit(f"startup probe failed:\n{result.stderr[-2000:]}")
+    splash, frame = (float(stamp) - start for stamp in stamps)
+    return splash * 1000, frame * 1000, parse_importtime(result.stderr)
+
+
+def parse_importtime(text):
+    # Top-level imports only, as {module: cumulative ms}
+    imports = {}
+    for line in text.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):
+            imports[name.strip()] = int(cumulative) / 1000
+    return imports
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time from launch to the first frames")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--imports', type=int, default=8, help="slowest top-level imports to list")
+    parser.add_argument('game_args', nargs='*', help="passed on to main.py (after --)")
+    args = parser.parse_args()
+
+    results = {}
+    imports = {}
+    for mode in ('cold', 'warm'):
+        splashes, frames = [], []
+        for _ in range(args.runs):
+            cache_dir = tempfile.mkdtemp(prefix='sprite_cache_')
+            try:
+                if mode == 'warm':
+                    launch(cache_dir, args.game_args)
+                splash, frame, imported = launch(cache_dir, args.game_args)
+            finally:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+            splashes.append(splash)
+            frames.append(frame)
+            for name, ms in imported.items():
+                imports.setdefault(name, []).append(ms)
+        results[mode] = (median(splashes), median(frames))
+
+    print(f"{'import':>24} {'ms':>8}")
+    slowest = sorted(imports.items(), key=lambda item: -median(item[1]))[:args.imports]
+    for name, times in slowest:
+        print(f"{name:>24} {median(times):>8.1f}")
+    print()
+    print(f"{'start':>6} {'splash ms':>10} {'first frame ms':>15}")
+    for mode, (splash, frame) in results.items():
+        print(f"{mode:>6} {splash:>10.1f} {frame:>15.1f}")
+    if results['warm'][0] > SPLASH_BUDGET:
+        raise SystemExit(f"splash took longer than {SPLASH_BUDGET}ms")
+
+
+if __name__ == "__main__":
+    main()
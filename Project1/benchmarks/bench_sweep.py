@@ -0,0 +1,129 @@
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import *
+from enemy import EnemyWave
+from bullet import BulletPool
+from collision import SpatialHash
+from simulation import TICK_MS
+
+# Player bullets against the formation: query_rect on where each bullet
+# ends up against query_sweep over its whole move.
+#
+# First piercing shots, lasers and plain bullets, fired straight up through
+# a full column at rising speeds, counting how many of the column's enemies
+# each test lets a shot hit and whether the hits come out nearest first.
+# Then a saturated pass, a full wave with the screen full of fast bullets,
+# timed against TICK_MS.
+
+LEVEL = 20
+SPEEDS = (BULLET_SPEED * 1.5, 20, 50, 120)
+SHOTS = 100
+SATURATION_BULLETS = 3000
+SATURATION_SPEED = 50
+REPEAT = 5
+
+
+def formation():
+    wave = EnemyWave(LEVEL, rng=random.Random(0))
+    grid = SpatialHash()
+    grid.rebuild(wave.live(), wave.boxes())
+    return wave, grid
+
+
+def discrete(grid, rect, dx, dy):
+    return grid.query_rect(rect)
+
+
+def swept(grid, rect, dx, dy):
+    return grid.query_sweep(rect, dx, dy)
+
+
+def queries(test, pool, grid, idx):
+    # Hits for each of the slots idx, the way Simulation.check_collisions
+    # walks them
+    for i in idx.tolist():
+        yield test(grid, pool.get_rect(i), pool.vx.item(i), pool.vy.item(i))
+
+
+def column_shots(test, bullet_type, speed, wave, grid):
+    # Each shot starts under a random enemy of the bottom row at a random
+    # phase and flies up through the column, hitting each enemy only once
+    rng = random.Random(int(speed))
+    left, top, right, bottom = wave.bounds()
+    bottom_row = [enemy for enemy in wave.live() if enemy.rect.bottom == bottom]
+    rows = len({enemy.rect.top for enemy in wave.live()})
+    found = 0
+    in_order = True
+    for _ in range(SHOTS):
+        target = rng.choice(bottom_row)
+        pool = BulletPool(capacity=1)
+        i = pool.spawn(target.rect.centerx, bottom + 20 + rng.uniform(0, speed),
+                       bullet_type=bullet_type, piercing=True)
+        pool.set_velocity(i, 0, -speed)
+        hit = []
+        while pool.y[i] > top - speed:
+            pool.update()
+            for found_now in queries(test, pool, grid, pool.live()):
+                hit.extend(enemy for enemy in found_now if enemy not in hit)
+        found += len(hit)
+        tops = [enemy.rect.top for enemy in hit]
+        in_order &= tops == sorted(tops, reverse=True)
+    return found / (SHOTS * rows), in_order
+
+
+def saturated_pass(test, wave, grid):
+    # Every bullet on screen moving fast, mostly upwards, one full pass of
+    # reject plus per-bullet queries like Simulation.check_collisions
+    rng = random.Random(0)
+    pool = BulletPool(capacity=SATURATION_BULLETS)
+    for _ in range(SATURATION_BULLETS):
+        i = pool.spawn(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT),
+                       bullet_type='laser', piercing=rng.random() < 0.3)
+        pool.set_velocity(i, rng.uniform(-5, 5), -SATURATION_SPEED)
+    bounds = wave.bounds()
+    reject = pool.passing if test is swept else pool.overlapping
+
+    def run():
+        return sum(len(found) for found in queries(test, pool, grid, reject(*bounds)))
+
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        hits = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, hits
+
+
+def main():
+    wave, grid = formation()
+    print(f"piercing shots up a column of a level {LEVEL} wave, share of the column hit")
+    print(f"{'type':>7} {'speed':>6} {'discrete':>9} {'swept':>7} {'nearest first':>14}")
+    for bullet_type in ('laser', 'normal'):
+        for speed in SPEEDS:
+            caught, _ = column_shots(discrete, bullet_type, speed, wave, grid)
+            swept_caught, in_order = column_shots(swept, bullet_type, speed, wave, grid)
+            print(f"{bullet_type:>7} {speed:>6.1f} {caught:>9.0%} {swept_caught:>7.0%} "
+                  f"{str(in_order):>14}")
+            if swept_caught < 1 or not in_order:
+                raise SystemExit(f"swept test missed or misordered {bullet_type} hits "
+                                 f"at speed {speed}")
+
+    print()
+    print(f"{SATURATION_BULLETS} bullets at speed {SATURATION_SPEED}, "
+          f"{len(wave.enemies)} enemies, budget {TICK_MS:.1f}ms")
+    print(f"{'test':>9} {'ms':>7} {'hits':>6}")
+    for name, test in (('discrete', discrete), ('swept', swept)):
+        elapsed, hits = saturated_pass(test, wave, grid)
+        print(f"{name:>9} {elapsed * 1000:>7.2f} {hits:>6}")
+    if elapsed * 1000 > TICK_MS:
+        raise SystemExit("swept pass doesn't fit in a tick")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import math
+import pygame
+from constants import *
+from bullet import BULLET_SIZES
+
+# The bullet the game used before BulletPool, one object per bullet. The
+# game no longer uses it, it is kept here for the benchmarks to measure the
+# pool against.
+
+
+class Bullet:
+    # Single bullet as a compact object. Fixed slots instead of a __dict__,
+    # the piercing hit set only made when something is actually hit, and one
+    # rect per bullet that update() moves in place, so a frame of
+    # update/get_rect/collide allocates nothing. There is no draw(): missiles
+    # are only drawn by BulletPool.draw_one, from the cached rotations.
+    __slots__ = ('x', 'y', 'vx', 'vy', 'color', 'bullet_type', 'target', 'piercing',
+                 'damage', 'width', 'height', 'half_width', 'half_height', 'hit_enemies',
+                 'sprite', 'angle', 'rect')
+
+    # (width, height, half width, half height) per (type, sprite), shared by
+    # every bullet so nobody asks the sprite for its size again
+    geometry = {}
+
+    def __init__(self, x, y, direction=-1, color=WHITE, bullet_type='normal', 
+                 target=None, piercing=False, damage=1, asset_manager=None):
+        self.x = x
+        self.y = y
+        self.vx = 0
+        self.vy = direction * BULLET_SPEED
+        self.color = color
+        self.bullet_type = bullet_type
+        self.target = target
+        self.piercing = piercing
+        self.damage = damage
+        self.hit_enemies = None  # set of enemy ids, made on the first hit
+        self.sprite = None
+        self.angle = 0 
+        
+        if asset_manager:
+            if bullet_type == 'laser':
+                self.sprite = asset_manager.get_sprite('laser')
+            else:
+                self.sprite = asset_manager.get_sprite('missile')
+        
+        geometry = Bullet.geometry.get((bullet_type, self.sprite))
+        if geometry is None:
+            width, height = (self.sprite.get_size() if self.sprite else
+                             BULLET_SIZES.get(bullet_type, BULLET_SIZES['normal']))
+            geometry = Bullet.geometry[(bullet_type, self.sprite)] = (
+                width, height, width // 2, height // 2)
+        self.width, self.height, self.half_width, self.half_height = geometry
+        # Rect(float) truncates, so int() here keeps the old get_rect numbers
+        self.rect = pygame.Rect(int(x - self.half_width), int(y - self.half_height),
+                                self.width, self.height)
+        
+        if bullet_type == 'laser':
+            self.vy *= 1.5
+        elif bullet_type == 'homing' and target:
+            self.update_homing_direction()
+            
+    def update_homing_direction(self):
+        if self.target and hasattr(self.target, 'rect'):
+            dx = self.target.rect.centerx - self.x
+            dy = self.target.rect.centery - self.y
+            dist = math.sqrt(dx**2 + dy**2)
+            if dist > 0:
+                self.vx = (dx / dist) * BULLET_SPEED * 0.8
+                self.vy = (dy / dist) * BULLET_SPEED * 0.8
+           
+                self.angle = math.degrees(math.atan2(-self.vx, self.vy))
+                
+    def update(self, enemies=None):
+        if self.bullet_type == 'homing' and self.target:
+            self.update_homing_direction()
+        else:
+            # Calculate angle for regular bullets
+            if self.vx != 0 or self.vy != 0:
+                self.angle = math.degrees(math.atan2(-self.vx, self.vy))
+            
+        self.x += self.vx
+        self.y += self.vy
+        # Assigning a float to a rect attribute rounds, so truncate first
+        self.rect.x = int(self.x - self.half_width)
+        self.rect.y = int(self.y - self.half_height)
+        
+        # Check if bullet is off screen
+        if self.y < -20 or self.y > SCREEN_HEIGHT + 20:
+            return False
+        if self.x < -20 or self.x > SCREEN_WIDTH + 20:
+            return False
+        return True
+        
+    def get_rect(self):
+        # The bullet's own rect, not a copy. Copy it before changing it.
+        return self.rect
+        
+    def can_hit_enemy(self, enemy):
+        if self.piercing:
+            return self.hit_enemies is None or enemy.eid not in self.hit_enemies
+        return True
+        
+    def mark_enemy_hit(self, enemy):
+        if self.piercing:
+            if self.hit_enemies is None:
+                self.hit_enemies = set()
+            self.hit_enemies.add(enemy.eid)
@@ -0,0 +1,471 @@
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import numpy as np
+import pygame
+from constants import *
+from enemy import EnemyWave
+from bullet import BulletPool, BULLET_TYPES
+from particle import ParticleSystem
+from powerup import PowerupManager
+from controls import InputState
+from explosion import EXPLOSION_FRAMES
+
+# Stress scenarios for every subsystem, timed and saved as JSON so a change
+# can be checked against a baseline:
+#
+#   python benchmarks/suite.py run --save baseline.json
+#   ... change things ...
+#   python benchmarks/suite.py compare baseline.json
+#
+# Each scenario builds its worst case once per repeat (untimed) and then
+# times `inner` calls of the thing under test. The median over repeats is
+# what gets compared; compare exits non-zero if any scenario got slower
+# than the threshold allows.
+
+DEFAULT_REPEATS = 7
+DEFAULT_THRESHOLD = 0.15
+STRESS_LEVEL = 25
+SATURATION_BULLETS = 3000
+BURST_EXPLOSIONS = 200
+DENSE_STARS = 20000
+TYPICAL_TICKS = 300
+
+SCENARIOS = {}
+shared = {}
+
+
+def scenario(name, inner=1):
+    def register(setup):
+        SCENARIOS[name] = (setup, inner)
+        return setup
+    return register
+
+
+def screen():
+    if 'screen' not in shared:
+        pygame.init()
+        shared['screen'] = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    return shared['screen']
+
+
+def assets():
+    if 'assets' not in shared:
+        from assets import AssetManager
+        screen()
+        shared['assets'] = AssetManager()
+    return shared['assets']
+
+
+def stress_sim(seed=0, level=STRESS_LEVEL):
+    # Max-size wave with spread, rapid fire and triple shot running
+    from simulation import Simulation
+    sim = Simulation(seed, assets())
+    sim.level = level
+    sim.enemy_wave = EnemyWave(level, sim.asset_manager, sim.rng, registry=sim.enemy_registry)
+    sim.rebuild_enemy_grid()
+    for effect in ('SPREAD_SHOT', 'RAPID_FIRE', 'TRIPLE_SHOT'):
+        sim.powerup_manager.activate_powerup(effect, 0, 10 ** 9)
+    return sim
+
+
+def fill_bullets(pool, count, rng, target_area=None, enemies=None):
+    # Bullets of every type spread over the screen (or over target_area),
+    # drifting slowly so they stay put for the whole measurement
+    left, top, right, bottom = target_area or (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+    for _ in range(count):
+        bullet_type = rng.choice(BULLET_TYPES)
+        target = rng.choice(enemies) if enemies and bullet_type == 'homing' else None
+        i = pool.spawn(rng.uniform(left, right), rng.uniform(top, bottom),
+                       bullet_type=bullet_type, target=target,
+                       piercing=rng.random() < 0.3, color=CYAN)
+        if bullet_type != 'homing':
+            pool.set_velocity(i, rng.uniform(-0.05, 0.05), rng.uniform(-0.05, 0.05))
+
+
+@scenario('enemy_wave.update', inner=200)
+def enemy_wave_update():
+    wave = EnemyWave(STRESS_LEVEL, assets(), random.Random(0))
+    clock = iter(range(0, 10 ** 9, 16))
+    return lambda: wave.update(next(clock))
+
+
+@scenario('enemy_wave.draw', inner=50)
+def enemy_wave_draw():
+    wave = EnemyWave(STRESS_LEVEL, assets(), random.Random(0))
+    target = screen()
+    return lambda: wave.draw(target)
+
+
+@scenario('enemy_wave.fire', inner=1000)
+def enemy_wave_fire():
+    wave = EnemyWave(STRESS_LEVEL, assets(), random.Random(0))
+    return lambda: wave.get_shooters()
+
+
+@scenario('bullets.update', inner=30)
+def bullets_update():
+    pool = BulletPool(asset_manager=assets())
+    fill_bullets(pool, SATURATION_BULLETS, random.Random(0))
+    return pool.update
+
+
+@scenario('bullets.draw', inner=5)
+def bullets_draw():
+    pool = BulletPool(asset_manager=assets())
+    fill_bullets(pool, SATURATION_BULLETS, random.Random(0))
+    target = screen()
+    return lambda: pool.draw(target)
+
+
+@scenario('player.spread_rapid_fire', inner=300)
+def player_fire():
+    # Fire held with spread, rapid fire and triple shot, the most bullets
+    # the player can put out
+    sim = stress_sim()
+    controls = InputState(fire=True)
+    # A cooldown apart, so every call fires (250ms, longer than with
+    # rapid fire on)
+    clock = iter(range(0, 10 ** 9, sim.player.shot_cooldown))
+    return lambda: sim.update_player(controls, next(clock))
+
+
+@scenario('particles.mega_bomb_update', inner=30)
+def particles_update():
+    sim = stress_sim()
+    sim.mega_bomb()
+    particles = sim.particle_system
+    return particles.update
+
+
+@scenario('particles.mega_bomb_draw', inner=5)
+def particles_draw():
+    sim = stress_sim()
+    sim.mega_bomb()
+    particles = sim.particle_system
+    target = screen()
+    return lambda: particles.draw(target)
+
+
+@scenario('powerups.update', inner=100)
+def powerups_update():
+    manager = PowerupManager(random.Random(0))
+    for _ in range(200):
+        manager.spawn_powerup()
+    for effect in POWERUP_TYPES:
+        manager.activate_powerup(effect, 0, 10 ** 9)
+    player_rect = pygame.Rect(SCREEN_WIDTH // 2 - 25, SCREEN_HEIGHT - 65, 50, 30)
+
+    def step():
+        manager.update(0)
+        manager.check_collection(player_rect)
+        manager.flush()
+    return step
+
+
+@scenario('collisions.saturated')
+def collisions():
+    # One collision pass with the formation buried in player bullets of
+    # every type, plus enemy bullets raining on the player. It kills most
+    # of the wave, so each repeat starts again from scratch.
+    sim = stress_sim()
+    rng = random.Random(0)
+    fill_bullets(sim.player_bullets, SATURATION_BULLETS, rng,
+                 sim.enemy_wave.bounds(), sim.enemy_wave.live())
+    fill_bullets(sim.enemy_bullets, SATURATION_BULLETS // 3, rng,
+                 (0, SCREEN_HEIGHT - 200, SCREEN_WIDTH, SCREEN_HEIGHT))
+    sim.player.invulnerable = True
+    sim.player.invulnerable_end = 10 ** 9
+
+    def collide():
+        sim.rebuild_enemy_grid()
+        sim.check_collisions(0)
+    return collide
+
+
+@scenario('explosions.update', inner=20)
+def explosions_update():
+    sim = stress_sim()
+    rng = random.Random(0)
+
+    def step():
+        while len(sim.explosions) < BURST_EXPLOSIONS:
+            sim.add_explosion(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT),
+                              rng.choice(('small', 'medium', 'large')))
+        sim.explosions.update()
+        sim.explosions.flush()
+    return step
+
+
+@scenario('explosions.draw', inner=20)
+def explosions_draw():
+    sim = stress_sim()
+    rng = random.Random(0)
+    for _ in range(BURST_EXPLOSIONS):
+        explosion = sim.explosions.spawn(rng.uniform(0, SCREEN_WIDTH),
+                                         rng.uniform(0, SCREEN_HEIGHT),
+                                         rng.choice(('small', 'medium', 'large')))
+        explosion.frame = rng.randrange(EXPLOSION_FRAMES)
+    target = screen()
+    return lambda: sim.explosions.draw(target, sim.asset_manager)
+
+
+@scenario('background.draw', inner=200)
+def background_draw():
+    # A star field far denser than the game uses, still one blit per layer
+    from starfield import StarField
+    field = StarField(assets(), DENSE_STARS)
+    target = screen()
+    offset = iter(range(10 ** 9))
+    return lambda: field.draw(target, next(offset) * 0.5)
+
+
+@scenario('sim.step_stress', inner=120)
+def sim_step():
+    from controls import SweepInput
+    sim = stress_sim()
+    sim.input_source = SweepInput(period=40)
+    sim.player.invulnerable = True
+    sim.player.invulnerable_end = 10 ** 9
+    return sim.step
+
+
+def stress_game(dirty_rects=False):
+    # A game mid-chaos: full wave, saturated bullets, a mega bomb's worth of
+    # particles and a couple of hundred explosions
+    from game import Game
+    screen()
+    game = Game(seed=0, dirty_rects=dirty_rects)
+    game.asset_manager = assets()
+    sim = game.sim = stress_sim()
+    rng = random.Random(0)
+    fill_bullets(sim.player_bullets, SATURATION_BULLETS, rng, enemies=sim.enemy_wave.live())
+    fill_bullets(sim.enemy_bullets, SATURATION_BULLETS // 3, rng)
+    for enemy in sim.enemy_wave.live()[:48]:
+        sim.particle_system.add_explosion(enemy.rect.centerx, enemy.rect.centery, RED, 20)
+    for _ in range(BURST_EXPLOSIONS):
+        sim.add_explosion(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT),
+                          rng.choice(('small', 'medium', 'large')))
+    return game
+
+
+@scenario('game.draw', inner=5)
+def game_draw():
+    return stress_game().draw
+
+
+@scenario('game.draw_dirty_rects', inner=5)
+def game_draw_dirty():
+    return stress_game(dirty_rects=True).draw
+
+
+def typical_game(dirty_rects=False):
+    # An ordinary game a few seconds in: a normal wave, a sweeping player
+    # firing, a handful of bullets either way
+    from game import Game
+    from controls import SweepInput
+    screen()
+    game = Game(seed=0, input_source=SweepInput(), dirty_rects=dirty_rects)
+    game.sim.player.invulnerable = True
+    game.sim.player.invulnerable_end = 10 ** 9
+    for _ in range(TYPICAL_TICKS):
+        game.update()
+    game.draw()  # the first dirty frame has to paint everything
+    return game
+
+
+def play_frame(game):
+    def frame():
+        game.update()
+        game.draw()
+    return frame
+
+
+@scenario('game.frame_typical', inner=60)
+def game_frame_typical():
+    return play_frame(typical_game())
+
+
+@scenario('game.frame_typical_dirty_rects', inner=60)
+def game_frame_typical_dirty():
+    return play_frame(typical_game(dirty_rects=True))
+
+
+@scenario('startup.first_frame')
+def startup_first_frame():
+    # A fresh interpreter running main.py until the first game frame is on
+    # screen (bench_startup's probe), with the sprite cache already warm
+    from bench_startup import launch
+    if 'sprite_cache' not in shared:
+        import atexit
+        import shutil
+        import tempfile
+        cache_dir = shared['sprite_cache'] = tempfile.mkdtemp(prefix='sprite_cache_')
+        atexit.register(shutil.rmtree, cache_dir, True)
+        launch(cache_dir, [])
+    return lambda: launch(shared['sprite_cache'], [])
+
+
+@scenario('snapshot.capture', inner=20)
+def snapshot_capture():
+    # What the pipelined mode's simulation thread pays after every tick
+    from pipeline import Snapshot
+    sim = stress_game().sim
+    return lambda: Snapshot.capture(sim)
+
+
+@scenario('snapshot.interpolate', inner=20)
+def snapshot_interpolate():
+    from pipeline import Snapshot
+    sim = stress_game().sim
+    previous = Snapshot.capture(sim)
+    sim.step()
+    current = Snapshot.capture(sim)
+    return lambda: current.interpolate(previous, 0.5)
+
+
+def measure(name, repeats):
+    setup, inner = SCENARIOS[name]
+    samples = []
+    for _ in range(repeats):
+        call = setup()
+        start = time.perf_counter()
+        for _ in range(inner):
+            call()
+        samples.append((time.perf_counter() - start) * 1000 / inner)
+    samples.sort()
+    return {
+        'median_ms': samples[len(samples) // 2],
+        'min_ms': samples[0],
+        'max_ms': samples[-1],
+        'repeats': repeats,
+        'inner': inner,
+    }
+
+
+def run_suite(names, repeats):
+    results = {}
+    print(f"{'scenario':<28} {'median ms':>10} {'min ms':>9} {'max ms':>9}")
+    for name in names:
+        result = results[name] = measure(name, repeats)
+        print(f"{name:<28} {result['median_ms']:>10.3f} {result['min_ms']:>9.3f} "
+              f"{result['max_ms']:>9.3f}")
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold):
+    # Returns the names that got slower than the threshold allows
+    regressions = []
+    print(f"{'scenario':<28} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"{name:<28} {'-':>10} {result['median_ms']:>10.3f}      new")
+            continue
+        change = result['median_ms'] / base['median_ms'] - 1 if base['median_ms'] else 0.0
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        elif change < -threshold:
+            flag = '  faster'
+        print(f"{name:<28} {base['median_ms']:>10.3f} {result['median_ms']:>10.3f} "
+              f"{change:>+8.1%}{flag}")
+    return regressions
+
+
+def select(patterns):
+    if not patterns:
+        return list(SCENARIOS)
+    names = [name for name in SCENARIOS if any(p in name for p in patterns)]
+    if not names:
+        raise SystemExit(f"no scenario matches {' '.join(patterns)}")
+    return names
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=1)
+    print(f"wrote {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stress benchmarks for the game subsystems")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="run the scenarios")
+    run.add_argument('--save', metavar='FILE', help="write the results to FILE as JSON")
+
+    cmp = commands.add_parser('compare', help="run (or load) results and check them "
+                                              "against a baseline")
+    cmp.add_argument('baseline', help="baseline JSON from `run --save`")
+    cmp.add_argument('--current', metavar='FILE',
+                     help="compare this results file instead of running the suite")
+    cmp.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                     help=f"allowed slowdown as a fraction (default {DEFAULT_THRESHOLD})")
+    cmp.add_argument('--save', metavar='FILE', help="also write the new results to FILE")
+
+    commands.add_parser('list', help="list the scenarios")
+
+    for sub in (run, cmp):
+        sub.add_argument('--repeat', type=int, default=DEFAULT_REPEATS,
+                         help=f"repeats per scenario (default {DEFAULT_REPEATS})")
+        sub.add_argument('--filter', nargs='*', default=[], metavar='TEXT',
+                         help="only scenarios whose name contains TEXT")
+
+    args = parser.parse_args(argv)
+    if args.command == 'list':
+        for name, (_, inner) in SCENARIOS.items():
+            print(f"{name:<28} {inner:>5} calls per repeat")
+        return 0
+
+    if args.command == 'run':
+        results = run_suite(select(args.filter), args.repeat)
+        if args.save:
+            save(args.save, results)
+        return 0
+
+    baseline = load(args.baseline)
+    if args.current:
+        current = load(args.current)
+    else:
+        current = run_suite(select(args.filter), args.repeat)
+        print()
+        if args.save:
+            save(args.save, current)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} scenario(s) slower than {args.threshold:.0%}: "
+              f"{', '.join(regressions)}")
+        return 1
+    print(f"no regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import random
+import numpy as np
+from constants import *
+from controls import InputState
+
+# Scripted players for load generation and balance runs. Each one is an
+# input source like SweepInput: poll(world) looks at the WorldView and
+# picks a move. They all hold fire the whole time, so all they decide is
+# which way to go, and each decision is a handful of numpy operations over
+# the live arrays at most.
+#
+#   python main.py --headless --bot dodger
+#   python batch.py --games 500 --policy aimer
+
+# Fire held, moving left, standing still or moving right. Shared, nothing
+# ever changes an InputState once it is made.
+MOVES = {-1: InputState(True, False, True),
+         0: InputState(False, False, True),
+         1: InputState(False, True, True)}
+
+
+# The moves Dodger weighs, as a column to broadcast against its bullets
+DODGE_MOVES = np.array([[0], [-1], [1]])
+
+
+class RandomWalker:
+    # Picks a random spot along the bottom of the screen, walks there, then
+    # picks another. Has its own Random so it never disturbs the game's.
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.target = None
+
+    def poll(self, world):
+        x = world.player_x
+        reach = world.player_speed
+        if self.target is None or abs(self.target - x) <= reach:
+            half = PLAYER_SIZE[0] / 2
+            self.target = self.rng.uniform(half, SCREEN_WIDTH - half)
+            return MOVES[0]
+        return MOVES[1 if self.target > x else -1]
+
+
+class Dodger:
+    # Stays out from under enemy fire. Works out where each falling bullet
+    # will be when it gets down to the ship, then tries standing still,
+    # going left and going right, and takes whichever leaves the ship under
+    # the fewest of them, the soonest weighted heaviest. With nothing
+    # coming it drifts back to the middle.
+    def __init__(self, horizon=45, margin=6):
+        self.horizon = horizon  # ticks ahead worth worrying about
+        self.margin = margin
+
+    def poll(self, world):
+        left, top, width, height = world.player_box
+        x, y, vx, vy = world.enemy_bullets()
+        # Ticks until each bullet reaches the top of the ship
+        eta = np.maximum(top - y, 0) / np.maximum(vy, 1e-9)
+        near = (vy > 0) & (eta < self.horizon) & (y < top + height)
+        if near.any():
+            # Where each one crosses, against where the ship would be by
+            # then for every move at once, one row per move
+            eta = eta[near]
+            cross = x[near] + vx[near] * eta
+            shifted = np.clip(left + DODGE_MOVES * (world.player_speed * eta),
+                              0, SCREEN_WIDTH - width)
+            under = (cross > shifted - self.margin) & (cross < shifted + width + self.margin)
+            danger = under @ (1 / (eta + 1))
+            # argmin takes the first of a tie, so standing still wins those
+            return MOVES[int(DODGE_MOVES[danger.argmin(), 0])]
+
+        centre = SCREEN_WIDTH / 2
+        if abs(world.player_x - centre) <= world.player_speed:
+            return MOVES[0]
+        return MOVES[1 if world.player_x < centre else -1]
+
+
+class Aimer:
+    # Goes after the enemies and ignores what they shoot back: lines up
+    # under the enemy closest to it side to side, leading it by how far the
+    # formation will move while a shot climbs up to it.
+    def poll(self, world):
+        x, y = world.enemies()
+        if not len(x):
+            return MOVES[0]
+        top = world.player_box[1]
+        lead = x + world.enemy_velocity * np.maximum(top - y, 0) / BULLET_SPEED
+        offset = lead - world.player_x
+        target = offset[np.abs(offset).argmin()]
+        if abs(target) <= world.player_speed / 2:
+            return MOVES[0]
+        return MOVES[1 if target > 0 else -1]
+
+
+# name -> factory taking a seed, for main.py and batch.py
+BOTS = {
+    'walker': RandomWalker,
+    'dodger': lambda seed=None: Dodger(),
+    'aimer': lambda seed=None: Aimer(),
+}
+
+
+def make_bot(name, seed=None):
+    return BOTS[name](seed)
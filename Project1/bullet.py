@@ -1,133 +1,491 @@
 import pygame
 import math
+import numpy as np
 from constants import *
+from collision import sweep_boxes
 
-class Bullet:
-    def __init__(self, x, y, direction=-1, color=WHITE, bullet_type='normal', 
-                 target=None, piercing=False, damage=1, asset_manager=None):
-        self.x = x
-        self.y = y
-        self.vx = 0
-        self.vy = direction * BULLET_SPEED
-        self.color = color
-        self.bullet_type = bullet_type
-        self.target = target
-        self.piercing = piercing
-        self.damage = damage
-        self.width = 3
-        self.height = 10
-        self.hit_enemies = set()
+# Collision box (width, height) of each bullet type drawn without a sprite
+BULLET_SIZES = {
+    'normal': (3, 10),
+    'laser': (4, 30),
+    'explosive': (8, 8),
+    'homing': (3, 10),
+    'lightning': (3, 10),
+}
+
+
+# Bullet types as small ints so the pool can keep them in an array
+NORMAL = 0
+LASER = 1
+EXPLOSIVE = 2
+HOMING = 3
+LIGHTNING = 4
+
+BULLET_TYPES = ['normal', 'laser', 'explosive', 'homing', 'lightning']
+BULLET_TYPE_IDS = {name: i for i, name in enumerate(BULLET_TYPES)}
+
+
+class BulletPool:
+    # Struct-of-arrays store for every live bullet of one side (player or
+    # enemies). Slots are preallocated and recycled through a free list so
+    # shooting never allocates, and update/cull/collision run as whole-array
+    # numpy operations instead of a Python loop per Bullet object.
+    #
+    # Iteration goes through live(), which hands back slots in the order the
+    # bullets were fired so collision results match the old list order.
+    #
+    # Each slot also has a generation, bumped when its bullet dies, so a
+    # snapshot can tell a slot's old bullet from the one reusing it. Killed
+    # slots only go back on the free list at flush(), once per tick.
+    def __init__(self, capacity=1024, asset_manager=None):
         self.asset_manager = asset_manager
-        self.sprite = None
-        self.angle = 0 
-        
+        self.capacity = 0
+        self.size = 0  # high water mark, slots past this were never used
+        self.count = 0
+        self.next_seq = 0
+        self.free = []
+        self.dying = []
+
+        # Collision box per bullet type, same numbers the old Bullet.get_rect used
+        self.laser_sprite = None
+        self.missile_sprite = None
         if asset_manager:
-            if bullet_type == 'laser':
-                self.sprite = asset_manager.get_sprite('laser')
-            else:
-                self.sprite = asset_manager.get_sprite('missile')
-        
-        if bullet_type == 'laser':
-            self.width = 4
-            self.height = 30
-            self.vy *= 1.5
-        elif bullet_type == 'explosive':
-            self.width = 8
-            self.height = 8
-        elif bullet_type == 'homing' and target:
-            self.update_homing_direction()
-            
-    def update_homing_direction(self):
-        if self.target and hasattr(self.target, 'rect'):
-            dx = self.target.rect.centerx - self.x
-            dy = self.target.rect.centery - self.y
+            self.laser_sprite = asset_manager.get_sprite('laser')
+            self.missile_sprite = asset_manager.get_sprite('missile')
+        self.type_size = np.zeros((len(BULLET_TYPES), 2), dtype=np.int32)
+        for bullet_type, name in enumerate(BULLET_TYPES):
+            sprite = self.laser_sprite if bullet_type == LASER else self.missile_sprite
+            self.type_size[bullet_type] = sprite.get_size() if sprite else BULLET_SIZES[name]
+        self.type_half = self.type_size // 2
+        # Furthest a box reaches out from its centre, plus a pixel for
+        # truncation, so band tests on the centres alone are safe
+        self.reach_x = int(self.type_half[:, 0].max()) + 1
+        self.reach_y = int(self.type_half[:, 1].max()) + 1
+        self.half_sizes = self.type_half.tolist()
+        self.sizes = self.type_size.tolist()
+        # The same as floats (and which types have a box at all), for the
+        # whole-pool tests to take per slot straight into scratch
+        self.type_w = self.type_size[:, 0].astype(np.float64)
+        self.type_h = self.type_size[:, 1].astype(np.float64)
+        self.type_half_w = self.type_half[:, 0].astype(np.float64)
+        self.type_half_h = self.type_half[:, 1].astype(np.float64)
+        self.type_area = (self.type_size > 0).all(axis=1)
+        self.rect = pygame.Rect(0, 0, 0, 0)  # scratch rect for get_rect
+
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        old = self.capacity
+
+        def grow(array, dtype, shape=()):
+            new = np.zeros((capacity,) + shape, dtype=dtype)
+            if old:
+                new[:old] = array[:old]
+            return new
+
+        self.x = grow(getattr(self, 'x', None), np.float64)
+        self.y = grow(getattr(self, 'y', None), np.float64)
+        self.vx = grow(getattr(self, 'vx', None), np.float64)
+        self.vy = grow(getattr(self, 'vy', None), np.float64)
+        self.angle = grow(getattr(self, 'angle', None), np.float64)
+        self.type = grow(getattr(self, 'type', None), np.int8)
+        self.damage = grow(getattr(self, 'damage', None), np.int32)
+        self.piercing = grow(getattr(self, 'piercing', None), np.bool_)
+        self.alive = grow(getattr(self, 'alive', None), np.bool_)
+        self.seq = grow(getattr(self, 'seq', None), np.int64)
+        self.generation = grow(getattr(self, 'generation', None), np.int64)
+        self.color = grow(getattr(self, 'color', None), np.uint8, (3,))
+        # Scratch for the whole-pool passes (update, overlapping, passing,
+        # sweep_rect), so a tick builds no temporaries the size of the pool
+        self.scratch = np.empty((4, capacity))
+        self.scratch_mask = np.empty((2, capacity), dtype=np.bool_)
+        self.scratch_kind = np.empty(capacity, dtype=np.intp)  # np.take copies int8 indices
+
+        # Homing targets and piercing hit sets are Python objects, so they
+        # live in plain lists indexed by slot
+        if old:
+            self.targets.extend([None] * (capacity - old))
+            self.hit_enemies.extend([None] * (capacity - old))
+        else:
+            self.targets = [None] * capacity
+            self.hit_enemies = [None] * capacity
+
+        # Hand out low slots first so the live range stays compact
+        self.free.extend(range(capacity - 1, old - 1, -1))
+        self.capacity = capacity
+
+    def spawn(self, x, y, direction=-1, color=WHITE, bullet_type='normal',
+              target=None, piercing=False, damage=1):
+        if not self.free:
+            # Reusing this tick's dead slots is safe, their generation has
+            # already moved on
+            self.flush()
+        if not self.free:
+            self.allocate(self.capacity * 2)
+        i = self.free.pop()
+        if i >= self.size:
+            self.size = i + 1
+
+        kind = BULLET_TYPE_IDS[bullet_type]
+        self.x[i] = x
+        self.y[i] = y
+        self.vx[i] = 0
+        self.vy[i] = direction * BULLET_SPEED
+        if kind == LASER:
+            self.vy[i] *= 1.5
+        self.angle[i] = 0
+        self.type[i] = kind
+        self.damage[i] = damage
+        self.piercing[i] = piercing
+        self.color[i] = color[:3]
+        self.alive[i] = True
+        self.seq[i] = self.next_seq
+        self.next_seq += 1
+        self.targets[i] = target if kind == HOMING else None
+        self.hit_enemies[i] = None
+        self.count += 1
+
+        if kind == HOMING and target:
+            self.update_homing_direction(i)
+        return i
+
+    def set_velocity(self, i, vx, vy):
+        self.vx[i] = vx
+        self.vy[i] = vy
+
+    def kill(self, i):
+        if not self.alive[i]:
+            return
+        self.alive[i] = False
+        self.vx[i] = 0
+        self.vy[i] = 0
+        self.targets[i] = None
+        self.hit_enemies[i] = None
+        self.generation[i] += 1
+        self.dying.append(i)
+        self.count -= 1
+
+    def flush(self):
+        # Hand this tick's dead slots back for reuse
+        if self.dying:
+            self.free.extend(self.dying)
+            self.dying.clear()
+
+    def clear(self):
+        for i in self.live().tolist():
+            self.kill(i)
+
+    def __len__(self):
+        return self.count
+
+    def live(self):
+        # Live slots in firing order
+        idx = np.flatnonzero(self.alive[:self.size])
+        return idx[np.argsort(self.seq[idx], kind='stable')]
+
+    def snapshot(self, x=None, y=None):
+        # Copy of the live range that can be drawn (or interpolated) while
+        # this pool keeps moving. Targets and hit sets stay behind.
+        n = self.size
+        pool = BulletPool.__new__(BulletPool)
+        pool.__dict__.update(self.__dict__)
+        pool.capacity = n
+        pool.free = []
+        pool.dying = []
+        pool.targets = None
+        pool.hit_enemies = None
+        pool.rect = pygame.Rect(0, 0, 0, 0)
+        for name in ('vx', 'vy', 'damage', 'piercing', 'scratch', 'scratch_mask',
+                     'scratch_kind'):
+            setattr(pool, name, None)
+        for name in ('angle', 'type', 'alive', 'seq', 'generation', 'color'):
+            setattr(pool, name, getattr(self, name)[:n].copy())
+        pool.x = self.x[:n].copy() if x is None else x
+        pool.y = self.y[:n].copy() if y is None else y
+        return pool
+
+    def interpolate(self, previous, alpha):
+        # Snapshot part way from `previous`, blending only bullets that were
+        # alive in both (same slot, same generation)
+        if previous is None or alpha >= 1:
+            return self
+        n = min(self.size, previous.size)
+        same = np.flatnonzero(self.alive[:n] & previous.alive[:n] &
+                              (self.generation[:n] == previous.generation[:n]))
+        if not len(same):
+            return self
+        x = self.x.copy()
+        y = self.y.copy()
+        x[same] = previous.x[same] + (x[same] - previous.x[same]) * alpha
+        y[same] = previous.y[same] + (y[same] - previous.y[same]) * alpha
+        return self.snapshot(x, y)
+
+    def update_homing_direction(self, i):
+        target = self.targets[i]
+        if target and hasattr(target, 'rect'):
+            dx = target.rect.centerx - self.x[i]
+            dy = target.rect.centery - self.y[i]
             dist = math.sqrt(dx**2 + dy**2)
             if dist > 0:
-                self.vx = (dx / dist) * BULLET_SPEED * 0.8
-                self.vy = (dy / dist) * BULLET_SPEED * 0.8
-           
-                self.angle = math.degrees(math.atan2(-self.vx, self.vy))
-                
-    def update(self, enemies=None):
-        if self.bullet_type == 'homing' and self.target:
-            self.update_homing_direction()
-        else:
-            # Calculate angle for regular bullets
-            if self.vx != 0 or self.vy != 0:
-                self.angle = math.degrees(math.atan2(-self.vx, self.vy))
-            
-        self.x += self.vx
-        self.y += self.vy
-        
-        # Check if bullet is off screen
-        if self.y < -20 or self.y > SCREEN_HEIGHT + 20:
-            return False
-        if self.x < -20 or self.x > SCREEN_WIDTH + 20:
-            return False
+                self.vx[i] = (dx / dist) * BULLET_SPEED * 0.8
+                self.vy[i] = (dy / dist) * BULLET_SPEED * 0.8
+                self.angle[i] = math.degrees(math.atan2(-self.vx[i], self.vy[i]))
+
+    def retarget(self, is_live, nearest):
+        # One pass per tick: every homing bullet whose target has died locks
+        # onto nearest(x, y) instead of chasing a ghost. Homing bullets
+        # fired without a target (spread and triple shot) still fly straight.
+        n = self.size
+        if not self.count:
+            return
+        homing = np.flatnonzero(self.alive[:n] & (self.type[:n] == HOMING))
+        targets = self.targets
+        for i in homing.tolist():
+            target = targets[i]
+            if target is not None and not is_live(target):
+                targets[i] = nearest(float(self.x[i]), float(self.y[i]))
+
+    def update(self):
+        n = self.size
+        if not self.count:
+            return
+        alive = self.alive[:n]
+
+        # Homing bullets steer at their target before moving
+        homing = np.flatnonzero(alive & (self.type[:n] == HOMING))
+        if len(homing):
+            targets = self.targets
+            steer = [i for i in homing.tolist() if targets[i] and hasattr(targets[i], 'rect')]
+            if steer:
+                idx = np.array(steer)
+                centers = np.array([targets[i].rect.center for i in steer], dtype=np.float64)
+                dx = centers[:, 0] - self.x[idx]
+                dy = centers[:, 1] - self.y[idx]
+                dist = np.sqrt(dx**2 + dy**2)
+                moving = dist > 0
+                idx = idx[moving]
+                self.vx[idx] = (dx[moving] / dist[moving]) * BULLET_SPEED * 0.8
+                self.vy[idx] = (dy[moving] / dist[moving]) * BULLET_SPEED * 0.8
+
+        # The rest works in place and in scratch. The angle is worked out
+        # for every slot and only kept for bullets that are moving.
+        vx = self.vx[:n]
+        vy = self.vy[:n]
+        reach, edge = self.scratch[:2, :n]
+        turning, outside = self.scratch_mask[:, :n]
+        np.not_equal(vx, 0, out=turning)
+        np.not_equal(vy, 0, out=outside)
+        turning |= outside
+        turning &= alive
+        np.negative(vx, out=reach)
+        np.arctan2(reach, vy, out=reach)
+        np.degrees(reach, out=reach)
+        np.copyto(self.angle[:n], reach, where=turning)
+
+        x = self.x[:n]
+        y = self.y[:n]
+        x += vx
+        y += vy
+
+        # Cull anything that was off the screen before this move as well as
+        # after it. A fast bullet can cross the player and leave in the same
+        # tick, and still has to be there for the swept test to find.
+        gone = turning
+        gone[:] = False
+        for pos, vel, size in ((x, vx, SCREEN_WIDTH), (y, vy, SCREEN_HEIGHT)):
+            np.abs(vel, out=reach)
+            reach += 20
+            np.negative(reach, out=edge)
+            np.less(pos, edge, out=outside)
+            gone |= outside
+            reach += size
+            np.greater(pos, reach, out=outside)
+            gone |= outside
+        gone &= alive
+        if gone.any():
+            for i in np.flatnonzero(gone).tolist():
+                self.kill(i)
+
+    def boxes(self, idx):
+        # Integer collision rects (left, top, width, height) for the given
+        # slots, truncated the same way pygame.Rect truncates floats
+        kind = self.type[idx]
+        size = self.type_size[kind]
+        half = self.type_half[kind]
+        w = size[:, 0]
+        h = size[:, 1]
+        left = np.trunc(self.x[idx] - half[:, 0]).astype(np.int64)
+        top = np.trunc(self.y[idx] - half[:, 1]).astype(np.int64)
+        return left, top, w, h
+
+    def draw_boxes(self):
+        # Screen area each live bullet can paint, allowing for the rotated
+        # missile sprite, the tall laser and the glow rings
+        idx = np.flatnonzero(self.alive[:self.size])
+        x = self.x[idx].astype(np.int64)
+        y = self.y[idx].astype(np.int64)
+        return x - 13, y - 16, x + 14, y + 17
+
+    def get_rect(self, i):
+        # Filled into one shared rect, so it is only good until the next call
+        kind = self.type[i]
+        w, h = self.sizes[kind]
+        half_w, half_h = self.half_sizes[kind]
+        rect = self.rect
+        rect.update(int(self.x[i] - half_w), int(self.y[i] - half_h), w, h)
+        return rect
+
+    def in_order(self, idx):
+        # The given slots in firing order
+        return idx[np.argsort(self.seq[idx], kind='stable')]
+
+    def spanning(self, start, end, extent, low, high, hits):
+        # Clears hits wherever start..end (either way round, end may be
+        # None for no move) widened by extent misses the open span low..high
+        tmp = self.scratch[3, :len(hits)]
+        inside = self.scratch_mask[1, :len(hits)]
+        first = start if end is None else np.minimum(start, end, out=tmp)
+        np.less(first, high, out=inside)
+        hits &= inside
+        last = start if end is None else np.maximum(start, end, out=tmp)
+        if extent is not None:
+            last = np.add(last, extent, out=tmp)
+        np.greater(last, low, out=inside)
+        hits &= inside
+
+    def box_hits(self, left, top, right, bottom, swept):
+        # Mask over the used slots of live bullets whose rect overlaps the
+        # box, or with swept, overlapped it anywhere along its last move.
+        # The rects are the ones boxes() gives, built in scratch.
+        n = self.size
+        kind = self.scratch_kind[:n]
+        np.copyto(kind, self.type[:n])
+        start, end, extent = self.scratch[:3, :n]
+        hits = self.scratch_mask[0, :n]
+        np.take(self.type_area, kind, out=hits, mode='clip')
+        hits &= self.alive[:n]
+        for pos, vel, half, size, low, high in (
+                (self.x, self.vx, self.type_half_w, self.type_w, left, right),
+                (self.y, self.vy, self.type_half_h, self.type_h, top, bottom)):
+            np.take(half, kind, out=extent, mode='clip')
+            np.subtract(pos[:n], extent, out=start)
+            np.trunc(start, out=start)
+            np.take(size, kind, out=extent, mode='clip')
+            if swept:
+                np.subtract(start, vel[:n], out=end)
+            self.spanning(start, end if swept else None, extent, low, high, hits)
+        return hits
+
+    def overlapping(self, left, top, right, bottom):
+        # Slots whose rect overlaps the box, in firing order
+        if not self.count:
+            return np.empty(0, dtype=np.intp)
+        return self.in_order(np.flatnonzero(self.box_hits(left, top, right, bottom, False)))
+
+    def passing(self, left, top, right, bottom):
+        # Slots whose rect overlapped the box anywhere along its last move,
+        # the swept version of overlapping()
+        if not self.count:
+            return np.empty(0, dtype=np.intp)
+        return self.in_order(np.flatnonzero(self.box_hits(left, top, right, bottom, True)))
+
+    def collide_rect(self, rect):
+        if rect.width <= 0 or rect.height <= 0:
+            return np.empty(0, dtype=np.intp)
+        return self.overlapping(rect.left, rect.top, rect.right, rect.bottom)
+
+    def sweep_rect(self, rect, dx=0, dy=0):
+        # Slots whose bullet hit rect over its last move, in firing order.
+        # (dx, dy) is how far rect itself moved over the same tick. A bullet
+        # that moves less than the two boxes are tall (and wide) can't get
+        # past rect between two ticks, so for those only where it ends up
+        # counts, same as collide_rect. Anything faster is swept along the
+        # whole move, so it can't step clean over the rect.
+        #
+        # Only bullets whose move passed through the rect's rows (the y band)
+        # and columns get that far. That is one pass over the raw position
+        # columns, and it nearly always leaves nothing, so the boxes and the
+        # exact tests are only built for bullets actually at the rect.
+        n = self.size
+        if not self.count or rect.width <= 0 or rect.height <= 0:
+            return np.empty(0, dtype=np.intp)
+        start = self.scratch[1, :n]
+        band = self.scratch_mask[0, :n]
+        np.copyto(band, self.alive[:n])
+        for pos, vel, move, reach, low, high in (
+                (self.y, self.vy, dy, self.reach_y, rect.top, rect.bottom),
+                (self.x, self.vx, dx, self.reach_x, rect.left, rect.right)):
+            np.subtract(vel[:n], move, out=start)
+            np.subtract(pos[:n], start, out=start)
+            self.spanning(pos[:n], start, None, low - reach, high + reach, band)
+        band = np.flatnonzero(band)
+        if not len(band):
+            return band
+        left, top, w, h = self.boxes(band)
+        hit = ((left < rect.right) & (left + w > rect.left) &
+               (top < rect.bottom) & (top + h > rect.top))
+        move_x = self.vx[band] - dx
+        move_y = self.vy[band] - dy
+        fast = (np.abs(move_x) >= w + rect.width) | (np.abs(move_y) >= h + rect.height)
+        if fast.any():
+            toi = sweep_boxes(left, top, w, h, move_x, move_y,
+                              rect.left, rect.top, rect.right, rect.bottom)
+            hit |= fast & (toi <= 1)
+        return self.in_order(band[hit])
+
+    def can_hit_enemy(self, i, enemy):
+        if self.piercing[i]:
+            hits = self.hit_enemies[i]
+            return hits is None or enemy.eid not in hits
         return True
-        
-    def get_rect(self):
-        if self.sprite:
-            return pygame.Rect(self.x - self.sprite.get_width()//2, 
-                              self.y - self.sprite.get_height()//2, 
-                              self.sprite.get_width(), self.sprite.get_height())
-        return pygame.Rect(self.x - self.width//2, self.y - self.height//2, 
-                          self.width, self.height)
-        
+
+    def mark_enemy_hit(self, i, enemy):
+        if self.piercing[i]:
+            hits = self.hit_enemies[i]
+            if hits is None:
+                hits = self.hit_enemies[i] = set()
+            hits.add(enemy.eid)
+
     def draw(self, screen):
-        if self.sprite:
-            # Draw sprite with rotation
-            if self.bullet_type == 'laser':
-            
-                sprite_rect = self.sprite.get_rect(center=(int(self.x), int(self.y)))
-                screen.blit(self.sprite, sprite_rect)
+        idx = self.live()
+        if not len(idx):
+            return
+        for i, x, y, kind, angle, color in zip(idx.tolist(), self.x[idx].tolist(),
+                                                self.y[idx].tolist(), self.type[idx].tolist(),
+                                                self.angle[idx].tolist(), self.color[idx].tolist()):
+            self.draw_one(screen, x, y, kind, angle, tuple(color))
+
+    def draw_one(self, screen, x, y, kind, angle, color):
+        sprite = self.laser_sprite if kind == LASER else self.missile_sprite
+        if sprite:
+            if kind == LASER:
+                sprite = self.asset_manager.get_variant('laser')
             else:
-                # Rotate missile sprite
-                rotated_sprite = pygame.transform.rotate(self.sprite, self.angle)
-                sprite_rect = rotated_sprite.get_rect(center=(int(self.x), int(self.y)))
-                screen.blit(rotated_sprite, sprite_rect)
-                
+                sprite = self.asset_manager.get_variant('missile', angle=angle)
+            sprite_rect = sprite.get_rect(center=(int(x), int(y)))
+            screen.blit(sprite, sprite_rect)
+
             # Add glow effect for special bullets
-            if self.bullet_type == 'explosive':
-                pygame.draw.circle(screen, (255, 100, 0, 100), 
-                                 (int(self.x), int(self.y)), 12, 2)
-            elif self.bullet_type == 'homing':
-                pygame.draw.circle(screen, (200, 0, 255, 100), 
-                                 (int(self.x), int(self.y)), 10, 1)
+            if kind == EXPLOSIVE:
+                pygame.draw.circle(screen, (255, 100, 0, 100), (int(x), int(y)), 12, 2)
+            elif kind == HOMING:
+                pygame.draw.circle(screen, (200, 0, 255, 100), (int(x), int(y)), 10, 1)
+            return
+
+        width, height = self.type_size[kind].tolist()
+        if kind == LASER:
+            pygame.draw.line(screen, color, (x, y - height//2), (x, y + height//2), 4)
+            pygame.draw.line(screen, (255, 200, 200), (x, y - height//2), (x, y + height//2), 2)
+        elif kind == EXPLOSIVE:
+            pygame.draw.circle(screen, color, (int(x), int(y)), width//2)
+            pygame.draw.circle(screen, WHITE, (int(x), int(y)), width//2 - 1, 1)
         else:
-            # Fallback to simple drawing
-            if self.bullet_type == 'laser':
-                pygame.draw.line(screen, self.color, 
-                               (self.x, self.y - self.height//2),
-                               (self.x, self.y + self.height//2), 4)
-                # Add glow
-                pygame.draw.line(screen, (255, 200, 200), 
-                               (self.x, self.y - self.height//2),
-                               (self.x, self.y + self.height//2), 2)
-            elif self.bullet_type == 'explosive':
-                pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), 
-                                 self.width//2)
-                pygame.draw.circle(screen, WHITE, (int(self.x), int(self.y)), 
-                                 self.width//2 - 1, 1)
-            else:
-                # Regular bullet - draw as missile shape as I dont have time for a fully nice one haha
-                missile_points = [
-                    (self.x, self.y - self.height//2),  # Tip
-                    (self.x - self.width//2, self.y),    # Left
-                    (self.x - self.width//2, self.y + self.height//2),  # Left bottom
-                    (self.x + self.width//2, self.y + self.height//2),  # Right bottom
-                    (self.x + self.width//2, self.y),    # Right
-                ]
-                pygame.draw.polygon(screen, self.color, missile_points)
-       
-                pygame.draw.circle(screen, (255, 100, 0), 
-                                 (int(self.x), int(self.y + self.height//2)), 2)
-            
-    def can_hit_enemy(self, enemy):
-        if self.piercing:
-            return id(enemy) not in self.hit_enemies
-        return True
-        
-    def mark_enemy_hit(self, enemy):
-        if self.piercing:
-            self.hit_enemies.add(id(enemy))
\ No newline at end of file
+            missile_points = [
+                (x, y - height//2),
+                (x - width//2, y),
+                (x - width//2, y + height//2),
+                (x + width//2, y + height//2),
+                (x + width//2, y),
+            ]
+            pygame.draw.polygon(screen, color, missile_points)
+            pygame.draw.circle(screen, (255, 100, 0), (int(x), int(y + height//2)), 2)
@@ -0,0 +1,318 @@
+import math
+import pygame
+import numpy as np
+
+# Broad phase for the collision checks in Game. Everything that can be hit
+# goes into a uniform grid once per tick and the bullet loops only look at
+# the cells they touch instead of every enemy on screen.
+#
+# Queries hand back objects in the order they were inserted, so when the grid
+# is filled from enemy_wave.enemies the hits come out in the same order the
+# old nested loops found them. query_sweep is the exception: its hits come
+# back in the order the moving box reached them.
+
+CELL_SIZE = 64
+
+
+class SpatialHash:
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.objects = []
+        self.rects = []
+        self.index = {}
+        self.extent = None  # (cx0, cy0, cx1, cy1) of every cell in use
+        self.smallest = (math.inf, math.inf)  # least width and height in use
+
+    def clear(self):
+        self.cells.clear()
+        self.objects.clear()
+        self.rects.clear()
+        self.index.clear()
+        self.extent = None
+        self.smallest = (math.inf, math.inf)
+
+    def rebuild(self, objects, boxes=None):
+        # boxes, if given, is (left, top, width, height) arrays lined up with
+        # objects, which saves touching every object's rect
+        self.clear()
+        if boxes is None:
+            for obj in objects:
+                self.insert(obj, obj.rect)
+            return
+        for obj, box in zip(objects, zip(*(column.tolist() for column in boxes))):
+            self.insert(obj, box)
+
+    def cell_range(self, left, top, right, bottom):
+        size = self.cell_size
+        # right/bottom are exclusive like pygame.Rect
+        return (left // size, top // size,
+                (right - 1) // size, (bottom - 1) // size)
+
+    def insert(self, obj, rect):
+        left, top, width, height = rect
+        i = len(self.objects)
+        self.objects.append(obj)
+        self.rects.append((left, top, width, height))
+        self.index[obj] = i
+
+        if width <= 0 or height <= 0:
+            return i
+        smallest = self.smallest
+        if width < smallest[0] or height < smallest[1]:
+            self.smallest = (min(width, smallest[0]), min(height, smallest[1]))
+        cx0, cy0, cx1, cy1 = self.cell_range(left, top, left + width, top + height)
+        extent = self.extent
+        if extent is None:
+            self.extent = (cx0, cy0, cx1, cy1)
+        else:
+            self.extent = (min(extent[0], cx0), min(extent[1], cy0),
+                           max(extent[2], cx1), max(extent[3], cy1))
+        cells = self.cells
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = cells.get((cx, cy))
+                if cell is None:
+                    cells[(cx, cy)] = [i]
+                else:
+                    cell.append(i)
+        return i
+
+    def remove(self, obj):
+        # Leave the slot in place and just forget about it. The grid gets
+        # rebuilt every tick so there is nothing worth compacting.
+        i = self.index.pop(obj, None)
+        if i is not None:
+            self.objects[i] = None
+
+    def __contains__(self, obj):
+        return obj in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def candidates(self, left, top, right, bottom):
+        cx0, cy0, cx1, cy1 = self.cell_range(left, top, right, bottom)
+        cells = self.cells
+        if cx0 == cx1 and cy0 == cy1:
+            return cells.get((cx0, cy0), ())
+
+        found = set()
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = cells.get((cx, cy))
+                if cell:
+                    found.update(cell)
+        return sorted(found)
+
+    def query_rect(self, rect):
+        rect = pygame.Rect(rect)
+        if rect.width <= 0 or rect.height <= 0:
+            return []
+        objects = self.objects
+        rects = self.rects
+        hits = []
+        for i in self.candidates(rect.left, rect.top, rect.right, rect.bottom):
+            obj = objects[i]
+            if obj is not None and rect.colliderect(rects[i]):
+                hits.append(obj)
+        return hits
+
+    def query_sweep(self, rect, dx, dy):
+        # Objects rect touched while moving by (dx, dy) to get where it is
+        # now, earliest first, ties in insertion order. Anything moving less
+        # than the two boxes' size can't get clean through an object in one
+        # step, so as in query_rect only where it ends up counts, and the
+        # time of impact just orders the hits. Anything faster is swept
+        # along the whole move, through every cell the move passed over.
+        left, top, width, height = rect
+        if width <= 0 or height <= 0:
+            return []
+        right = left + width
+        bottom = top + height
+        reach_x = abs(dx) - width
+        reach_y = abs(dy) - height
+        smallest = self.smallest
+        if reach_x < smallest[0] and reach_y < smallest[1]:
+            # Too slow to get past anything, the cells it ends up in will do
+            candidates = self.candidates(left, top, right, bottom)
+        else:
+            start_x = left - dx
+            start_y = top - dy
+            candidates = self.candidates(math.floor(min(left, start_x)),
+                                         math.floor(min(top, start_y)),
+                                         math.ceil(max(right, start_x + width)),
+                                         math.ceil(max(bottom, start_y + height)))
+        objects = self.objects
+        rects = self.rects
+        hits = []
+        for i in candidates:
+            obj = objects[i]
+            if obj is None:
+                continue
+            ol, ot, ow, oh = rects[i]
+            if reach_x < ow and reach_y < oh:
+                if left < ol + ow and right > ol and top < ot + oh and bottom > ot:
+                    hits.append((None, i, obj))
+            else:
+                t = time_of_impact(left, top, width, height, dx, dy, ol, ot, ol + ow, ot + oh)
+                if t <= 1:
+                    hits.append((t, i, obj))
+        if len(hits) < 2:
+            return [obj for _, _, obj in hits]
+        order = []
+        for t, i, obj in hits:
+            if t is None:
+                ol, ot, ow, oh = rects[i]
+                t = time_of_impact(left, top, width, height, dx, dy, ol, ot, ol + ow, ot + oh)
+            order.append((t, i, obj))
+        order.sort()  # slots are unique, so objects never get compared
+        return [obj for _, _, obj in order]
+
+    def query_radius(self, center, radius):
+        # Matches the old distance checks: centre of the object's rect must
+        # be strictly closer than radius
+        x, y = center
+        reach = int(radius) + 1
+        objects = self.objects
+        rects = self.rects
+        radius_sq = radius * radius
+        hits = []
+        for i in self.candidates(x - reach, y - reach, x + reach, y + reach):
+            obj = objects[i]
+            if obj is None:
+                continue
+            left, top, width, height = rects[i]
+            ox = left + width // 2
+            oy = top + height // 2
+            if (ox - x) ** 2 + (oy - y) ** 2 < radius_sq:
+                hits.append(obj)
+        return hits
+
+    def nearest(self, x, y, exclude=None):
+        # Object whose rect centre is closest to (x, y), or None. Searches
+        # rings of cells outward from the point's cell, clipped to the cells
+        # in use, and stops once nothing further out could be closer. With
+        # the formation packed into the grid that is a handful of cells
+        # however many enemies there are. Ties go to the first inserted.
+        if self.extent is None or not self.index:
+            return None
+        size = self.cell_size
+        cells = self.cells
+        objects = self.objects
+        rects = self.rects
+        ex0, ey0, ex1, ey1 = self.extent
+        qx = int(x // size)
+        qy = int(y // size)
+        # Rings nearer than this miss every occupied cell
+        ring = max(ex0 - qx, qx - ex1, ey0 - qy, qy - ey1, 0)
+        best = None
+        best_key = None
+        while True:
+            for key in self.ring_cells(qx, qy, ring):
+                cell = cells.get(key)
+                if not cell:
+                    continue
+                for i in cell:
+                    obj = objects[i]
+                    if obj is None or obj is exclude:
+                        continue
+                    left, top, width, height = rects[i]
+                    dx = left + width // 2 - x
+                    dy = top + height // 2 - y
+                    candidate = (dx * dx + dy * dy, i)
+                    if best_key is None or candidate < best_key:
+                        best_key = candidate
+                        best = obj
+            # Anything not seen yet is past one of the sides of the square
+            # searched so far that still has occupied cells beyond it
+            gaps = []
+            if qx - ring > ex0:
+                gaps.append(x - (qx - ring) * size)
+            if qx + ring < ex1:
+                gaps.append((qx + ring + 1) * size - x)
+            if qy - ring > ey0:
+                gaps.append(y - (qy - ring) * size)
+            if qy + ring < ey1:
+                gaps.append((qy + ring + 1) * size - y)
+            if not gaps or (best_key is not None and best_key[0] <= min(gaps) ** 2):
+                return best
+            ring += 1
+
+    def ring_cells(self, qx, qy, ring):
+        # Cells at exactly `ring` steps (Chebyshev) from (qx, qy) that fall
+        # inside the extent
+        if ring == 0:
+            return ((qx, qy),)
+        ex0, ey0, ex1, ey1 = self.extent
+        x0 = max(qx - ring, ex0)
+        x1 = min(qx + ring, ex1)
+        y0 = max(qy - ring + 1, ey0)
+        y1 = min(qy + ring - 1, ey1)
+        found = []
+        if ey0 <= qy - ring <= ey1:
+            found.extend((cx, qy - ring) for cx in range(x0, x1 + 1))
+        if ey0 <= qy + ring <= ey1:
+            found.extend((cx, qy + ring) for cx in range(x0, x1 + 1))
+        if ex0 <= qx - ring <= ex1:
+            found.extend((qx - ring, cy) for cy in range(y0, y1 + 1))
+        if ex0 <= qx + ring <= ex1:
+            found.extend((qx + ring, cy) for cy in range(y0, y1 + 1))
+        return found
+
+
+# Swept tests for things that move further in a tick than they are big.
+# Checking only where a box ends up lets a fast one step clean over
+# something thin; these look at the whole move instead.
+
+
+def axis_window(start, delta, low, high):
+    # When, as a share of the move, start + delta * t is strictly between
+    # low and high: (enter, leave), empty if enter >= leave
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_low = (low - start) / delta
+        t_high = (high - start) / delta
+    enter = np.minimum(t_low, t_high)
+    leave = np.maximum(t_low, t_high)
+    # Not moving on this axis: overlapping the whole time or never
+    still = delta == 0
+    if np.any(still):
+        inside = (start > low) & (start < high)
+        enter = np.where(still, np.where(inside, -np.inf, np.inf), enter)
+        leave = np.where(still, np.where(inside, np.inf, -np.inf), leave)
+    return enter, leave
+
+
+def sweep_boxes(left, top, width, height, dx, dy, box_left, box_top, box_right, box_bottom):
+    # Boxes (left, top, width, height) that just moved by (dx, dy) to get
+    # where they are, against boxes given by their edges. Returns how far
+    # into the move each pair first overlapped, 0 at the start and 1 at the
+    # end, or inf if they never touched. Overlap is strict like
+    # Rect.colliderect, so at t=1 this is the same test on the boxes where
+    # they stand. Everything broadcasts: one box against many, many against
+    # one, or many against many with a column and a row.
+    enter_x, leave_x = axis_window(left - dx, dx, box_left - width, box_right)
+    enter_y, leave_y = axis_window(top - dy, dy, box_top - height, box_bottom)
+    enter = np.maximum(np.maximum(enter_x, enter_y), 0.0)
+    leave = np.minimum(np.minimum(leave_x, leave_y), 1.0)
+    return np.where(enter < leave, enter, np.inf)
+
+
+def time_of_impact(left, top, width, height, dx, dy, box_left, box_top, box_right, box_bottom):
+    # sweep_boxes for a single pair, in plain Python for the grid queries
+    # where numpy's per-call cost would outweigh the work
+    enter = 0.0
+    leave = 1.0
+    for start, delta, low, high in ((left - dx, dx, box_left - width, box_right),
+                                    (top - dy, dy, box_top - height, box_bottom)):
+        if delta == 0:
+            if not low < start < high:
+                return math.inf
+            continue
+        t_low = (low - start) / delta
+        t_high = (high - start) / delta
+        if t_low > t_high:
+            t_low, t_high = t_high, t_low
+        enter = max(enter, t_low)
+        leave = min(leave, t_high)
+    return enter if enter < leave else math.inf
@@ -1,9 +1,8 @@
-import pygame
-
 # Screen dimensions
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 FPS = 60
+CAPTION = "Space Invaders Ultimate"
 
 # Colors
 BLACK = (0, 0, 0)
@@ -19,12 +18,26 @@ PINK = (255, 192, 203)
 LIME = (50, 205, 50)
 GOLD = (255, 215, 0)
 
+# Font sizes
+HUD_SIZE = 36
+SMALL_SIZE = 24
+TITLE_SIZE = 72
+
 # Game settings
 PLAYER_SPEED = 5
 PLAYER_SIZE = (50, 30)
 ENEMY_SIZE = (40, 30)
 ENEMY_SPEED = 1
 ENEMY_DROP_DISTANCE = 40
+
+# Wave size: rows/cols start at the base, grow by one every N levels and
+# stop at the max
+WAVE_BASE_ROWS = 3
+WAVE_LEVELS_PER_ROW = 3
+WAVE_MAX_ROWS = 8
+WAVE_BASE_COLS = 8
+WAVE_LEVELS_PER_COL = 2
+WAVE_MAX_COLS = 12
 BULLET_SPEED = 7
 POWERUP_FALL_SPEED = 2
 POWERUP_SIZE = (30, 30)
@@ -50,4 +63,10 @@ POWERUP_TYPES = {
     'FREEZE': {'color': CYAN, 'duration': 3000, 'symbol': 'F'},
     'GHOST': {'color': WHITE, 'duration': 5000, 'symbol': 'G'},
     'CHAIN_LIGHTNING': {'color': YELLOW, 'duration': 4000, 'symbol': 'C'}
-}
\ No newline at end of file
+}
+# Enemy fire, chance per enemy per tick
+ENEMY_FIRE_CHANCE = 0.001
+ENEMY_FIRE_CHANCE_PER_LEVEL = 0.0  # added for each level after the first
+ENEMY_FIRE_CHANCE_MAX = 0.01
+ENEMY_FRONT_ROW_ONLY = False  # only the lowest enemy in each column shoots
+SLOW_TIME_FIRE_SCALE = 0.3
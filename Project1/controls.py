@@ -0,0 +1,169 @@
+import pygame
+import random
+import threading
+import numpy as np
+from constants import *
+
+# Input sources for the simulation. Each one hands back an InputState per
+# tick, so the game rules never read the keyboard themselves. poll() gets
+# the simulation's WorldView to look at.
+
+
+class InputState:
+    __slots__ = ('left', 'right', 'fire', 'fire_pressed')
+
+    def __init__(self, left=False, right=False, fire=False, fire_pressed=False):
+        self.left = left
+        self.right = right
+        self.fire = fire
+        # True on the tick the fire key went down, like a KEYDOWN event
+        self.fire_pressed = fire_pressed
+
+
+class WorldView:
+    # What an input source gets to see of the simulation. Everything comes
+    # back as plain numbers, tuples or fresh arrays of the live entries, so
+    # a bot can't move anything by accident, and nothing is worked out
+    # unless something asks for it.
+    __slots__ = ('_sim',)
+
+    def __init__(self, sim):
+        self._sim = sim
+
+    @property
+    def tick(self):
+        return self._sim.tick
+
+    @property
+    def score(self):
+        return self._sim.score
+
+    @property
+    def level(self):
+        return self._sim.level
+
+    @property
+    def game_over(self):
+        return self._sim.game_over
+
+    @property
+    def lives(self):
+        return self._sim.player.lives
+
+    @property
+    def effects(self):
+        # Effect bits of the powerups running right now
+        return self._sim.powerup_manager.active
+
+    @property
+    def player_x(self):
+        return self._sim.player.x
+
+    @property
+    def player_box(self):
+        # (left, top, width, height)
+        rect = self._sim.player.rect
+        return rect.left, rect.top, rect.width, rect.height
+
+    @property
+    def player_speed(self):
+        return self._sim.player.speed
+
+    @property
+    def enemy_velocity(self):
+        # Sideways pixels per tick the formation is moving at
+        wave = self._sim.enemy_wave
+        return wave.direction * ENEMY_SPEED * wave.speed_multiplier
+
+    def enemies(self):
+        # (x, y) centres of the live enemies
+        wave = self._sim.enemy_wave
+        alive = wave.alive
+        return wave.x[alive] + ENEMY_SIZE[0] / 2, wave.y[alive] + ENEMY_SIZE[1] / 2
+
+    def enemy_bullets(self):
+        # (x, y, vx, vy) of every enemy bullet in flight
+        pool = self._sim.enemy_bullets
+        live = np.flatnonzero(pool.alive[:pool.size])
+        return pool.x[live], pool.y[live], pool.vx[live], pool.vy[live]
+
+
+class NullInput:
+    def __init__(self):
+        self.state = InputState()
+
+    def poll(self, world):
+        return self.state
+
+
+class KeyboardInput:
+    # Held keys come from pygame.key.get_pressed, fresh presses are fed in by
+    # Game.handle_events as they arrive
+    def __init__(self):
+        self.fire_pressed = False
+
+    def press_fire(self):
+        self.fire_pressed = True
+
+    def poll(self, world):
+        keys = pygame.key.get_pressed()
+        state = InputState(keys[pygame.K_LEFT], keys[pygame.K_RIGHT],
+                           keys[pygame.K_SPACE], self.fire_pressed)
+        self.fire_pressed = False
+        return state
+
+
+class LatchedInput:
+    # Carries keyboard input over to a simulation ticking on another thread.
+    # The main thread calls sample() every frame (pygame wants its input
+    # read there) and the simulation polls the latest sample. A fresh press
+    # is held until a tick has seen it, so none are lost or doubled.
+    def __init__(self, source):
+        self.source = source
+        self.lock = threading.Lock()
+        self.state = InputState()
+        self.fire_pressed = False
+
+    def press_fire(self):
+        with self.lock:
+            self.fire_pressed = True
+
+    def sample(self):
+        state = self.source.poll(None)
+        with self.lock:
+            self.state = state
+
+    def poll(self, world):
+        with self.lock:
+            state = self.state
+            pressed = self.fire_pressed
+            self.fire_pressed = False
+        return InputState(state.left, state.right, state.fire, pressed)
+
+
+class SweepInput:
+    # Holds fire and sweeps across the screen, enough to keep a headless
+    # run busy without anyone at the keyboard
+    def __init__(self, period=120):
+        self.period = period
+
+    def poll(self, world):
+        going_left = (world.tick // self.period) % 2 == 0
+        return InputState(going_left, not going_left, True, False)
+
+
+class RandomInput:
+    # Mashes keys: every so often picks a new direction and whether to hold
+    # fire. Has its own Random so it never disturbs the game's.
+    def __init__(self, seed=None, change_chance=0.05, fire_chance=0.8):
+        self.rng = random.Random(seed)
+        self.change_chance = change_chance
+        self.fire_chance = fire_chance
+        self.state = InputState()
+
+    def poll(self, world):
+        rng = self.rng
+        if rng.random() < self.change_chance:
+            move = rng.randrange(3)
+            self.state = InputState(move == 1, move == 2, rng.random() < self.fire_chance)
+        return self.state
@@ -0,0 +1,140 @@
+import pygame
+import numpy as np
+
+# Dirty rectangle bookkeeping for the optional partial-update renderer.
+#
+# The screen is split into coarse tiles. Everything drawn in a frame marks
+# the tiles it covers; the next frame first restores the background over
+# those tiles, and the display is updated for the union of last frame's and
+# this frame's tiles. Where the caller repainted the background itself (it
+# scrolled), it adds those tiles with invalidate() so they are presented
+# too. Tiles keep the rect list short no matter how many bullets or
+# particles are flying, and marking thousands of small boxes is a couple of
+# numpy scatters.
+#
+# If more than `threshold` of the screen ends up dirty, finish() returns
+# None and the caller should just flip the whole display.
+
+TILE_SIZE = 32
+FULL_UPDATE_THRESHOLD = 0.5
+FEW_BOXES = 8
+
+
+class DirtyTracker:
+    def __init__(self, size, tile_size=TILE_SIZE, threshold=FULL_UPDATE_THRESHOLD):
+        self.width, self.height = size
+        self.tile_size = tile_size
+        self.threshold = threshold
+        self.cols = -(-self.width // tile_size)
+        self.rows = -(-self.height // tile_size)
+        self.screen_rect = pygame.Rect(0, 0, self.width, self.height)
+        self.current = np.zeros((self.rows, self.cols), dtype=np.bool_)
+        # Nothing is on screen yet, so the first frame restores everything
+        self.previous = np.ones((self.rows, self.cols), dtype=np.bool_)
+        self.repainted = np.zeros((self.rows, self.cols), dtype=np.bool_)
+        # Scratch for tile_rects, a clean column either side of the tiles
+        self.padded = np.zeros((self.rows, self.cols + 2), dtype=np.bool_)
+
+    def mark(self, rect):
+        left, top, width, height = rect
+        if width <= 0 or height <= 0:
+            return
+        size = self.tile_size
+        c0 = max(0, left // size)
+        r0 = max(0, top // size)
+        c1 = min(self.cols - 1, (left + width - 1) // size)
+        r1 = min(self.rows - 1, (top + height - 1) // size)
+        if c0 <= c1 and r0 <= r1:
+            self.current[r0:r1 + 1, c0:c1 + 1] = True
+
+    def mark_all(self):
+        self.current[:] = True
+
+    def invalidate(self, mask):
+        # Tiles the caller already brought up to date underneath everything
+        # (the background moved), to be presented with the rest this frame
+        self.repainted |= mask
+
+    def mark_boxes(self, left, top, right, bottom):
+        # Boxes given as int arrays (right/bottom exclusive). Anything that
+        # spans at most two tiles each way (a bullet's 33px glow box does)
+        # touches at most its four corner tiles, so mark those directly and
+        # only loop over the rare bigger boxes. A handful of boxes is
+        # cheaper to mark one by one than to set up the scatter for.
+        if len(left) <= FEW_BOXES:
+            for box in zip(left.tolist(), top.tolist(), right.tolist(), bottom.tolist()):
+                self.mark((box[0], box[1], box[2] - box[0], box[3] - box[1]))
+            return
+        size = self.tile_size
+        c0 = left // size
+        c1 = (right - 1) // size
+        r0 = top // size
+        r1 = (bottom - 1) // size
+        big = ((c1 - c0) > 1) | ((r1 - r0) > 1)
+        if big.any():
+            for box in zip(left[big].tolist(), top[big].tolist(),
+                           right[big].tolist(), bottom[big].tolist()):
+                self.mark((box[0], box[1], box[2] - box[0], box[3] - box[1]))
+            small = ~big
+            c0, c1, r0, r1 = c0[small], c1[small], r0[small], r1[small]
+
+        # A box wholly off screen gets clamped onto an edge tile, which only
+        # costs restoring one tile more than needed
+        last_col = self.cols - 1
+        last_row = self.rows - 1
+        c0 = np.minimum(np.maximum(c0, 0), last_col)
+        c1 = np.minimum(np.maximum(c1, 0), last_col)
+        r0 = np.minimum(np.maximum(r0, 0), last_row)
+        r1 = np.minimum(np.maximum(r1, 0), last_row)
+        current = self.current
+        current[r0, c0] = True
+        current[r0, c1] = True
+        current[r1, c0] = True
+        current[r1, c1] = True
+
+    def tile_rects(self, mask):
+        # Runs of dirty tiles along each row, found for every row in one
+        # pass, stacked downwards while the same run continues on the next
+        # row
+        padded = self.padded
+        padded[:, 1:-1] = mask
+        rows, edges = np.nonzero(padded[:, 1:] != padded[:, :-1])
+        rects = []
+        open_runs = {}  # (first col, end col) -> [first row, last row]
+        for row, start, end in zip(rows[0::2].tolist(), edges[0::2].tolist(),
+                                   edges[1::2].tolist()):
+            run = open_runs.get((start, end))
+            if run is not None and run[1] == row - 1:
+                run[1] = row
+                continue
+            if run is not None:
+                rects.append(self.run_rect(start, end, run))
+            open_runs[(start, end)] = [row, row]
+        for (start, end), run in open_runs.items():
+            rects.append(self.run_rect(start, end, run))
+        return rects
+
+    def run_rect(self, start, end, run):
+        size = self.tile_size
+        rect = pygame.Rect(start * size, run[0] * size,
+                           (end - start) * size, (run[1] - run[0] + 1) * size)
+        return rect.clip(self.screen_rect)
+
+    def restore_rects(self):
+        # Where last frame drew, to be covered with background first
+        if self.previous.all():
+            return [self.screen_rect.copy()]
+        return self.tile_rects(self.previous)
+
+    def finish(self):
+        # Rects to pass to pygame.display.update, or None for a full flip.
+        # Also rolls this frame's marks over to be restored next frame.
+        dirty = self.previous | self.current
+        dirty |= self.repainted
+        self.repainted[:] = False
+        self.previous, self.current = self.current, self.previous
+        self.current[:] = False
+
+        if np.count_nonzero(dirty) > self.threshold * dirty.size:
+            return None
+        return self.tile_rects(dirty)
@@ -0,0 +1,90 @@
+import heapq
+from constants import *
+
+# Timed state for the game: powerup effects, enemy freezes, the player's
+# invulnerability. Deadlines sit in a min-heap, so a tick only has to look
+# at the earliest one instead of walking every timer to find what ran out.
+
+
+class Effect:
+    # One bit per powerup type, for PowerupManager.active. Plain ints rather
+    # than an IntFlag: enum arithmetic costs far more than the dict lookups
+    # this replaces.
+    RAPID_FIRE = 1 << 0
+    TRIPLE_SHOT = 1 << 1
+    LASER = 1 << 2
+    SPREAD_SHOT = 1 << 3
+    HOMING = 1 << 4
+    PIERCING = 1 << 5
+    EXPLOSIVE = 1 << 6
+    SHIELD = 1 << 7
+    SPEED_BOOST = 1 << 8
+    SLOW_TIME = 1 << 9
+    DOUBLE_POINTS = 1 << 10
+    MEGA_BOMB = 1 << 11
+    FREEZE = 1 << 12
+    GHOST = 1 << 13
+    CHAIN_LIGHTNING = 1 << 14
+
+
+# Fails at import if a powerup type is added without a bit
+EFFECT_BITS = {name: getattr(Effect, name) for name in POWERUP_TYPES}
+
+
+class TimerQueue:
+    # Keyed timers on a min-heap of (time, seq, key). Scheduling a key again
+    # moves its deadline; the old heap entry is left behind and skipped when
+    # it surfaces, which is cheaper than digging it out of the heap.
+    #
+    # A timer is due once the clock reaches its time, so something that
+    # should last through time T (the game clock is whole milliseconds) is
+    # scheduled at T + 1.
+    def __init__(self):
+        self.heap = []
+        self.pending = {}  # key -> (time, seq) of its live entry
+        self.actions = {}
+        self.seq = 0
+
+    def schedule(self, key, when, action=None):
+        # action, if given, is called as action(key, now) when it fires
+        self.seq += 1
+        self.pending[key] = (when, self.seq)
+        if action is None:
+            self.actions.pop(key, None)
+        else:
+            self.actions[key] = action
+        heapq.heappush(self.heap, (when, self.seq, key))
+
+    def cancel(self, key):
+        self.actions.pop(key, None)
+        return self.pending.pop(key, None) is not None
+
+    def __contains__(self, key):
+        return key in self.pending
+
+    def __len__(self):
+        return len(self.pending)
+
+    def run(self, now):
+        # Fire everything due by `now`, earliest first, and return the keys.
+        # A quiet tick is one comparison against the top of the heap.
+        heap = self.heap
+        if not heap or heap[0][0] > now:
+            return ()
+        pending = self.pending
+        fired = []
+        while heap and heap[0][0] <= now:
+            when, seq, key = heapq.heappop(heap)
+            if pending.get(key) != (when, seq):
+                continue  # rescheduled or cancelled since
+            del pending[key]
+            fired.append(key)
+            action = self.actions.pop(key, None)
+            if action is not None:
+                action(key, now)
+        return fired
+
+    def clear(self):
+        self.heap.clear()
+        self.pending.clear()
+        self.actions.clear()
@@ -1,62 +1,115 @@
 import pygame
 import random
 import math
+import itertools
+import numpy as np
 from constants import *
-from bullet import Bullet
+from entities import EntityRegistry, NO_ENTITY
+from effects import TimerQueue
+
+ICE_TINT = (150, 200, 255, 128)
+ENEMY_COLORS = [GREEN, CYAN, YELLOW, ORANGE, PURPLE]
+
+# Everything a snapshot needs to draw the formation
+SNAPSHOT_ARRAYS = ('x', 'y', 'left', 'top', 'enemy_type', 'hp', 'max_hp', 'frozen',
+                   'anim_timer', 'anim_frame', 'alive')
+
+# Tells snapshots of different waves apart, so nothing is blended across
+# a new wave
+wave_serials = itertools.count()
+
+def round_rect_coord(values):
+    # Same rounding pygame.Rect uses when a float is assigned to x/y: half
+    # away from zero. x - trunc(x) is exact, so no 0.49999... surprises.
+    whole = np.trunc(values)
+    frac = values - whole
+    return (whole + np.sign(values) * (np.abs(frac) >= 0.5)).astype(np.int64)
 
 class Enemy:
-    def __init__(self, x, y, enemy_type=0, asset_manager=None):
-        self.x = x
-        self.y = y
+    # A light view onto one slot of its EnemyWave. Position, HP, freeze and
+    # animation state live in the wave's arrays; the view just reads and
+    # writes through, and keeps a Rect that is refreshed when first read
+    # after the wave moves.
+    __slots__ = ('wave', 'index', 'enemy_type', 'color', 'asset_manager', 'rng',
+                 'sprite', 'sprite_name', '_rect', '_version', 'eid')
+    
+    def __init__(self, wave, index, enemy_type=0):
+        self.wave = wave
+        self.index = index
         self.enemy_type = enemy_type
-        self.rect = pygame.Rect(x, y, ENEMY_SIZE[0], ENEMY_SIZE[1])
-        self.colors = [GREEN, CYAN, YELLOW, ORANGE, PURPLE]
-        self.color = self.colors[enemy_type % len(self.colors)]
-        self.hp = enemy_type // 5 + 1 
-        self.max_hp = self.hp
-        self.frozen = False
-        self.freeze_end = 0
-        self.asset_manager = asset_manager
+        self.eid = NO_ENTITY
+        self.color = ENEMY_COLORS[enemy_type % len(ENEMY_COLORS)]
+        self.asset_manager = wave.asset_manager
+        self.rng = wave.rng
         self.sprite = None
-        self.animation_frame = 0
-        self.animation_timer = 0
+        self.sprite_name = None
+        self._rect = pygame.Rect(int(wave.left[index]), int(wave.top[index]),
+                                 ENEMY_SIZE[0], ENEMY_SIZE[1])
+        self._version = wave.version
         
-        if asset_manager:
+        if self.asset_manager:
       
             sprite_type = (enemy_type % 3) + 1
-            self.sprite = asset_manager.get_sprite(f'enemy{sprite_type}')
-        
-    def update(self, dx, dy, current_time):
-        if self.frozen and current_time < self.freeze_end:
-            return
-        self.frozen = False
+            self.sprite_name = f'enemy{sprite_type}'
+            self.sprite = self.asset_manager.get_sprite(self.sprite_name)
             
-        self.x += dx
-        self.y += dy
-        self.rect.x = self.x
-        self.rect.y = self.y
+    @property
+    def rect(self):
+        wave = self.wave
+        if self._version != wave.version:
+            self._rect.topleft = (int(wave.left[self.index]), int(wave.top[self.index]))
+            self._version = wave.version
+        return self._rect
         
-        # Animate sprite
-        self.animation_timer += 1
-        if self.animation_timer > 30:
-            self.animation_timer = 0
-            self.animation_frame = (self.animation_frame + 1) % 2
+    @property
+    def x(self):
+        return float(self.wave.x[self.index])
+        
+    @property
+    def y(self):
+        return float(self.wave.y[self.index])
+        
+    @property
+    def hp(self):
+        return int(self.wave.hp[self.index])
+        
+    @hp.setter
+    def hp(self, value):
+        self.wave.hp[self.index] = value
+        
+    @property
+    def max_hp(self):
+        return int(self.wave.max_hp[self.index])
+        
+    @property
+    def frozen(self):
+        return bool(self.wave.frozen[self.index])
+        
+    @property
+    def freeze_end(self):
+        return float(self.wave.freeze_end[self.index])
+        
+    @property
+    def animation_timer(self):
+        return int(self.wave.anim_timer[self.index])
+        
+    @property
+    def animation_frame(self):
+        return int(self.wave.anim_frame[self.index])
         
     def draw(self, screen):
         if self.sprite:
-            # Draw sprite with effects
-            sprite_to_draw = self.sprite.copy()
+            # Draw sprite with effects, ice tint and damage fade come
+            # prebuilt from the asset manager's variant cache
+            tint = ICE_TINT if self.frozen else None
             
-            if self.frozen:
-                # Apply ice effect
-                ice_overlay = pygame.Surface(self.sprite.get_size(), pygame.SRCALPHA)
-                ice_overlay.fill((150, 200, 255, 128))
-                sprite_to_draw.blit(ice_overlay, (0, 0))
-                
             # Damage effect - darken sprite based on HP
+            damage_alpha = None
             if self.hp < self.max_hp:
-                damage_alpha = int(255 * (self.hp / self.max_hp))
-                sprite_to_draw.set_alpha(damage_alpha)
+                damage_alpha = max(0, int(255 * (self.hp / self.max_hp)))
+            
+            sprite_to_draw = self.asset_manager.get_variant(self.sprite_name, tint=tint,
+                                                            alpha=damage_alpha)
             
             # Wobble animation
             offset_y = math.sin(self.animation_timer * 0.1) * 2
@@ -102,46 +155,88 @@ class Enemy:
                         pygame.draw.circle(screen, RED, 
                                          (self.rect.centerx - 5 + i * 10, self.rect.centery), 2)
                     
-    def shoot(self):
-        if random.random() < 0.001: 
-            return Bullet(self.rect.centerx, self.rect.bottom, 1, RED, 
-                         asset_manager=self.asset_manager)
-        return None
+    def shoot(self, bullets):
+        return bullets.spawn(self.rect.centerx, self.rect.bottom, 1, RED)
         
     def freeze(self, duration, current_time):
-        self.frozen = True
-        self.freeze_end = current_time + duration
+        wave = self.wave
+        wave.frozen[self.index] = True
+        wave.freeze_end[self.index] = current_time + duration
+        wave.timers.schedule(('thaw', self.index), current_time + duration, wave.thaw)
         
     def take_damage(self, damage=1):
-        self.hp -= damage
-        return self.hp <= 0
+        wave = self.wave
+        wave.hp[self.index] -= damage
+        return bool(wave.hp[self.index] <= 0)
 
 class EnemyWave:
-    def __init__(self, level=1, asset_manager=None):
-        self.enemies = []
+    # Formation state is kept in numpy arrays, one slot per enemy, so moving,
+    # edge checks and freezing are whole-array operations. `enemies` holds
+    # the Enemy views of the slots still alive in an EntityRegistry; pass one
+    # in to keep ids unique across waves.
+    def __init__(self, level=1, asset_manager=None, rng=None, rows=None, cols=None,
+                 fire_chance=None, front_row_only=None, registry=None, timers=None):
+        self.enemies = registry if registry is not None else EntityRegistry()
+        # Freezes wear off through the timer queue
+        self.timers = timers if timers is not None else TimerQueue()
         self.direction = 1
         self.drop_timer = 0
         self.level = level
         self.speed_multiplier = 1.0
         self.asset_manager = asset_manager
-        self.create_wave(level)
+        self.rng = rng or random
+        if fire_chance is None:
+            fire_chance = min(ENEMY_FIRE_CHANCE + ENEMY_FIRE_CHANCE_PER_LEVEL * (level - 1),
+                              ENEMY_FIRE_CHANCE_MAX)
+        self.fire_chance = fire_chance
+        if front_row_only is None:
+            front_row_only = ENEMY_FRONT_ROW_ONLY
+        self.front_row_only = front_row_only
+        self.version = 0
+        self.create_wave(level, rows, cols)
         
-    def create_wave(self, level):
-        # Calculate enemies based on level
-        rows = min(3 + level // 3, 8) 
-        cols = min(8 + level // 2, 12) 
+    def create_wave(self, level, rows=None, cols=None):
+        # Calculate enemies based on level, rows/cols override it for
+        # custom stress waves
+        if rows is None:
+            rows = min(WAVE_BASE_ROWS + level // WAVE_LEVELS_PER_ROW, WAVE_MAX_ROWS)
+        if cols is None:
+            cols = min(WAVE_BASE_COLS + level // WAVE_LEVELS_PER_COL, WAVE_MAX_COLS)
         
         start_x = (SCREEN_WIDTH - (cols * (ENEMY_SIZE[0] + 10))) // 2
         start_y = 50
         
-        for row in range(rows):
-            for col in range(cols):
-                x = start_x + col * (ENEMY_SIZE[0] + 10)
-                y = start_y + row * (ENEMY_SIZE[1] + 10)
-                enemy_type = (level - 1) + row
-                self.enemies.append(Enemy(x, y, enemy_type, self.asset_manager))
+        self.serial = next(wave_serials)
+        row = np.repeat(np.arange(rows), cols)
+        col = np.tile(np.arange(cols), rows)
+        count = rows * cols
+        self.x = (start_x + col * (ENEMY_SIZE[0] + 10)).astype(np.float64)
+        self.y = (start_y + row * (ENEMY_SIZE[1] + 10)).astype(np.float64)
+        self.left = self.x.astype(np.int64)
+        self.top = self.y.astype(np.int64)
+        # Lowest edge of the formation, only ever too low after removals,
+        # so colliding() can turn away anything below it without looking
+        self.bottom = int(self.top.max()) + ENEMY_SIZE[1]
+        self.column = col
+        self.enemy_type = (level - 1) + row
+        self.hp = (self.enemy_type // 5 + 1).astype(np.int64)
+        self.max_hp = self.hp.copy()
+        self.frozen = np.zeros(count, dtype=np.bool_)
+        self.freeze_end = np.zeros(count, dtype=np.float64)
+        self.anim_timer = np.zeros(count, dtype=np.int64)
+        self.anim_frame = np.zeros(count, dtype=np.int64)
+        self.alive = np.ones(count, dtype=np.bool_)
+        
+        # One view per slot, dead or alive, so slot numbers map straight to
+        # enemies
+        self.views = [Enemy(self, i, enemy_type)
+                      for i, enemy_type in enumerate(self.enemy_type.tolist())]
+        self.enemies.clear()
+        for view in self.views:
+            view.eid = self.enemies.add(view)
                 
     def update(self, current_time, slow_time=False):
+        self.timers.run(current_time)
         if not self.enemies:
             return
             
@@ -149,35 +244,175 @@ class EnemyWave:
         if slow_time:
             speed *= 0.3
             
-       
-        hit_edge = False
-        for enemy in self.enemies:
-            if (enemy.rect.left <= 0 and self.direction < 0) or \
-               (enemy.rect.right >= SCREEN_WIDTH and self.direction > 0):
-                hit_edge = True
-                break
+        alive = self.alive
+        left = self.left[alive]
+        if self.direction < 0:
+            hit_edge = left.min() <= 0
+        else:
+            hit_edge = left.max() + ENEMY_SIZE[0] >= SCREEN_WIDTH
                 
         if hit_edge:
             self.direction *= -1
-            for enemy in self.enemies:
-                enemy.update(0, ENEMY_DROP_DISTANCE, current_time)
+            self.move(0, ENEMY_DROP_DISTANCE, current_time)
             self.speed_multiplier += 0.1 
         else:
-            for enemy in self.enemies:
-                enemy.update(self.direction * speed, 0, current_time)
+            self.move(self.direction * speed, 0, current_time)
+            
+    def move(self, dx, dy, current_time):
+        # Frozen enemies hold still, update() thaws them when time is up
+        moving = self.alive & ~self.frozen
+        
+        if dx:
+            self.x[moving] += dx
+            self.left[moving] = round_rect_coord(self.x[moving])
+        if dy:
+            self.y[moving] += dy
+            self.top[moving] = round_rect_coord(self.y[moving])
+            if self.alive.any():
+                self.bottom = int(self.top[self.alive].max()) + ENEMY_SIZE[1]
+        
+        # Animate sprite
+        timer = self.anim_timer
+        timer[moving] += 1
+        flip = moving & (timer > 30)
+        timer[flip] = 0
+        self.anim_frame[flip] ^= 1
+        self.version += 1
                 
     def draw(self, screen):
         for enemy in self.enemies:
             enemy.draw(screen)
             
-    def get_bullets(self):
-        bullets = []
-        for enemy in self.enemies:
-            bullet = enemy.shoot()
-            if bullet:
-                bullets.append(bullet)
-        return bullets
+    def remove(self, enemy):
+        # Gone at once as far as the arrays and ids go, the registry packs
+        # itself on the next flush()
+        self.alive[enemy.index] = False
+        self.enemies.discard(enemy.eid)
+        
+    def flush(self):
+        self.enemies.flush()
+        
+    def clear(self):
+        self.alive[:] = False
+        self.enemies.clear()
+            
+    def live(self):
+        # Live enemies in formation order
+        views = self.views
+        return [views[i] for i in np.flatnonzero(self.alive).tolist()]
+            
+    def boxes(self):
+        # (left, top, width, height) arrays for the live enemies, in the
+        # same order as live()
+        alive = self.alive
+        left = self.left[alive]
+        return (left, self.top[alive], np.full(len(left), ENEMY_SIZE[0]),
+                np.full(len(left), ENEMY_SIZE[1]))
+            
+    def bounds(self):
+        # Bounding box of the whole formation as (left, top, right, bottom)
+        alive = self.alive
+        left = self.left[alive]
+        top = self.top[alive]
+        return (int(left.min()), int(top.min()),
+                int(left.max()) + ENEMY_SIZE[0], int(top.max()) + ENEMY_SIZE[1])
+
+    def nearest(self, x, y):
+        # Live enemy whose rect centre is closest to (x, y), or None. One
+        # argmin over the whole wave, which for any wave the game makes is
+        # cheaper than walking the grid; ties go to formation order like
+        # SpatialHash.nearest.
+        if not self.enemies:
+            return None
+        dx = self.left + ENEMY_SIZE[0] // 2 - x
+        dy = self.top + ENEMY_SIZE[1] // 2 - y
+        dist = np.where(self.alive, dx * dx + dy * dy, np.inf)
+        return self.views[dist.argmin()]
+        
+    def colliding(self, rect):
+        # Live enemies overlapping rect, in formation order. Until the
+        # formation comes down to the rect there is nothing to look at.
+        if self.bottom <= rect.top:
+            return []
+        alive = np.flatnonzero(self.alive)
+        left = self.left[alive]
+        top = self.top[alive]
+        hit = ((left < rect.right) & (left + ENEMY_SIZE[0] > rect.left) &
+               (top < rect.bottom) & (top + ENEMY_SIZE[1] > rect.top))
+        if not hit.any() or rect.width <= 0 or rect.height <= 0:
+            return []
+        views = self.views
+        return [views[i] for i in alive[hit].tolist()]
+        
+    def front_row(self):
+        # Lowest live enemy in each column, in formation order
+        slots = np.flatnonzero(self.alive)
+        if not len(slots):
+            return []
+        order = np.lexsort((self.y[slots], self.column[slots]))
+        slots = slots[order]
+        column = self.column[slots]
+        last = np.append(column[1:] != column[:-1], True)
+        views = self.views
+        return [views[i] for i in np.sort(slots[last]).tolist()]
+        
+    def get_shooters(self, chance_scale=1.0):
+        # Every candidate fires with probability fire_chance * chance_scale.
+        # Instead of one roll per enemy, jump from one shooter straight to
+        # the next: the gap between successes is geometric, so a quiet tick
+        # costs a single random number however big the formation is.
+        candidates = self.front_row() if self.front_row_only else self.enemies.live()
+        chance = self.fire_chance * chance_scale
+        if not candidates or chance <= 0:
+            return []
+        if chance >= 1:
+            return list(candidates)
+        
+        log_miss = math.log(1.0 - chance)
+        rng = self.rng
+        shooters = []
+        i = -1
+        while True:
+            i += 1 + int(math.log(1.0 - rng.random()) / log_miss)
+            if i >= len(candidates):
+                return shooters
+            shooters.append(candidates[i])
+        
+    def snapshot(self, **arrays):
+        # A copy of the formation that only knows how to be drawn: its own
+        # arrays and views, no registry, timers or rng, so it can be handed
+        # to another thread while this wave keeps moving. arrays replaces
+        # any of SNAPSHOT_ARRAYS instead of copying them.
+        wave = EnemyWave.__new__(EnemyWave)
+        wave.asset_manager = self.asset_manager
+        wave.rng = None
+        wave.version = self.version
+        wave.serial = self.serial
+        for name in SNAPSHOT_ARRAYS:
+            setattr(wave, name, arrays[name] if name in arrays else getattr(self, name).copy())
+        types = wave.enemy_type.tolist()
+        wave.views = [None] * len(types)
+        for i in np.flatnonzero(wave.alive).tolist():
+            wave.views[i] = Enemy(wave, i, types[i])
+        wave.enemies = [wave.views[i] for i in np.flatnonzero(wave.alive).tolist()]
+        return wave
+        
+    def interpolate(self, previous, alpha):
+        # Snapshot part way from `previous` to this one, for drawing between
+        # ticks. Only the same wave blends, a new one just appears.
+        if (previous is None or previous.serial != self.serial or alpha >= 1 or
+                len(previous.x) != len(self.x)):
+            return self
+        x = previous.x + (self.x - previous.x) * alpha
+        y = previous.y + (self.y - previous.y) * alpha
+        return self.snapshot(x=x, y=y, left=round_rect_coord(x), top=round_rect_coord(y))
         
     def freeze_all(self, duration, current_time):
-        for enemy in self.enemies:
-            enemy.freeze(duration, current_time)
\ No newline at end of file
+        alive = self.alive
+        self.frozen[alive] = True
+        self.freeze_end[alive] = current_time + duration
+        self.timers.schedule('thaw', current_time + duration, self.thaw)
+        
+    def thaw(self, key, current_time):
+        # Unfreeze every enemy whose freeze has run out
+        self.frozen &= ~(self.freeze_end <= current_time)
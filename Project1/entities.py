@@ -0,0 +1,137 @@
+# Stable handles for game objects.
+#
+# An entity id packs a storage slot with that slot's generation. Slots are
+# recycled, but the generation is bumped every time one is freed, so an id
+# held after its entity died (a piercing bullet's hit set, a homing target)
+# can never match whatever moves into the slot later. id(obj) had exactly
+# that problem once the object was garbage collected.
+#
+# EntityRegistry keeps the live objects packed in one list. Removal swaps
+# the last item into the hole, so it is O(1) and never scans. Most removals
+# go through discard(), which kills the id straight away but leaves the
+# packing to flush(), called once per tick. That way nothing shuffles
+# underneath a loop that is still walking the entities.
+
+INDEX_BITS = 24
+INDEX_MASK = (1 << INDEX_BITS) - 1
+NO_ENTITY = -1
+
+
+def make_id(slot, generation):
+    return (generation << INDEX_BITS) | slot
+
+
+def id_slot(eid):
+    return eid & INDEX_MASK
+
+
+def id_generation(eid):
+    return eid >> INDEX_BITS
+
+
+class EntityRegistry:
+    def __init__(self):
+        self.items = []       # live entities, packed
+        self.ids = []         # id of each packed item
+        self.position = []    # slot -> index in items, -1 when free
+        self.generation = []  # slot -> current generation
+        self.free = []
+        self.pending = []     # discarded slots waiting for flush()
+
+    def add(self, entity):
+        if self.free:
+            slot = self.free.pop()
+        else:
+            slot = len(self.generation)
+            self.generation.append(0)
+            self.position.append(-1)
+        eid = make_id(slot, self.generation[slot])
+        self.position[slot] = len(self.items)
+        self.items.append(entity)
+        self.ids.append(eid)
+        return eid
+
+    def is_live(self, eid):
+        slot = eid & INDEX_MASK
+        return (0 <= eid and slot < len(self.generation) and
+                self.generation[slot] == eid >> INDEX_BITS and
+                self.position[slot] >= 0)
+
+    def __contains__(self, eid):
+        return self.is_live(eid)
+
+    def get(self, eid):
+        if not self.is_live(eid):
+            return None
+        return self.items[self.position[eid & INDEX_MASK]]
+
+    def discard(self, eid):
+        # Dead from now on; the storage is compacted at the next flush()
+        if not self.is_live(eid):
+            return False
+        slot = eid & INDEX_MASK
+        self.generation[slot] += 1
+        self.pending.append(slot)
+        return True
+
+    def remove(self, eid):
+        # Discard and compact straight away
+        if not self.discard(eid):
+            return False
+        self.pending.pop()
+        self.release(eid & INDEX_MASK)
+        return True
+
+    def release(self, slot):
+        # Swap the last item into this slot's place
+        pos = self.position[slot]
+        last = len(self.items) - 1
+        if pos != last:
+            moved = self.ids[last]
+            self.items[pos] = self.items[last]
+            self.ids[pos] = moved
+            self.position[moved & INDEX_MASK] = pos
+        self.items.pop()
+        self.ids.pop()
+        self.position[slot] = -1
+        self.free.append(slot)
+
+    def flush(self):
+        pending = self.pending
+        if not pending:
+            return
+        for slot in pending:
+            self.release(slot)
+        pending.clear()
+
+    def clear(self):
+        for eid in self.ids:
+            slot = eid & INDEX_MASK
+            if self.position[slot] >= 0:
+                self.generation[slot] += 1
+                self.position[slot] = -1
+                self.free.append(slot)
+        self.items.clear()
+        self.ids.clear()
+        self.pending.clear()
+
+    def __len__(self):
+        return len(self.items) - len(self.pending)
+
+    def __iter__(self):
+        if not self.pending:
+            return iter(self.items)
+        generation = self.generation
+        return (item for item, eid in zip(self.items, self.ids)
+                if generation[eid & INDEX_MASK] == eid >> INDEX_BITS)
+
+    def __getitem__(self, index):
+        # Position in the packed list, only meaningful between flushes
+        return self.items[index]
+
+    def live(self):
+        # Live items as a list. Between flushes that is the packed list
+        # itself, so treat it as read-only.
+        if not self.pending:
+            return self.items
+        return list(self)
@@ -0,0 +1,98 @@
+from entities import EntityRegistry, NO_ENTITY
+
+# Explosions are drawn from one atlas per size: a strip of frames built
+# once by the AssetManager, blitted with prerolled subsurfaces so nothing
+# is scaled or allocated while the game runs. The explosions themselves
+# are small __slots__ objects recycled through a fixed-size pool.
+
+EXPLOSION_SIZES = {'small': 30, 'medium': 50, 'large': 80}
+EXPLOSION_FRAMES = 8
+FRAME_TICKS = 4  # ticks each frame stays up
+MAX_EXPLOSIONS = 256
+
+
+class Explosion:
+    __slots__ = ('x', 'y', 'size', 'frame', 'timer', 'eid')
+
+    def __init__(self):
+        self.x = 0
+        self.y = 0
+        self.size = 'medium'
+        self.frame = 0
+        self.timer = 0
+        self.eid = NO_ENTITY
+
+    def rect(self):
+        extent = EXPLOSION_SIZES[self.size]
+        half = extent // 2
+        return (int(self.x) - half, int(self.y) - half, extent, extent)
+
+
+class ExplosionPool:
+    def __init__(self, capacity=MAX_EXPLOSIONS):
+        self.capacity = capacity
+        self.active = EntityRegistry()
+        self.spare = [Explosion() for _ in range(capacity)]
+
+    def spawn(self, x, y, size='medium'):
+        # Returns None if every explosion is already in use
+        if not self.spare:
+            return None
+        explosion = self.spare.pop()
+        explosion.x = x
+        explosion.y = y
+        explosion.size = size
+        explosion.frame = 0
+        explosion.timer = 0
+        explosion.eid = self.active.add(explosion)
+        return explosion
+
+    def update(self):
+        for explosion in self.active:
+            explosion.timer += 1
+            if explosion.timer >= FRAME_TICKS:
+                explosion.timer = 0
+                explosion.frame += 1
+                if explosion.frame >= EXPLOSION_FRAMES:
+                    self.active.discard(explosion.eid)
+
+    def flush(self):
+        # Finished explosions go back on the spare list with the registry
+        for slot in self.active.pending:
+            self.spare.append(self.active.items[self.active.position[slot]])
+        self.active.flush()
+
+    def clear(self):
+        self.spare.extend(self.active.items)
+        self.active.clear()
+
+    def snapshot(self):
+        # Copies of the running explosions, for drawing while this pool
+        # keeps going
+        pool = ExplosionPool.__new__(ExplosionPool)
+        pool.capacity = self.capacity
+        pool.spare = []
+        pool.active = []
+        for explosion in self.active:
+            copy = Explosion()
+            copy.x = explosion.x
+            copy.y = explosion.y
+            copy.size = explosion.size
+            copy.frame = explosion.frame
+            copy.timer = explosion.timer
+            pool.active.append(copy)
+        return pool
+
+    def __len__(self):
+        return len(self.active)
+
+    def __iter__(self):
+        return iter(self.active)
+
+    def draw(self, screen, asset_manager):
+        if not len(self.active):
+            return
+        frames = {size: asset_manager.get_explosion_frames(size) for size in EXPLOSION_SIZES}
+        half = {size: extent // 2 for size, extent in EXPLOSION_SIZES.items()}
+        screen.blits([(frames[e.size][e.frame], (int(e.x) - half[e.size], int(e.y) - half[e.size]))
+                      for e in self.active], doreturn=False)
@@ -1,372 +1,347 @@
 import pygame
-import random
 import math
+import time
+import numpy as np
 from constants import *
-from player import Player
-from enemy import EnemyWave
-from bullet import Bullet
-from powerup import PowerupManager
-from particle import ParticleSystem
 from assets import AssetManager
+from sprite_cache import SpriteCache
+from starfield import StarField, STAR_DENSITY
+from controls import KeyboardInput, LatchedInput
+from simulation import Simulation, TICK_MS
+from profiler import FrameProfiler
+from dirty import DirtyTracker
+from text_cache import text_cache
+from replay import ReplayRecorder, ReplayInput
+from pipeline import SnapshotBuffer, SimulationThread
+
+# Most frames need one tick; after a stall we catch up at most this many
+# before giving up on the lost time
+MAX_CATCH_UP = 5
+
+HUD_SHADOW = (100, 100, 100)
 
 class Game:
-    def __init__(self):
+    def __init__(self, seed=None, input_source=None, profile=False, trace_path=None,
+                 dirty_rects=False, record_path=None, replay=None, speed=1.0,
+                 star_density=STAR_DENSITY, pipelined=False):
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Space Invaders Ultimate")
+        pygame.display.set_caption(CAPTION)
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 36)
-        self.small_font = pygame.font.Font(None, 24)
-        self.big_font = pygame.font.Font(None, 72)
+        # Also starts SDL's timer, which pygame.init() used to do and
+        # get_ticks() needs
+        self.clock.tick()
+        self.text = text_cache
+        self.dim_overlays = {}
         
         # Load assets
-        self.asset_manager = AssetManager()
-        self.background = self.asset_manager.get_sprite('star_field')
-        self.explosion_frames = self.asset_manager.get_sprite('explosion_frames')
+        self.asset_manager = AssetManager(cache=SpriteCache())
+        self.background = StarField(self.asset_manager, star_density)
         
         # Background animation
         self.bg_offset = 0
-        self.explosions = []  
+        self.paused = False
         
-        self.reset_game()
+        # Optional partial-update renderer. The stars keep scrolling: the
+        # tiles they moved through are presented along with everything drawn.
+        self.dirty = None
+        if dirty_rects:
+            self.dirty = DirtyTracker((SCREEN_WIDTH, SCREEN_HEIGHT))
+            self.background.prepare_erase(self.dirty.tile_size)
+        self.drawn_offset = self.bg_offset  # where the stars on screen are
+        
+        # Frame timing, F3 toggles the overlay
+        self.profiler = FrameProfiler()
+        if profile:
+            self.profiler.toggle_overlay()
+        self.trace_path = trace_path
+        if trace_path:
+            self.profiler.start_trace()
+        
+        # Game rules run in the simulation, this class only handles the
+        # window, keyboard and drawing. A replay stands in for the keyboard,
+        # a recording sits between the keyboard and the simulation.
+        self.speed = speed
+        self.replay = replay
+        if replay:
+            seed = replay.seed
+            input_source = ReplayInput(replay)
+        self.input = input_source or KeyboardInput()
+        # Pipelined, the simulation ticks on its own thread and the keyboard
+        # has to be read here and passed across
+        self.pipelined = pipelined
+        if pipelined and isinstance(self.input, KeyboardInput):
+            self.input = LatchedInput(self.input)
+        self.record_path = record_path
+        self.recorder = ReplayRecorder(seed, self.input) if record_path else None
+        self.sim = Simulation(seed, self.asset_manager,
+                              input_source=self.recorder or self.input,
+                              profiler=self.profiler)
+        # What draw() draws when set: in pipelined mode the latest snapshots
+        # blended, otherwise the simulation itself
+        self.view = None
+        self.snapshots = SnapshotBuffer()
+        self.reset_requested = False
         
     def reset_game(self):
-        self.player = Player(self.asset_manager)
-        self.player_bullets = []
-        self.enemy_bullets = []
-        self.enemy_wave = EnemyWave(1, self.asset_manager)
-        self.powerup_manager = PowerupManager()
-        self.particle_system = ParticleSystem()
-        self.score = 0
-        self.level = 1
-        self.game_over = False
+        if self.recorder:
+            self.recorder.mark_reset()
+        self.sim.reset()
         self.paused = False
-        self.score_multiplier = 1
-        self.explosions = []
         
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
             elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE and not self.game_over:
-                    current_time = pygame.time.get_ticks()
-                    bullets = self.player.shoot(current_time, self.powerup_manager, 
-                                               self.enemy_wave.enemies)
-                    self.player_bullets.extend(bullets)
+                if event.key == pygame.K_SPACE and not self.sim.game_over:
+                    if hasattr(self.input, 'press_fire'):
+                        self.input.press_fire()
                 elif event.key == pygame.K_p:
                     self.paused = not self.paused
-                elif event.key == pygame.K_r and self.game_over:
-                    self.reset_game()
+                elif event.key == pygame.K_r and self.sim.game_over and not self.replay:
+                    # Done by update(), on whichever thread runs the simulation
+                    self.reset_requested = True
+                elif event.key == pygame.K_F3:
+                    self.profiler.toggle_overlay()
                 elif event.key == pygame.K_ESCAPE:
                     return False
         return True
         
-    def add_explosion(self, x, y, size='medium'):
-        self.explosions.append({
-            'x': x,
-            'y': y,
-            'frame': 0,
-            'size': size,
-            'timer': 0
-        })
-        
     def update(self):
-        if self.game_over or self.paused:
+        if self.reset_requested:
+            self.reset_requested = False
+            self.reset_game()
+        if self.replay:
+            if self.input.finished(self.sim.tick):
+                return
+            if self.sim.game_over and self.input.wants_reset(self.sim.tick):
+                self.reset_game()
+        if self.sim.game_over or self.paused:
             return
             
-        current_time = pygame.time.get_ticks()
-        keys = pygame.key.get_pressed()
-        
         # Animate background
         self.bg_offset += 0.5
-        if self.bg_offset > SCREEN_HEIGHT:
-            self.bg_offset = 0
-        
-        # Update player
-        self.player.update(keys, current_time, self.powerup_manager)
-        
-        # Check for continuous shooting with space held was a little buggy at first
-        if keys[pygame.K_SPACE]:
-            bullets = self.player.shoot(current_time, self.powerup_manager, 
-                                       self.enemy_wave.enemies)
-            self.player_bullets.extend(bullets)
-        
-        # Update score multiplier
-        self.score_multiplier = 2 if self.powerup_manager.is_active('DOUBLE_POINTS') else 1
-        
-        # Update enemies
-        slow_time = self.powerup_manager.is_active('SLOW_TIME')
-        self.enemy_wave.update(current_time, slow_time)
-        
-        # Enemy shooting
-        if not self.powerup_manager.is_active('FREEZE'):
-            enemy_bullets = self.enemy_wave.get_bullets()
-            if slow_time:
-                enemy_bullets = [b for b in enemy_bullets if random.random() < 0.3]
-            self.enemy_bullets.extend(enemy_bullets)
-        
-        # Update bullets
-        self.player_bullets = [b for b in self.player_bullets if b.update()]
-        self.enemy_bullets = [b for b in self.enemy_bullets if b.update()]
-        
-        # Update powerups
-        self.powerup_manager.update(current_time)
-        
-        # Update particles
-        self.particle_system.update()
-        
-        # Update explosions
-        for explosion in self.explosions[:]:
-            explosion['timer'] += 1
-            if explosion['timer'] > 3:
-                explosion['timer'] = 0
-                explosion['frame'] += 1
-                if explosion['frame'] >= len(self.explosion_frames):
-                    self.explosions.remove(explosion)
-        
-        # Check for powerup collection
-        collected = self.powerup_manager.check_collection(self.player.rect)
-        if collected:
-            self.powerup_manager.activate_powerup(collected.type, current_time)
-            self.score += POWERUP_POINTS * self.score_multiplier
-            self.particle_system.add_explosion(collected.x, collected.y, collected.color, 10)
+        if self.bg_offset >= self.background.period:
+            self.bg_offset -= self.background.period
             
-            # Handle special instant powerups
-            if collected.type == 'MEGA_BOMB':
-                self.mega_bomb()
-            elif collected.type == 'FREEZE':
-                self.enemy_wave.freeze_all(3000, current_time)
-        
-        # Check bullet-enemy collisions
-        for bullet in self.player_bullets[:]:
-            for enemy in self.enemy_wave.enemies[:]:
-                if enemy not in self.enemy_wave.enemies:
-                    continue  # Skip if already removed
-                    
-                if bullet.get_rect().colliderect(enemy.rect) and bullet.can_hit_enemy(enemy):
-                    # Handle chain lightning
-                    if bullet.bullet_type == 'lightning':
-                        self.chain_lightning(enemy, self.enemy_wave.enemies)
-                    
-                    # Handle explosive bullets
-                    if bullet.bullet_type == 'explosive':
-                        self.explosion_damage(enemy.rect.center, 50, 2)
-                        self.add_explosion(enemy.rect.centerx, enemy.rect.centery, 'large')
-                    
-                    # Damage enemy
-                    if enemy.take_damage(bullet.damage):
-                        if enemy in self.enemy_wave.enemies:
-                            self.enemy_wave.enemies.remove(enemy)
-                            self.score += ENEMY_POINTS * self.score_multiplier
-                            self.add_explosion(enemy.rect.centerx, enemy.rect.centery)
-                            self.particle_system.add_explosion(enemy.rect.centerx, 
-                                                              enemy.rect.centery, 
-                                                              enemy.color, 15)
-                    
-                    bullet.mark_enemy_hit(enemy)
-                    if not bullet.piercing:
-                        if bullet in self.player_bullets:
-                            self.player_bullets.remove(bullet)
-                        break
+        self.sim.step()
         
-        # Check enemy bullet-player collisions
-        for bullet in self.enemy_bullets[:]:
-            if bullet.get_rect().colliderect(self.player.rect):
-                if self.player.take_damage(current_time):
-                    self.game_over = True
-                    self.add_explosion(self.player.rect.centerx, 
-                                     self.player.rect.centery, 'large')
-                    self.particle_system.add_explosion(self.player.rect.centerx,
-                                                      self.player.rect.centery,
-                                                      RED, 30)
-                else:
-                    self.add_explosion(bullet.x, bullet.y, 'small')
-                self.enemy_bullets.remove(bullet)
+    def draw(self):
+        sim = self.view if self.view is not None else self.sim
+        prof = self.profiler
         
-        # Check enemy-player collisions
-        for enemy in self.enemy_wave.enemies:
-            if enemy.rect.colliderect(self.player.rect):
-                if self.player.take_damage(current_time):
-                    self.game_over = True
-                    self.add_explosion(self.player.rect.centerx, 
-                                     self.player.rect.centery, 'large')
-                    self.particle_system.add_explosion(self.player.rect.centerx,
-                                                      self.player.rect.centery,
-                                                      RED, 30)
+        with prof.section('draw.background'):
+            if self.dirty:
+                self.restore_background()
+            else:
+                self.draw_background()
         
-        # Check if wave is cleared
-        if not self.enemy_wave.enemies:
-            self.level += 1
-            self.enemy_wave = EnemyWave(self.level, self.asset_manager)
-            # Bonus points for clearing level
-            self.score += 500 * self.level * self.score_multiplier
-            # Spawn bonus powerup
-            self.powerup_manager.spawn_powerup()
-    
-    def mega_bomb(self):
-        # Destroy all enemies on screen with explosion effect
-        for enemy in self.enemy_wave.enemies[:]:
-            self.score += ENEMY_POINTS * self.score_multiplier
-            self.add_explosion(enemy.rect.centerx, enemy.rect.centery, 'large')
-            self.particle_system.add_explosion(enemy.rect.centerx, 
-                                              enemy.rect.centery, 
-                                              RED, 20)
-        self.enemy_wave.enemies.clear()
-        # Clear enemy bullets
-        self.enemy_bullets.clear()
+        # Draw game objects
+        with prof.section('draw.player'):
+            if not sim.game_over:
+                sim.player.draw(self.screen)
+        with prof.section('draw.enemies'):
+            sim.enemy_wave.draw(self.screen)
+        with prof.section('draw.bullets'):
+            sim.player_bullets.draw(self.screen)
+            sim.enemy_bullets.draw(self.screen)
+        with prof.section('draw.powerups'):
+            sim.powerup_manager.draw(self.screen)
+        with prof.section('draw.particles'):
+            sim.particle_system.draw(self.screen)
+        with prof.section('draw.explosions'):
+            self.draw_explosions(sim)
+        with prof.section('draw.hud'):
+            hud_rects = self.draw_hud(sim)
+        
+        overlay_rect = prof.draw_overlay(self.screen)
+        
+        with prof.section('flip'):
+            if self.dirty:
+                if overlay_rect:
+                    hud_rects.append(overlay_rect)
+                self.mark_dirty(sim, hud_rects)
+                rects = self.dirty.finish()
+                if rects is None:
+                    pygame.display.flip()
+                else:
+                    pygame.display.update(rects)
+            else:
+                pygame.display.flip()
     
-    def chain_lightning(self, hit_enemy, all_enemies):
-        # Find nearby enemies
-        chain_targets = []
-        for enemy in all_enemies:
-            if enemy != hit_enemy and enemy in all_enemies:
-                dist = math.sqrt((enemy.rect.centerx - hit_enemy.rect.centerx)**2 + 
-                               (enemy.rect.centery - hit_enemy.rect.centery)**2)
-                if dist < 100:
-                    chain_targets.append(enemy)
-        
-        # Damage up to 3 enemies
-        for enemy in chain_targets[:3]:
-            if enemy in all_enemies and enemy.take_damage(1):
-                all_enemies.remove(enemy)
-                self.score += ENEMY_POINTS * self.score_multiplier
-                self.add_explosion(enemy.rect.centerx, enemy.rect.centery, 'small')
-            if enemy in all_enemies:
-                self.particle_system.add_explosion(enemy.rect.centerx, 
-                                                  enemy.rect.centery, 
-                                                  YELLOW, 10)
+    def draw_background(self):
+        # Scrolling parallax stars, one blit per layer
+        self.background.draw(self.screen, self.bg_offset)
     
-    def explosion_damage(self, center, radius, damage):
-        # Damage all enemies in radius
-        enemies_to_remove = []
-        for enemy in self.enemy_wave.enemies[:]:
-            dist = math.sqrt((enemy.rect.centerx - center[0])**2 + 
-                           (enemy.rect.centery - center[1])**2)
-            if dist < radius:
-                if enemy.take_damage(damage):
-                    enemies_to_remove.append(enemy)
-                    self.score += ENEMY_POINTS * self.score_multiplier
-                    self.particle_system.add_explosion(enemy.rect.centerx, 
-                                                      enemy.rect.centery, 
-                                                      ORANGE, 10)
-        
-        # Remove enemies after iteration
-        for enemy in enemies_to_remove:
-            if enemy in self.enemy_wave.enemies:
-                self.enemy_wave.enemies.remove(enemy)
+    def restore_background(self):
+        # Paint background back over whatever was drawn last frame and move
+        # the stars on. Everywhere else the screen already holds the field,
+        # so drawing the stars over it again changes nothing there.
+        background = self.background
+        moved = background.erase(self.screen, self.drawn_offset, self.bg_offset)
+        if moved is not None:
+            self.dirty.invalidate(moved)
+        self.drawn_offset = self.bg_offset
+        for rect in self.dirty.restore_rects():
+            self.screen.fill(BLACK, rect)
+        background.draw_stars(self.screen, self.bg_offset)
     
-    def draw(self):
-        # Draw scrolling background
-        if self.background:
-            # Draw two copies for seamless scrolling
-            self.screen.blit(self.background, (0, self.bg_offset))
-            self.screen.blit(self.background, (0, self.bg_offset - SCREEN_HEIGHT))
-        else:
-            self.screen.fill(BLACK)
-            # Fallback stars
-            for _ in range(50):
-                x = random.randint(0, SCREEN_WIDTH)
-                y = random.randint(0, SCREEN_HEIGHT)
-                pygame.draw.circle(self.screen, WHITE, (x, y), 1)
-        
-        # Draw game objects
-        if not self.game_over:
-            self.player.draw(self.screen)
+    def mark_dirty(self, sim, hud_rects):
+        dirty = self.dirty
+        
+        if not sim.game_over:
+            # Shield ring reaches 35px from the ship centre
+            dirty.mark(sim.player.rect.inflate(30, 40))
+        dirty.mark((10, SCREEN_HEIGHT - 35, 35 * sim.player.lives, 20))
+        
+        if sim.enemy_wave.enemies:
+            # Whole formation in one box, with room for wobble and HP bars
+            left, top, right, bottom = sim.enemy_wave.bounds()
+            dirty.mark((left, top - 2, right - left, bottom - top + 10))
             
-        self.enemy_wave.draw(self.screen)
-        
-        for bullet in self.player_bullets:
-            bullet.draw(self.screen)
-        for bullet in self.enemy_bullets:
-            bullet.draw(self.screen)
-            
-        self.powerup_manager.draw(self.screen)
-        self.particle_system.draw(self.screen)
+        # Bullets and particles in one scatter
+        dirty.mark_boxes(*map(np.concatenate, zip(sim.player_bullets.draw_boxes(),
+                                                   sim.enemy_bullets.draw_boxes(),
+                                                   sim.particle_system.boxes())))
+        
+        for powerup in sim.powerup_manager.powerups:
+            dirty.mark(powerup.rect.inflate(8, 8))
+        for explosion in sim.explosions:
+            dirty.mark(explosion.rect())
+        for rect in hud_rects:
+            dirty.mark(rect)
+        if sim.game_over or self.paused:
+            dirty.mark_all()
+    
+    def draw_explosions(self, sim):
+        sim.explosions.draw(self.screen, self.asset_manager)
+    
+    def draw_hud(self, sim):
+        # Returns the rects of HUD text for the dirty-rect renderer
+        text = self.text
+        rects = []
         
-        # Draw explosions
-        for explosion in self.explosions:
-            if explosion['frame'] < len(self.explosion_frames):
-                frame = self.explosion_frames[explosion['frame']]
-                
-                if explosion['size'] == 'small':
-                    frame = pygame.transform.scale(frame, (30, 30))
-                elif explosion['size'] == 'large':
-                    frame = pygame.transform.scale(frame, (80, 80))
-                
-                frame_rect = frame.get_rect(center=(explosion['x'], explosion['y']))
-                self.screen.blit(frame, frame_rect)
-
         # Score with glow effect to make it look nicer cause basic sucked
-        score_text = self.font.render(f"Score: {self.score}", True, WHITE)
-        score_shadow = self.font.render(f"Score: {self.score}", True, (100, 100, 100))
-        self.screen.blit(score_shadow, (SCREEN_WIDTH - 198, 12))
-        self.screen.blit(score_text, (SCREEN_WIDTH - 200, 10))
+        rects.append(text.draw_counter(self.screen, (SCREEN_WIDTH - 198, 12), "Score: ",
+                                       sim.score, HUD_SIZE, HUD_SHADOW))
+        rects.append(text.draw_counter(self.screen, (SCREEN_WIDTH - 200, 10), "Score: ",
+                                       sim.score, HUD_SIZE, WHITE))
         
         # Level with glow
-        level_text = self.font.render(f"Level: {self.level}", True, WHITE)
-        level_shadow = self.font.render(f"Level: {self.level}", True, (100, 100, 100))
-        self.screen.blit(level_shadow, (SCREEN_WIDTH - 198, 52))
-        self.screen.blit(level_text, (SCREEN_WIDTH - 200, 50))
+        rects.append(text.draw_counter(self.screen, (SCREEN_WIDTH - 198, 52), "Level: ",
+                                       sim.level, HUD_SIZE, HUD_SHADOW))
+        rects.append(text.draw_counter(self.screen, (SCREEN_WIDTH - 200, 50), "Level: ",
+                                       sim.level, HUD_SIZE, WHITE))
         
         # Draw active powerups
-        self.powerup_manager.draw_active_effects(self.screen)
+        rects.extend(sim.powerup_manager.draw_active_effects(self.screen))
         
         # Draw game over screen
-        if self.game_over:
+        if sim.game_over:
             # Darken screen
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            overlay.set_alpha(128)
-            overlay.fill(BLACK)
-            self.screen.blit(overlay, (0, 0))
+            self.screen.blit(self.dim_overlay(128), (0, 0))
             
             # Game over text with glow
-            game_over_text = self.big_font.render("GAME OVER", True, RED)
-            text_rect = game_over_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 50))
-            
-            # Draw glow
             for i in range(3):
-                glow = self.big_font.render("GAME OVER", True, (100, 0, 0))
-                glow_rect = glow.get_rect(center=(SCREEN_WIDTH//2 + i, SCREEN_HEIGHT//2 - 50 + i))
-                self.screen.blit(glow, glow_rect)
-            
-            self.screen.blit(game_over_text, text_rect)
-            
-            restart_text = self.small_font.render("Press R to restart or ESC to quit", True, WHITE)
-            text_rect = restart_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 20))
-            self.screen.blit(restart_text, text_rect)
+                text.draw(self.screen, "GAME OVER", TITLE_SIZE, (100, 0, 0),
+                          center=(SCREEN_WIDTH//2 + i, SCREEN_HEIGHT//2 - 50 + i))
+            text.draw(self.screen, "GAME OVER", TITLE_SIZE, RED,
+                      center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 50))
             
-            final_score = self.font.render(f"Final Score: {self.score}", True, YELLOW)
-            text_rect = final_score.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 60))
-            self.screen.blit(final_score, text_rect)
-            
-            high_level = self.font.render(f"Reached Level: {self.level}", True, CYAN)
-            text_rect = high_level.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 100))
-            self.screen.blit(high_level, text_rect)
+            text.draw(self.screen, "Press R to restart or ESC to quit", SMALL_SIZE, WHITE,
+                      center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 20))
+            text.draw(self.screen, f"Final Score: {sim.score}", HUD_SIZE, YELLOW,
+                      center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 60))
+            text.draw(self.screen, f"Reached Level: {sim.level}", HUD_SIZE, CYAN,
+                      center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 100))
         
         # Draw pause screen
-        if self.paused and not self.game_over:
+        if self.paused and not sim.game_over:
             # Darken screen
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            overlay.set_alpha(64)
-            overlay.fill(BLACK)
-            self.screen.blit(overlay, (0, 0))
+            self.screen.blit(self.dim_overlay(64), (0, 0))
             
-            pause_text = self.big_font.render("PAUSED", True, YELLOW)
-            text_rect = pause_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
-            self.screen.blit(pause_text, text_rect)
-            
-            continue_text = self.small_font.render("Press P to continue", True, WHITE)
-            text_rect = continue_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 50))
-            self.screen.blit(continue_text, text_rect)
+            text.draw(self.screen, "PAUSED", TITLE_SIZE, YELLOW,
+                      center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
+            text.draw(self.screen, "Press P to continue", SMALL_SIZE, WHITE,
+                      center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 50))
         
-        pygame.display.flip()
+        return rects
+    
+    def dim_overlay(self, alpha):
+        overlay = self.dim_overlays.get(alpha)
+        if overlay is None:
+            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+            overlay.set_alpha(alpha)
+            overlay.fill(BLACK)
+            self.dim_overlays[alpha] = overlay
+        return overlay
     
     def run(self):
+        if self.pipelined:
+            self.run_pipelined()
+        else:
+            self.run_serial()
+        
+        if self.trace_path:
+            self.profiler.dump_trace(self.trace_path)
+        if self.recorder:
+            self.recorder.save(self.record_path, self.sim)
+        pygame.quit()
+    
+    def run_serial(self):
+        # Fixed timestep: the simulation always moves in TICK_MS steps no
+        # matter how long a frame took to draw. speed scales game time
+        # against the wall clock, for watching replays fast.
         running = True
+        max_steps = max(1, math.ceil(MAX_CATCH_UP * self.speed))
+        lag = 0
+        previous = pygame.time.get_ticks()
         while running:
-            running = self.handle_events()
-            self.update()
+            self.profiler.begin_frame()
+            with self.profiler.section('events'):
+                running = self.handle_events()
+            
+            now = pygame.time.get_ticks()
+            lag += (now - previous) * self.speed
+            previous = now
+            steps = 0
+            while lag >= TICK_MS and steps < max_steps:
+                self.update()
+                lag -= TICK_MS
+                steps += 1
+            if steps == max_steps:
+                lag = 0
+                
             self.draw()
+            self.profiler.end_frame()
             self.clock.tick(FPS)
-        
-        pygame.quit()
\ No newline at end of file
+    
+    def run_pipelined(self):
+        # Same fixed timestep, kept by the simulation thread. This loop only
+        # reads input and draws whatever the simulation published last,
+        # blended towards the tick before by how much of a tick is left.
+        interval = TICK_MS / 1000 / self.speed
+        max_steps = max(1, math.ceil(MAX_CATCH_UP * self.speed))
+        thread = SimulationThread(self.sim, self.update, self.snapshots, interval, max_steps)
+        thread.start()
+        running = True
+        try:
+            while running and thread.is_alive():
+                self.profiler.begin_frame()
+                with self.profiler.section('events'):
+                    running = self.handle_events()
+                    if isinstance(self.input, LatchedInput):
+                        self.input.sample()
+                
+                previous, current = self.snapshots.latest()
+                if current is not None:
+                    alpha = (time.perf_counter() - current.time) / interval
+                    self.view = current.interpolate(previous, min(1.0, alpha))
+                    self.draw()
+                self.profiler.end_frame()
+                self.clock.tick(FPS)
+        finally:
+            thread.stop()
+            self.view = None
+        if thread.error is not None:
+            raise thread.error
@@ -1,12 +1,186 @@
-import pygame
+import os
 import sys
-from game import Game
+import time
+import random
+import argparse
+
+from constants import *
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Space Invaders Ultimate")
+    parser.add_argument('--headless', action='store_true',
+                        help="run the simulation with no window, as fast as possible")
+    parser.add_argument('--ticks', type=int, default=3600,
+                        help="ticks to simulate in headless mode (default 3600, one minute of play)")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="seed for the game's random numbers")
+    parser.add_argument('--profile', action='store_true',
+                        help="start with the frame timing overlay open (F3 toggles it)")
+    parser.add_argument('--trace', metavar='FILE', default=None,
+                        help="record per-frame timings and write them to FILE (.csv or .json)")
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help="only redraw the parts of the screen that changed")
+    parser.add_argument('--record', metavar='FILE', default=None,
+                        help="record the seed and every tick's input to FILE")
+    parser.add_argument('--replay', metavar='FILE', default=None,
+                        help="play back a recording (as fast as possible with --headless)")
+    parser.add_argument('--stars', type=int, default=None,
+                        help="number of background stars across all parallax layers")
+    parser.add_argument('--pipelined', action='store_true',
+                        help="tick the simulation on its own thread and draw blended snapshots")
+    parser.add_argument('--bot', choices=('walker', 'dodger', 'aimer'), default=None,
+                        help="let a scripted player play instead of the keyboard (or the sweep "
+                             "when headless)")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="game speed for a windowed replay, 4 plays four times as fast")
+    return parser.parse_args(argv)
+
+def run_headless(ticks, seed, trace_path=None, record_path=None, bot=None):
+    from simulation import Simulation
+    from controls import SweepInput
+    from bots import make_bot
+    from profiler import FrameProfiler
+    from replay import ReplayRecorder
+
+    profiler = None
+    if trace_path:
+        profiler = FrameProfiler()
+        profiler.start_trace()
+
+    source = make_bot(bot, seed) if bot else SweepInput()
+    recorder = None
+    if record_path:
+        source = recorder = ReplayRecorder(seed, source)
+    sim = Simulation(seed, input_source=source, profiler=profiler)
+    start = time.perf_counter()
+    sim.run(ticks)
+    elapsed = time.perf_counter() - start
+    if profiler:
+        profiler.dump_trace(trace_path)
+    if recorder:
+        recorder.save(record_path, sim)
+
+    rate = sim.tick / elapsed if elapsed > 0 else float('inf')
+    print(f"seed={seed} ticks={sim.tick} score={sim.score} level={sim.level} "
+          f"game_over={sim.game_over} time={elapsed:.3f}s ticks_per_sec={rate:.0f}")
+    return sim
+
+def run_replay(replay, trace_path=None):
+    from replay import play
+    from profiler import FrameProfiler
+
+    profiler = None
+    if trace_path:
+        profiler = FrameProfiler()
+        profiler.start_trace()
+
+    start = time.perf_counter()
+    sim = play(replay, profiler)
+    elapsed = time.perf_counter() - start
+    if profiler:
+        profiler.dump_trace(trace_path)
+
+    report_replay(replay, sim)
+    rate = sim.tick / elapsed if elapsed > 0 else float('inf')
+    print(f"time={elapsed:.3f}s ticks_per_sec={rate:.0f}")
+    return sim
+
+def report_replay(replay, sim):
+    result = "matches" if replay.matches(sim) else "DIFFERS from"
+    print(f"replay seed={replay.seed} ticks={sim.tick} score={sim.score} level={sim.level} "
+          f"{result} the recording (ticks={replay.ticks} score={replay.score} "
+          f"level={replay.level})")
+
+def pkg_resources_optional():
+    # Whether pygame can be imported with pkg_resources hidden, checked from
+    # its files without importing it. This leans on a pygame 2 detail that
+    # isn't documented: pygame.pkgdata, imported along with pygame, tries
+    # pkg_resources under `except ImportError` and only needs it to find
+    # the bundled default font, which it otherwise opens from next to
+    # pygame's own files. A pygame that changes either (or a frozen build
+    # with no pkgdata.py to read) just imports normally.
+    import importlib.util
+    spec = importlib.util.find_spec('pygame')
+    if spec is None or not spec.origin:
+        return False
+    where = os.path.dirname(spec.origin)
+    try:
+        with open(os.path.join(where, 'pkgdata.py')) as f:
+            guarded = 'except ImportError' in f.read()
+    except OSError:
+        return False
+    return guarded and os.path.exists(os.path.join(where, 'freesansbold.ttf'))
+
+def import_pygame():
+    # Importing pkg_resources is the slowest part of importing pygame (about
+    # 125ms of 285ms here), so where pygame can do without it, hide it while
+    # pygame imports, then take the block back out so anything imported
+    # later still gets pkg_resources.
+    if 'pkg_resources' in sys.modules or not pkg_resources_optional():
+        import pygame
+        return
+    sys.modules['pkg_resources'] = None
+    try:
+        import pygame
+    finally:
+        if sys.modules.get('pkg_resources', 0) is None:
+            del sys.modules['pkg_resources']
+
+def init_pygame():
+    # Only what the game uses: the display, which brings the event queue
+    # with it, and fonts. pygame.init() would also open the audio device
+    # and the joysticks, neither of which the game touches.
+    import pygame
+    pygame.display.init()
+    pygame.font.init()
+
+def show_splash():
+    # Get a window up with something in it before the game imports the
+    # rest of its modules and builds its sprites. Game reuses the window.
+    import pygame
+    from text_cache import text_cache
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption(CAPTION)
+    screen.fill(BLACK)
+    text_cache.draw(screen, "SPACE INVADERS", TITLE_SIZE, CYAN,
+                    center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 20))
+    text_cache.draw(screen, "Loading...", SMALL_SIZE, WHITE,
+                    center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 40))
+    pygame.display.flip()
 
 def main():
-    pygame.init()
-    game = Game()
+    args = parse_args()
+    import_pygame()
+    replay = None
+    if args.replay:
+        from replay import Replay
+        replay = Replay.load(args.replay)
+    elif args.record and args.seed is None:
+        # A recording is only reproducible with a known seed
+        args.seed = random.randrange(2**32)
+
+    if args.headless:
+        if replay:
+            sim = run_replay(replay, args.trace)
+            sys.exit(0 if replay.matches(sim) else 1)
+        run_headless(args.ticks, args.seed, args.trace, args.record, args.bot)
+        return
+
+    init_pygame()
+    show_splash()
+    from game import Game
+    input_source = None
+    if args.bot:
+        from bots import make_bot
+        input_source = make_bot(args.bot, args.seed)
+    game = Game(seed=args.seed, input_source=input_source, profile=args.profile,
+                trace_path=args.trace, dirty_rects=args.dirty_rects, record_path=args.record,
+                replay=replay, speed=args.speed, pipelined=args.pipelined,
+                **({'star_density': args.stars} if args.stars is not None else {}))
     game.run()
+    if replay:
+        report_replay(replay, game.sim)
     sys.exit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
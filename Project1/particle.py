@@ -1,49 +1,135 @@
 import pygame
-import random
-import math
-
-class Particle:
-    def __init__(self, x, y, color, size=3, speed=2, lifetime=30):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.size = size
-        self.lifetime = lifetime
-        self.max_lifetime = lifetime
-        angle = random.uniform(0, 2 * math.pi)
-        self.vx = math.cos(angle) * speed * random.uniform(0.5, 1.5)
-        self.vy = math.sin(angle) * speed * random.uniform(0.5, 1.5)
-        
-    def update(self):
-        self.x += self.vx
-        self.y += self.vy
-        self.vx *= 0.98
-        self.vy *= 0.98
-        self.lifetime -= 1
-        return self.lifetime > 0
-        
-    def draw(self, screen):
-        alpha = self.lifetime / self.max_lifetime
-        size = int(self.size * alpha)
-        if size > 0:
-            pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), size)
+import numpy as np
+
+# Particles live in fixed-size arrays instead of one object each. New
+# particles are written at a ring cursor, so once the store is full the
+# oldest ones get overwritten rather than the list growing without bound
+# (a mega bomb on a full wave can throw thousands at once).
+
+DAMPING = 0.98
+
 
 class ParticleSystem:
-    def __init__(self):
-        self.particles = []
-        
+    def __init__(self, capacity=8192, seed=None):
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+        self.cursor = 0
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.vx = np.zeros(capacity, dtype=np.float64)
+        self.vy = np.zeros(capacity, dtype=np.float64)
+        self.size = np.zeros(capacity, dtype=np.int32)
+        self.lifetime = np.zeros(capacity, dtype=np.int32)
+        self.max_lifetime = np.ones(capacity, dtype=np.int32)
+        self.color = np.zeros(capacity, dtype=np.int32)  # packed 0xRRGGBB
+        self.dots = {}
+
+    def slots(self, count):
+        # Next `count` ring positions, overwriting the oldest if we wrap
+        count = min(count, self.capacity)
+        idx = (self.cursor + np.arange(count)) % self.capacity
+        self.cursor = (self.cursor + count) % self.capacity
+        return idx
+
+    def emit(self, x, y, color, count, size, speed, lifetime):
+        idx = self.slots(count)
+        count = len(idx)
+        rng = self.rng
+        angle = rng.uniform(0, 2 * np.pi, count)
+        self.x[idx] = x
+        self.y[idx] = y
+        self.vx[idx] = np.cos(angle) * speed * rng.uniform(0.5, 1.5, count)
+        self.vy[idx] = np.sin(angle) * speed * rng.uniform(0.5, 1.5, count)
+        self.size[idx] = size
+        self.lifetime[idx] = lifetime
+        self.max_lifetime[idx] = lifetime
+        self.color[idx] = (color[0] << 16) | (color[1] << 8) | color[2]
+
     def add_explosion(self, x, y, color, count=20):
-        for _ in range(count):
-            self.particles.append(Particle(x, y, color, 
-                                          size=random.randint(2, 5),
-                                          speed=random.uniform(1, 4)))
-    
+        self.emit(x, y, color, count,
+                  size=self.rng.integers(2, 6, count),
+                  speed=self.rng.uniform(1, 4, count),
+                  lifetime=30)
+
     def add_trail(self, x, y, color):
-        self.particles.append(Particle(x, y, color, size=2, speed=0.5, lifetime=15))
-        
+        self.emit(x, y, color, 1, size=2, speed=0.5, lifetime=15)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.lifetime > 0))
+
+    def clear(self):
+        self.lifetime[:] = 0
+
     def update(self):
-        self.particles = [p for p in self.particles if p.update()]
-        
+        live = self.lifetime > 0
+        if not live.any():
+            return
+        # Dead slots keep drifting too, it is cheaper than masking and they
+        # are never drawn
+        self.x += self.vx
+        self.y += self.vy
+        self.vx *= DAMPING
+        self.vy *= DAMPING
+        self.lifetime[live] -= 1
+
+    def snapshot(self):
+        # Just the live particles, packed, for drawing while this system
+        # keeps moving. Shares the dot cache, which only drawing touches.
+        idx = np.flatnonzero(self.lifetime > 0)
+        system = ParticleSystem.__new__(ParticleSystem)
+        system.capacity = len(idx)
+        system.rng = None
+        system.cursor = 0
+        for name in ('x', 'y', 'vx', 'vy', 'size', 'lifetime', 'max_lifetime', 'color'):
+            setattr(system, name, getattr(self, name)[idx])
+        system.dots = self.dots
+        return system
+
+    def get_dot(self, packed, radius):
+        key = (packed, radius)
+        dot = self.dots.get(key)
+        if dot is None:
+            color = ((packed >> 16) & 255, (packed >> 8) & 255, packed & 255)
+            colorkey = (0, 0, 0) if color != (0, 0, 0) else (255, 0, 255)
+            dot = pygame.Surface((radius * 2, radius * 2))
+            dot.fill(colorkey)
+            dot.set_colorkey(colorkey)
+            pygame.draw.circle(dot, color, (radius, radius), radius)
+            self.dots[key] = dot
+        return dot
+
+    def boxes(self):
+        # Bounding boxes of live particles as (left, top, right, bottom)
+        idx = np.flatnonzero(self.lifetime > 0)
+        x = self.x[idx].astype(np.int64)
+        y = self.y[idx].astype(np.int64)
+        r = self.size[idx]
+        return x - r, y - r, x + r, y + r
+
     def draw(self, screen):
-        for particle in self.particles:
-            particle.draw(screen)
\ No newline at end of file
+        idx = np.flatnonzero(self.lifetime > 0)
+        if not len(idx):
+            return
+        # Shrink with remaining life, same as the old per-particle draw
+        radius = (self.size[idx] * (self.lifetime[idx] / self.max_lifetime[idx])).astype(np.int32)
+        visible = radius > 0
+        idx = idx[visible]
+        radius = radius[visible]
+        if not len(idx):
+            return
+
+        # One blits() call per (colour, radius) bucket with a prerendered dot
+        key = self.color[idx].astype(np.int64) * 64 + radius
+        order = np.argsort(key, kind='stable')
+        key = key[order]
+        left = (self.x[idx].astype(np.int32) - radius)[order]
+        top = (self.y[idx].astype(np.int32) - radius)[order]
+        bounds = np.flatnonzero(np.diff(key)) + 1
+        starts = [0] + bounds.tolist()
+        ends = bounds.tolist() + [len(key)]
+        for start, end in zip(starts, ends):
+            k = int(key[start])
+            dot = self.get_dot(k // 64, k % 64)
+            screen.blits([(dot, pos) for pos in zip(left[start:end].tolist(),
+                                                    top[start:end].tolist())],
+                         doreturn=False)
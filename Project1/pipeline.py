@@ -0,0 +1,114 @@
+import time
+import threading
+
+# Pipelined mode: the simulation ticks on its own thread at a fixed rate
+# and after every tick publishes a Snapshot, a detached copy of everything
+# the renderer draws. The main thread keeps all the pygame work, drawing
+# the latest pair of snapshots blended by how far it is between them. A
+# slow frame then only delays drawing, never the ticks, and the two
+# overlap wherever the C side (blits, flips, numpy) lets go of the GIL.
+#
+# Snapshots are never changed once published. The buffer only ever holds
+# the newest two, swapping references under a lock.
+
+
+class Snapshot:
+    # Same attribute names Game.draw reads off a Simulation, so drawing
+    # does not care which one it gets
+    __slots__ = ('tick', 'time', 'score', 'level', 'game_over', 'player', 'enemy_wave',
+                 'player_bullets', 'enemy_bullets', 'powerup_manager', 'particle_system',
+                 'explosions')
+
+    @classmethod
+    def capture(cls, sim):
+        snapshot = cls()
+        snapshot.tick = sim.tick
+        snapshot.time = time.perf_counter()
+        snapshot.score = sim.score
+        snapshot.level = sim.level
+        snapshot.game_over = sim.game_over
+        snapshot.player = sim.player.snapshot()
+        snapshot.enemy_wave = sim.enemy_wave.snapshot()
+        snapshot.player_bullets = sim.player_bullets.snapshot()
+        snapshot.enemy_bullets = sim.enemy_bullets.snapshot()
+        snapshot.powerup_manager = sim.powerup_manager.snapshot()
+        snapshot.particle_system = sim.particle_system.snapshot()
+        snapshot.explosions = sim.explosions.snapshot()
+        return snapshot
+
+    def interpolate(self, previous, alpha):
+        # This snapshot moved back towards `previous`, alpha 1 being this
+        # one. Player, enemies and bullets blend; effects and the HUD snap.
+        if previous is None or alpha >= 1:
+            return self
+        blended = Snapshot()
+        for name in Snapshot.__slots__:
+            setattr(blended, name, getattr(self, name))
+        blended.player = self.player.interpolate(previous.player, alpha)
+        blended.enemy_wave = self.enemy_wave.interpolate(previous.enemy_wave, alpha)
+        blended.player_bullets = self.player_bullets.interpolate(previous.player_bullets, alpha)
+        blended.enemy_bullets = self.enemy_bullets.interpolate(previous.enemy_bullets, alpha)
+        return blended
+
+
+class SnapshotBuffer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.previous = None
+        self.current = None
+
+    def publish(self, snapshot):
+        with self.lock:
+            self.previous, self.current = self.current, snapshot
+
+    def latest(self):
+        # (previous, current), either may be None before the first ticks
+        with self.lock:
+            return self.previous, self.current
+
+    def clear(self):
+        with self.lock:
+            self.previous = self.current = None
+
+
+class SimulationThread(threading.Thread):
+    # Calls step() every `interval` seconds and publishes a snapshot of sim
+    # whenever its tick moves. After a stall it catches up at most
+    # max_steps ticks and drops the rest, like the single-threaded loop.
+    def __init__(self, sim, step, buffer, interval, max_steps):
+        super().__init__(name='simulation', daemon=True)
+        self.sim = sim
+        self.step = step
+        self.buffer = buffer
+        self.interval = interval
+        self.max_steps = max_steps
+        self.stopping = threading.Event()
+        self.error = None
+
+    def run(self):
+        try:
+            self.loop()
+        except BaseException as error:
+            # Handed to the main thread, which raises it
+            self.error = error
+
+    def loop(self):
+        sim = self.sim
+        self.buffer.publish(Snapshot.capture(sim))
+        next_tick = time.perf_counter()
+        while not self.stopping.is_set():
+            steps = 0
+            while time.perf_counter() >= next_tick and steps < self.max_steps:
+                tick = sim.tick
+                self.step()
+                if sim.tick != tick or sim.game_over:
+                    self.buffer.publish(Snapshot.capture(sim))
+                next_tick += self.interval
+                steps += 1
+            if steps == self.max_steps and time.perf_counter() >= next_tick:
+                next_tick = time.perf_counter()
+            self.stopping.wait(max(0.0, next_tick - time.perf_counter()))
+
+    def stop(self):
+        self.stopping.set()
+        self.join()
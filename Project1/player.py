@@ -1,21 +1,24 @@
 import pygame
 import math
+import copy
 from constants import *
-from bullet import Bullet
+from effects import Effect, TimerQueue
 
 class Player:
-    def __init__(self, asset_manager=None):
+    def __init__(self, asset_manager=None, timers=None):
         self.x = SCREEN_WIDTH // 2
         self.y = SCREEN_HEIGHT - 50
         self.rect = pygame.Rect(self.x - PLAYER_SIZE[0]//2, 
                                self.y - PLAYER_SIZE[1]//2,
                                PLAYER_SIZE[0], PLAYER_SIZE[1])
         self.speed = PLAYER_SPEED
+        self.moved = 0  # pixels the rect moved across on the last update
         self.last_shot = 0
         self.shot_cooldown = 250
         self.lives = 3
         self.invulnerable = False
         self.invulnerable_end = 0
+        self.timers = timers if timers is not None else TimerQueue()
         self.shield_active = False
         self.ghost_active = False
         self.asset_manager = asset_manager
@@ -26,85 +29,108 @@ class Player:
             self.sprite = asset_manager.get_sprite('player')
             self.shield_sprite = asset_manager.get_sprite('shield')
         
-    def update(self, keys, current_time, powerup_manager):
+    def update(self, controls, current_time, powerup_manager):
+        # Every powerup check below reads this one mask
+        active = powerup_manager.active
+        
         # Update speed based on powerups
         speed = self.speed
-        if powerup_manager.is_active('SPEED_BOOST'):
+        if active & Effect.SPEED_BOOST:
             speed *= 1.5
             
-        # Update invulnerability
-        if self.invulnerable and current_time > self.invulnerable_end:
-            self.invulnerable = False
+        # Invulnerability ends off the timer queue
+        self.timers.run(current_time)
             
         # Update shield status
-        self.shield_active = powerup_manager.is_active('SHIELD')
-        self.ghost_active = powerup_manager.is_active('GHOST')
+        self.shield_active = bool(active & Effect.SHIELD)
+        self.ghost_active = bool(active & Effect.GHOST)
         
         # Update shot cooldown based on powerups
-        if powerup_manager.is_active('RAPID_FIRE'):
+        if active & Effect.RAPID_FIRE:
             self.shot_cooldown = 100
         else:
             self.shot_cooldown = 250
             
         # Movement
-        if keys[pygame.K_LEFT] and self.rect.left > 0:
+        before = self.rect.left
+        if controls.left and self.rect.left > 0:
             self.x -= speed
-        if keys[pygame.K_RIGHT] and self.rect.right < SCREEN_WIDTH:
+        if controls.right and self.rect.right < SCREEN_WIDTH:
             self.x += speed
             
         self.rect.centerx = self.x
+        self.moved = self.rect.left - before
         
-    def shoot(self, current_time, powerup_manager, enemies):
+    def shoot(self, current_time, powerup_manager, nearest, bullets):
+        # Fires into the player's BulletPool and returns how many went out.
+        # nearest(x, y) finds the enemy homing shots lock onto, or None.
         if current_time - self.last_shot < self.shot_cooldown:
-            return []
+            return 0
             
         self.last_shot = current_time
-        bullets = []
         
         # Determine bullet properties based on powerups
+        active = powerup_manager.active
         color = WHITE
         bullet_type = 'normal'
-        piercing = powerup_manager.is_active('PIERCING')
+        piercing = bool(active & Effect.PIERCING)
+        
+        # Homing only counts with something to home in on
+        target = None
+        if active & Effect.HOMING and not active & (Effect.LASER | Effect.EXPLOSIVE):
+            target = nearest(self.rect.centerx, self.rect.top)
         
-        if powerup_manager.is_active('LASER'):
+        if active & Effect.LASER:
             bullet_type = 'laser'
             color = RED
-        elif powerup_manager.is_active('EXPLOSIVE'):
+        elif active & Effect.EXPLOSIVE:
             bullet_type = 'explosive'
             color = ORANGE
-        elif powerup_manager.is_active('HOMING') and enemies:
+        elif target is not None:
             bullet_type = 'homing'
             color = PURPLE
-        elif powerup_manager.is_active('CHAIN_LIGHTNING'):
+        elif active & Effect.CHAIN_LIGHTNING:
             bullet_type = 'lightning'
             color = YELLOW
             
         # Create bullets based on active powerups
-        if powerup_manager.is_active('TRIPLE_SHOT'):
+        if active & Effect.TRIPLE_SHOT:
             for offset in [-15, 0, 15]:
-                bullet = Bullet(self.rect.centerx + offset, self.rect.top, 
+                bullets.spawn(self.rect.centerx + offset, self.rect.top, 
                               color=color, bullet_type=bullet_type, 
-                              piercing=piercing, asset_manager=self.asset_manager)
-                bullets.append(bullet)
-        elif powerup_manager.is_active('SPREAD_SHOT'):
+                              piercing=piercing)
+            return 3
+        elif active & Effect.SPREAD_SHOT:
             for angle in [-30, -15, 0, 15, 30]:
-                bullet = Bullet(self.rect.centerx, self.rect.top, 
-                              color=color, bullet_type=bullet_type, 
-                              piercing=piercing, asset_manager=self.asset_manager)
+                bullet = bullets.spawn(self.rect.centerx, self.rect.top, 
+                                       color=color, bullet_type=bullet_type, 
+                                       piercing=piercing)
                 rad = math.radians(angle)
-                bullet.vx = math.sin(rad) * BULLET_SPEED
-                bullet.vy = -math.cos(rad) * BULLET_SPEED
-                bullets.append(bullet)
+                bullets.set_velocity(bullet, math.sin(rad) * BULLET_SPEED,
+                                     -math.cos(rad) * BULLET_SPEED)
+            return 5
         else:
-            # Single shot
-            target = enemies[0] if bullet_type == 'homing' and enemies else None
-            bullet = Bullet(self.rect.centerx, self.rect.top, 
+            # Single shot, homing ones lock onto the closest enemy
+            bullets.spawn(self.rect.centerx, self.rect.top, 
                           color=color, bullet_type=bullet_type, 
-                          target=target, piercing=piercing, 
-                          asset_manager=self.asset_manager)
-            bullets.append(bullet)
-                                
-        return bullets
+                          target=target, piercing=piercing)
+            return 1
+        
+    def snapshot(self):
+        # Copy for drawing while this player keeps moving
+        player = copy.copy(self)
+        player.rect = self.rect.copy()
+        player.timers = None
+        return player
+        
+    def interpolate(self, previous, alpha):
+        if previous is None or alpha >= 1:
+            return self
+        player = copy.copy(self)
+        player.x = previous.x + (self.x - previous.x) * alpha
+        player.rect = self.rect.copy()
+        player.rect.centerx = player.x
+        return player
         
     def take_damage(self, current_time):
         if self.shield_active:
@@ -117,8 +143,12 @@ class Player:
         self.lives -= 1
         self.invulnerable = True
         self.invulnerable_end = current_time + 2000  # 2 seconds of invulnerability could maybe do 4
+        self.timers.schedule('invulnerable', self.invulnerable_end + 1, self.end_invulnerability)
         return self.lives <= 0
         
+    def end_invulnerability(self, key, now):
+        self.invulnerable = False
+        
     def draw(self, screen):
         # Flash if invulnerable
         if self.invulnerable and pygame.time.get_ticks() % 200 < 100:
@@ -130,11 +160,9 @@ class Player:
             sprite_rect = self.sprite.get_rect(center=self.rect.center)
             if self.ghost_active:
                 # Ghost effect - semi-transparent
-                ghost_surface = self.sprite.copy()
-                ghost_surface.set_alpha(128)
-                screen.blit(ghost_surface, sprite_rect)
+                screen.blit(self.asset_manager.get_variant('player', alpha=128), sprite_rect)
             else:
-                screen.blit(self.sprite, sprite_rect)
+                screen.blit(self.asset_manager.get_variant('player'), sprite_rect)
         else:
             # Fallback to polygon drawing
             if self.ghost_active:
@@ -170,7 +198,7 @@ class Player:
             y = SCREEN_HEIGHT - 35
             if self.sprite:
                 # Draw mini version of ship sprite
-                mini_sprite = pygame.transform.scale(self.sprite, (25, 20))
+                mini_sprite = self.asset_manager.get_variant('player', size=(25, 20))
                 screen.blit(mini_sprite, (x, y))
             else:
                 # Fallback to polygon
@@ -1,19 +1,24 @@
 import pygame
 import random
 import math
+import copy
 from constants import *
+from text_cache import text_cache
+from entities import EntityRegistry, NO_ENTITY
+from effects import EFFECT_BITS, TimerQueue
 
 class Powerup:
-    def __init__(self, x, y):
+    def __init__(self, x, y, rng=random):
         self.x = x
         self.y = y
-        self.type = random.choice(list(POWERUP_TYPES.keys()))
+        self.type = rng.choice(list(POWERUP_TYPES.keys()))
         self.color = POWERUP_TYPES[self.type]['color']
         self.symbol = POWERUP_TYPES[self.type]['symbol']
         self.duration = POWERUP_TYPES[self.type]['duration']
         self.rect = pygame.Rect(x - POWERUP_SIZE[0]//2, y - POWERUP_SIZE[1]//2, 
                                POWERUP_SIZE[0], POWERUP_SIZE[1])
         self.pulse = 0
+        self.eid = NO_ENTITY
         
     def update(self):
         self.y += POWERUP_FALL_SPEED
@@ -38,67 +43,102 @@ class Powerup:
         pygame.draw.rect(screen, self.color, glow_rect, 1)
         
         # Draw symbol
-        font = pygame.font.Font(None, 20)
-        text = font.render(self.symbol, True, BLACK)
-        text_rect = text.get_rect(center=self.rect.center)
-        screen.blit(text, text_rect)
+        text_cache.draw(screen, self.symbol, 20, BLACK, center=self.rect.center)
 
 class PowerupManager:
-    def __init__(self):
-        self.powerups = []
+    def __init__(self, rng=None):
+        self.rng = rng or random
+        self.powerups = EntityRegistry()
+        # Effect name -> end time (-1 for instant ones) in the order they
+        # came on, for the HUD. Hot paths read `active` instead, a bitmask
+        # of Effect bits, and expiry comes off the timer heap.
         self.active_effects = {}
+        self.active = 0
+        self.timers = TimerQueue()
         self.last_spawn = 0
         self.spawn_interval = 5000 
         
     def update(self, current_time):
         # Spawn new powerups
         if current_time - self.last_spawn > self.spawn_interval:
-            if random.random() < 0.3:
+            if self.rng.random() < 0.3:
                 self.spawn_powerup()
                 self.last_spawn = current_time
                 
         # Update existing powerups
-        self.powerups = [p for p in self.powerups if p.update()]
+        for powerup in self.powerups:
+            if not powerup.update():
+                self.powerups.discard(powerup.eid)
         
-        # Update active effects
-        expired = []
-        for effect, end_time in self.active_effects.items():
-            if end_time > 0 and current_time > end_time:
-                expired.append(effect)
-        for effect in expired:
-            del self.active_effects[effect]
+        # Only effects whose time is up get touched
+        for effect in self.timers.run(current_time):
+            self.deactivate(effect)
             
     def spawn_powerup(self):
-        x = random.randint(POWERUP_SIZE[0], SCREEN_WIDTH - POWERUP_SIZE[0])
-        self.powerups.append(Powerup(x, -POWERUP_SIZE[1]))
+        x = self.rng.randint(POWERUP_SIZE[0], SCREEN_WIDTH - POWERUP_SIZE[0])
+        powerup = Powerup(x, -POWERUP_SIZE[1], self.rng)
+        powerup.eid = self.powerups.add(powerup)
         
     def check_collection(self, player_rect):
-        for powerup in self.powerups[:]:
+        for powerup in self.powerups:
             if powerup.rect.colliderect(player_rect):
-                self.powerups.remove(powerup)
+                self.powerups.discard(powerup.eid)
                 return powerup
         return None
         
-    def activate_powerup(self, powerup_type, current_time):
-        duration = POWERUP_TYPES[powerup_type]['duration']
+    def flush(self):
+        self.powerups.flush()
+        
+    def activate_powerup(self, powerup_type, current_time, duration=None):
+        # duration overrides the powerup's own, for tests and benchmarks
+        if duration is None:
+            duration = POWERUP_TYPES[powerup_type]['duration']
         if duration > 0:
-            self.active_effects[powerup_type] = current_time + duration
+            end_time = current_time + duration
+            self.active_effects[powerup_type] = end_time
+            # Effects last through their end time
+            self.timers.schedule(powerup_type, end_time + 1)
         else:
             # Instant effect powerups
             self.active_effects[powerup_type] = -1
+            self.timers.cancel(powerup_type)
+        self.active |= EFFECT_BITS[powerup_type]
+        
+    def deactivate(self, powerup_type):
+        self.active_effects.pop(powerup_type, None)
+        self.active &= ~EFFECT_BITS[powerup_type]
+        self.timers.cancel(powerup_type)
             
     def is_active(self, powerup_type):
-        return powerup_type in self.active_effects
+        return bool(self.active & EFFECT_BITS[powerup_type])
+        
+    def snapshot(self):
+        # Copy of what is on screen and what is active, for drawing while
+        # this manager keeps going
+        manager = PowerupManager.__new__(PowerupManager)
+        manager.rng = None
+        manager.timers = None
+        manager.active = self.active
+        manager.active_effects = dict(self.active_effects)
+        manager.last_spawn = self.last_spawn
+        manager.spawn_interval = self.spawn_interval
+        manager.powerups = []
+        for powerup in self.powerups:
+            powerup = copy.copy(powerup)
+            powerup.rect = powerup.rect.copy()
+            manager.powerups.append(powerup)
+        return manager
         
     def draw(self, screen):
         for powerup in self.powerups:
             powerup.draw(screen)
             
     def draw_active_effects(self, screen):
+        # Returns the rects drawn so the dirty-rect renderer can track them
         y = 10
-        font = pygame.font.Font(None, 24)
+        rects = []
         for effect in self.active_effects:
             color = POWERUP_TYPES[effect]['color']
-            text = font.render(f"{effect}: Active", True, color)
-            screen.blit(text, (10, y))
-            y += 25
\ No newline at end of file
+            rects.append(text_cache.draw(screen, f"{effect}: Active", 24, color, (10, y)))
+            y += 25
+        return rects
\ No newline at end of file
@@ -0,0 +1,186 @@
+import time
+from collections import deque
+import pygame
+
+# Per-frame timing for each phase of the game loop. Code wraps a phase in
+# `with profiler.section('name'):`; when the profiler is off that hands back
+# a do-nothing object so the cost is one method call and a no-op `with`.
+#
+# Section times are summed over the frame (the simulation can step more
+# than once per frame) and kept in rolling windows for p50/p95/p99. With a
+# trace started every frame is also kept so it can be dumped as CSV/JSON.
+
+GRAPH_BUDGET_MS = 1000 / 60
+
+
+class NullSection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SECTION = NullSection()
+
+
+class Section:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class FrameProfiler:
+    def __init__(self, window=240, enabled=False):
+        self.enabled = enabled
+        self.window = window
+        self.sections = {}
+        self.order = []
+        self.history = {}
+        self.current = {}
+        self.frame_start = None
+        self.frame_index = 0
+        self.trace = None
+        self.overlay_visible = False
+        self.font = None
+        self.panel = None
+        self.overlay_lines = []
+        self.overlay_refresh = 0
+        self.register('frame')
+
+    def register(self, name):
+        section = self.sections[name] = Section(self, name)
+        self.order.append(name)
+        self.history[name] = deque(maxlen=self.window)
+        return section
+
+    def section(self, name):
+        if not self.enabled:
+            return NULL_SECTION
+        section = self.sections.get(name)
+        if section is None:
+            section = self.register(name)
+        return section
+
+    def add(self, name, ms):
+        self.current[name] = self.current.get(name, 0.0) + ms
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.current = {}
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled or self.frame_start is None:
+            return
+        self.current['frame'] = (time.perf_counter() - self.frame_start) * 1000
+        for name in self.order:
+            self.history[name].append(self.current.get(name, 0.0))
+        if self.trace is not None:
+            row = dict(self.current)
+            row['index'] = self.frame_index
+            self.trace.append(row)
+        self.frame_index += 1
+        self.frame_start = None
+
+    def percentiles(self, name):
+        samples = sorted(self.history.get(name, ()))
+        if not samples:
+            return 0.0, 0.0, 0.0
+        last = len(samples) - 1
+        return tuple(samples[min(last, int(p * len(samples)))] for p in (0.50, 0.95, 0.99))
+
+    def summary(self):
+        return {name: dict(zip(('p50', 'p95', 'p99'), self.percentiles(name)))
+                for name in self.order}
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        if self.overlay_visible:
+            self.enabled = True
+        elif self.trace is None:
+            self.enabled = False
+
+    def start_trace(self):
+        self.enabled = True
+        self.trace = []
+
+    def dump_trace(self, path):
+        # CSV if the name ends in .csv, JSON otherwise
+        rows = self.trace or []
+        columns = ['index'] + [name for name in self.order]
+        if path.endswith('.csv'):
+            # Only needed here, and not worth loading on every start
+            import csv
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=columns, restval=0.0)
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            import json
+            with open(path, 'w') as f:
+                json.dump({'columns': columns, 'frames': rows,
+                           'summary': self.summary()}, f, indent=1)
+
+    def draw_overlay(self, screen):
+        # Returns the panel rect, or None when hidden
+        if not self.overlay_visible:
+            return None
+        if self.font is None:
+            self.font = pygame.font.Font(None, 18)
+
+        # Re-render the numbers a few times a second, not every frame
+        if self.overlay_refresh <= 0 or not self.overlay_lines:
+            self.overlay_refresh = 15
+            lines = ["section        p50    p95    p99 ms"]
+            for name in self.order:
+                p50, p95, p99 = self.percentiles(name)
+                lines.append(f"{name:<12}{p50:>7.2f}{p95:>7.2f}{p99:>7.2f}")
+            self.overlay_lines = [self.font.render(line, True, (255, 255, 255))
+                                  for line in lines]
+        self.overlay_refresh -= 1
+
+        width = 230
+        graph_height = 60
+        height = 8 + 14 * len(self.overlay_lines) + graph_height + 8
+        x = screen.get_width() - width - 10
+        y = screen.get_height() - height - 10
+        if self.panel is None or self.panel.get_height() != height:
+            self.panel = pygame.Surface((width, height))
+            self.panel.set_alpha(180)
+            self.panel.fill((0, 0, 0))
+        screen.blit(self.panel, (x, y))
+        for i, line in enumerate(self.overlay_lines):
+            screen.blit(line, (x + 6, y + 4 + 14 * i))
+
+        # Frame time graph, the yellow line is the 60 FPS budget
+        panel_rect = pygame.Rect(x, y, width, height)
+        frames = self.history.get('frame')
+        if not frames:
+            return panel_rect
+        top = y + height - graph_height - 4
+        bottom = top + graph_height
+        scale = graph_height / (GRAPH_BUDGET_MS * 2)
+        budget_y = bottom - GRAPH_BUDGET_MS * scale
+        pygame.draw.line(screen, (255, 255, 0), (x + 4, budget_y), (x + width - 4, budget_y))
+        step = (width - 8) / max(1, self.window - 1)
+        points = [(x + 4 + i * step, max(top, bottom - ms * scale))
+                  for i, ms in enumerate(frames)]
+        if len(points) > 1:
+            pygame.draw.lines(screen, (0, 255, 100), False, points)
+        return panel_rect
+
+
+NULL_PROFILER = FrameProfiler(enabled=False)
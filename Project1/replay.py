@@ -0,0 +1,193 @@
+import struct
+import zlib
+from controls import InputState
+
+# Recorded sessions. The simulation is deterministic given its seed and the
+# input it sees each tick, so a replay is just those two things: a header
+# with the seed (plus the final score/level/tick to check against) and one
+# input code per tick.
+#
+# Input hardly ever changes from one tick to the next, so the codes are
+# stored as runs: the number of ticks until the next change, then the new
+# code, both as varints. The result is zlib-compressed on top; a minute of
+# play is usually well under a kilobyte.
+
+MAGIC = b'SIRP'
+VERSION = 1
+HEADER = struct.Struct('<4sBqIqI')  # magic, version, seed, ticks, score, level
+
+# Bits of a per-tick input code
+LEFT = 1
+RIGHT = 2
+FIRE = 4
+FIRE_PRESSED = 8
+RESET = 16  # the game was restarted before this tick
+INPUT_MASK = LEFT | RIGHT | FIRE | FIRE_PRESSED
+
+# One shared InputState per code, the simulation only reads them
+INPUT_STATES = [InputState(bool(code & LEFT), bool(code & RIGHT),
+                           bool(code & FIRE), bool(code & FIRE_PRESSED))
+                for code in range(INPUT_MASK + 1)]
+
+
+class ReplayError(Exception):
+    pass
+
+
+def encode_state(state):
+    return ((LEFT if state.left else 0) | (RIGHT if state.right else 0) |
+            (FIRE if state.fire else 0) | (FIRE_PRESSED if state.fire_pressed else 0))
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayError("replay data ends in the middle of a number")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode_codes(codes):
+    out = bytearray()
+    previous = 0
+    run = 0
+    for code in codes:
+        if code == previous:
+            run += 1
+            continue
+        write_varint(out, run)
+        out.append(code)
+        previous = code
+        run = 1
+    write_varint(out, run)
+    return zlib.compress(bytes(out), 9)
+
+
+def decode_codes(data, ticks):
+    data = zlib.decompress(data)
+    codes = bytearray()
+    code = 0
+    pos = 0
+    while pos < len(data):
+        run, pos = read_varint(data, pos)
+        codes.extend(bytes([code]) * run)
+        if pos < len(data):
+            code = data[pos]
+            pos += 1
+    if len(codes) != ticks:
+        raise ReplayError(f"replay has {len(codes)} ticks of input, header says {ticks}")
+    return codes
+
+
+class Replay:
+    def __init__(self, seed, codes, score=0, level=1):
+        self.seed = seed
+        self.codes = codes
+        self.score = score
+        self.level = level
+
+    @property
+    def ticks(self):
+        return len(self.codes)
+
+    def save(self, path):
+        header = HEADER.pack(MAGIC, VERSION, self.seed, self.ticks, self.score, self.level)
+        with open(path, 'wb') as f:
+            f.write(header)
+            f.write(encode_codes(self.codes))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise ReplayError(f"{path} is too short to be a replay")
+        magic, version, seed, ticks, score, level = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ReplayError(f"{path} is not a replay file")
+        if version != VERSION:
+            raise ReplayError(f"{path} is replay version {version}, expected {VERSION}")
+        return cls(seed, decode_codes(data[HEADER.size:], ticks), score, level)
+
+    def matches(self, sim):
+        # Did a playback end exactly where the recording did?
+        return (sim.tick, sim.score, sim.level) == (self.ticks, self.score, self.level)
+
+
+class ReplayRecorder:
+    # Wraps another input source and notes what it hands the simulation
+    # each tick
+    def __init__(self, seed, source):
+        if seed is None:
+            raise ReplayError("recording needs a fixed seed")
+        self.seed = seed
+        self.source = source
+        self.codes = bytearray()
+        self.reset_next = False
+
+    def poll(self, world):
+        state = self.source.poll(world)
+        code = encode_state(state)
+        if self.reset_next:
+            code |= RESET
+            self.reset_next = False
+        self.codes.append(code)
+        return state
+
+    def mark_reset(self):
+        self.reset_next = True
+
+    def replay(self, sim):
+        return Replay(self.seed, bytes(self.codes), sim.score, sim.level)
+
+    def save(self, path, sim):
+        self.replay(sim).save(path)
+
+
+class ReplayInput:
+    # Feeds a recording back in, tick by tick
+    def __init__(self, replay):
+        self.replay = replay
+
+    def poll(self, world):
+        codes = self.replay.codes
+        if world.tick >= len(codes):
+            return INPUT_STATES[0]
+        return INPUT_STATES[codes[world.tick] & INPUT_MASK]
+
+    def wants_reset(self, tick):
+        codes = self.replay.codes
+        return tick < len(codes) and bool(codes[tick] & RESET)
+
+    def finished(self, tick):
+        return tick >= self.replay.ticks
+
+
+def play(replay, profiler=None):
+    # Run a replay headless as fast as it will go, returns the simulation
+    from simulation import Simulation
+
+    source = ReplayInput(replay)
+    sim = Simulation(replay.seed, input_source=source, profiler=profiler)
+    while not source.finished(sim.tick):
+        if sim.game_over:
+            if not source.wants_reset(sim.tick):
+                break
+            sim.reset()
+        sim.profiler.begin_frame()
+        sim.step()
+        sim.profiler.end_frame()
+    return sim
@@ -0,0 +1,316 @@
+import random
+from constants import *
+from player import Player
+from enemy import EnemyWave
+from bullet import BulletPool, LIGHTNING, EXPLOSIVE
+from powerup import PowerupManager
+from particle import ParticleSystem
+from assets import AssetManager
+from collision import SpatialHash
+from entities import EntityRegistry
+from explosion import ExplosionPool
+from controls import NullInput, WorldView
+from profiler import NULL_PROFILER
+from effects import Effect
+
+# The game rules with no window attached. Everything random comes from one
+# seeded Random, time comes from an injected clock and input from an input
+# source, so the same seed and inputs always play out the same way and it
+# can be stepped as fast as the CPU allows.
+
+TICK_MS = 1000 / FPS
+# Up to this many enemies a homing retarget scans the wave's arrays in one
+# go; past it the grid's ring search is the cheaper way to the nearest
+NEAREST_SCAN_MAX = 2048
+
+
+class FixedClock:
+    # Game time that only moves when the simulation steps
+    def __init__(self, step_ms=TICK_MS):
+        self.step_ms = step_ms
+        self.ticks = 0
+        
+    def advance(self):
+        self.ticks += 1
+        
+    def get_ticks(self):
+        return int(self.ticks * self.step_ms)
+
+
+class Simulation:
+    def __init__(self, seed=None, asset_manager=None, clock=None, input_source=None,
+                 profiler=None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.asset_manager = asset_manager or AssetManager()
+        self.clock = clock or FixedClock()
+        self.input_source = input_source or NullInput()
+        self.world = WorldView(self)
+        self.profiler = profiler or NULL_PROFILER
+        self.tick = 0
+        
+        # Broad phase for bullet/explosion hits and homing targets, rebuilt
+        # every tick once the enemies have moved
+        self.enemy_grid = SpatialHash()
+        
+        self.reset()
+        
+    def reset(self):
+        self.player = Player(self.asset_manager)
+        self.player_bullets = BulletPool(asset_manager=self.asset_manager)
+        self.enemy_bullets = BulletPool(asset_manager=self.asset_manager)
+        # One enemy registry for the whole game so ids stay unique across
+        # waves (a piercing bullet can outlive the wave it was fired at)
+        self.enemy_registry = EntityRegistry()
+        self.enemy_wave = EnemyWave(1, self.asset_manager, self.rng,
+                                    registry=self.enemy_registry)
+        self.powerup_manager = PowerupManager(self.rng)
+        self.particle_system = ParticleSystem(seed=self.rng.getrandbits(32))
+        self.score = 0
+        self.level = 1
+        self.game_over = False
+        self.score_multiplier = 1
+        self.explosions = ExplosionPool()
+        self.rebuild_enemy_grid()
+        
+    def rebuild_enemy_grid(self):
+        self.enemy_grid.rebuild(self.enemy_wave.live(), self.enemy_wave.boxes())
+        
+    def add_explosion(self, x, y, size='medium'):
+        self.explosions.spawn(x, y, size)
+        
+    def step(self, controls=None):
+        # Advance the world by one fixed tick
+        if self.game_over:
+            return
+        if controls is None:
+            controls = self.input_source.poll(self.world)
+            
+        current_time = self.clock.get_ticks()
+        prof = self.profiler
+        
+        with prof.section('player'):
+            self.update_player(controls, current_time)
+        
+        # Update score multiplier
+        self.score_multiplier = 2 if self.powerup_manager.active & Effect.DOUBLE_POINTS else 1
+        
+        with prof.section('enemies'):
+            self.update_enemies(current_time)
+            self.rebuild_enemy_grid()
+        with prof.section('bullets'):
+            self.retarget_homing()
+            self.player_bullets.update()
+            self.enemy_bullets.update()
+        with prof.section('powerups'):
+            self.powerup_manager.update(current_time)
+        with prof.section('particles'):
+            self.particle_system.update()
+        with prof.section('explosions'):
+            self.explosions.update()
+        with prof.section('collisions'):
+            self.check_collisions(current_time)
+            self.flush_removals()
+            self.check_wave_cleared()
+        
+        self.tick += 1
+        self.clock.advance()
+    
+    def update_player(self, controls, current_time):
+        # A fresh press fires straight away, same as the old KEYDOWN handler
+        if controls.fire_pressed:
+            self.player.shoot(current_time, self.powerup_manager, 
+                              self.nearest_enemy, self.player_bullets)
+        
+        # Update player
+        self.player.update(controls, current_time, self.powerup_manager)
+        
+        # Check for continuous shooting with space held was a little buggy at first
+        if controls.fire:
+            self.player.shoot(current_time, self.powerup_manager, 
+                              self.nearest_enemy, self.player_bullets)
+    
+    def update_enemies(self, current_time):
+        active = self.powerup_manager.active
+        slow_time = bool(active & Effect.SLOW_TIME)
+        self.enemy_wave.update(current_time, slow_time)
+        
+        # Enemy shooting
+        if not active & Effect.FREEZE:
+            # SLOW_TIME thins the fire, folded into the one fire roll
+            chance_scale = SLOW_TIME_FIRE_SCALE if slow_time else 1.0
+            for enemy in self.enemy_wave.get_shooters(chance_scale):
+                enemy.shoot(self.enemy_bullets)
+    
+    def nearest_enemy(self, x, y):
+        # The one lookup for everything homing, firing and retargeting alike,
+        # so both always agree on which enemy is nearest
+        wave = self.enemy_wave
+        if len(wave.enemies) <= NEAREST_SCAN_MAX:
+            return wave.nearest(x, y)
+        return self.enemy_grid.nearest(x, y)
+    
+    def retarget_homing(self):
+        # Homing bullets whose target died take the nearest live one
+        registry = self.enemy_registry
+        self.player_bullets.retarget(lambda enemy: registry.is_live(enemy.eid),
+                                     self.nearest_enemy)
+    
+    def check_collisions(self, current_time):
+        # Check for powerup collection
+        collected = self.powerup_manager.check_collection(self.player.rect)
+        if collected:
+            self.powerup_manager.activate_powerup(collected.type, current_time)
+            self.score += POWERUP_POINTS * self.score_multiplier
+            self.particle_system.add_explosion(collected.x, collected.y, collected.color, 10)
+            
+            # Handle special instant powerups
+            if collected.type == 'MEGA_BOMB':
+                self.mega_bomb()
+            elif collected.type == 'FREEZE':
+                self.enemy_wave.freeze_all(3000, current_time)
+        
+        # Check bullet-enemy collisions over each bullet's whole move, so a
+        # fast one can't jump an enemy, and in the order it reached them
+        bullets = self.player_bullets
+        candidates = []
+        if self.enemy_wave.enemies:
+            # Cheap reject for everything that never came near the formation
+            candidates = bullets.passing(*self.enemy_wave.bounds()).tolist()
+        # Velocities read one at a time rather than gathered into lists, so
+        # nothing but the slot list is built per candidate
+        vx = bullets.vx
+        vy = bullets.vy
+        for i in candidates:
+            for enemy in self.enemy_grid.query_sweep(bullets.get_rect(i),
+                                                     vx.item(i), vy.item(i)):
+                if enemy not in self.enemy_grid:
+                    continue  # Skip if already removed
+                    
+                if bullets.can_hit_enemy(i, enemy):
+                    # Handle chain lightning
+                    if bullets.type[i] == LIGHTNING:
+                        self.chain_lightning(enemy)
+                    
+                    # Handle explosive bullets
+                    if bullets.type[i] == EXPLOSIVE:
+                        self.explosion_damage(enemy.rect.center, 50, 2)
+                        self.add_explosion(enemy.rect.centerx, enemy.rect.centery, 'large')
+                    
+                    # Damage enemy
+                    if enemy.take_damage(int(bullets.damage[i])):
+                        if enemy in self.enemy_grid:
+                            self.remove_enemy(enemy)
+                            self.score += ENEMY_POINTS * self.score_multiplier
+                            self.add_explosion(enemy.rect.centerx, enemy.rect.centery)
+                            self.particle_system.add_explosion(enemy.rect.centerx, 
+                                                              enemy.rect.centery, 
+                                                              enemy.color, 15)
+                    
+                    bullets.mark_enemy_hit(i, enemy)
+                    if not bullets.piercing[i]:
+                        bullets.kill(i)
+                        break
+        
+        # Check enemy bullet-player collisions, over each bullet's whole move
+        # so nothing gets through between ticks
+        for i in self.enemy_bullets.sweep_rect(self.player.rect, self.player.moved).tolist():
+            if self.player.take_damage(current_time):
+                self.game_over = True
+                self.add_explosion(self.player.rect.centerx, 
+                                 self.player.rect.centery, 'large')
+                self.particle_system.add_explosion(self.player.rect.centerx,
+                                                  self.player.rect.centery,
+                                                  RED, 30)
+            else:
+                self.add_explosion(float(self.enemy_bullets.x[i]), float(self.enemy_bullets.y[i]), 'small')
+            self.enemy_bullets.kill(i)
+        
+        # Check enemy-player collisions
+        for enemy in self.enemy_wave.colliding(self.player.rect):
+            if self.player.take_damage(current_time):
+                self.game_over = True
+                self.add_explosion(self.player.rect.centerx, 
+                                 self.player.rect.centery, 'large')
+                self.particle_system.add_explosion(self.player.rect.centerx,
+                                                  self.player.rect.centery,
+                                                  RED, 30)
+    
+    def flush_removals(self):
+        # Everything killed this tick leaves its storage in one go
+        self.enemy_wave.flush()
+        self.player_bullets.flush()
+        self.enemy_bullets.flush()
+        self.powerup_manager.flush()
+        self.explosions.flush()
+    
+    def check_wave_cleared(self):
+        # Check if wave is cleared
+        if not self.enemy_wave.enemies:
+            self.level += 1
+            self.enemy_wave = EnemyWave(self.level, self.asset_manager, self.rng,
+                                        registry=self.enemy_registry)
+            self.rebuild_enemy_grid()
+            # Bonus points for clearing level
+            self.score += 500 * self.level * self.score_multiplier
+            # Spawn bonus powerup
+            self.powerup_manager.spawn_powerup()
+    
+    def run(self, ticks):
+        # Step until `ticks` have passed or the player dies
+        for _ in range(ticks):
+            if self.game_over:
+                break
+            self.profiler.begin_frame()
+            self.step()
+            self.profiler.end_frame()
+        return self.tick
+    
+    def mega_bomb(self):
+        # Destroy all enemies on screen with explosion effect
+        for enemy in self.enemy_wave.live():
+            self.score += ENEMY_POINTS * self.score_multiplier
+            self.add_explosion(enemy.rect.centerx, enemy.rect.centery, 'large')
+            self.particle_system.add_explosion(enemy.rect.centerx, 
+                                              enemy.rect.centery, 
+                                              RED, 20)
+        self.enemy_wave.clear()
+        self.enemy_grid.clear()
+        # Clear enemy bullets
+        self.enemy_bullets.clear()
+    
+    def remove_enemy(self, enemy):
+        self.enemy_wave.remove(enemy)
+        self.enemy_grid.remove(enemy)
+    
+    def chain_lightning(self, hit_enemy):
+        # Find nearby enemies
+        chain_targets = [enemy for enemy in self.enemy_grid.query_radius(hit_enemy.rect.center, 100)
+                         if enemy is not hit_enemy]
+        
+        # Damage up to 3 enemies
+        for enemy in chain_targets[:3]:
+            if enemy in self.enemy_grid and enemy.take_damage(1):
+                self.remove_enemy(enemy)
+                self.score += ENEMY_POINTS * self.score_multiplier
+                self.add_explosion(enemy.rect.centerx, enemy.rect.centery, 'small')
+            if enemy in self.enemy_grid:
+                self.particle_system.add_explosion(enemy.rect.centerx, 
+                                                  enemy.rect.centery, 
+                                                  YELLOW, 10)
+    
+    def explosion_damage(self, center, radius, damage):
+        # Damage all enemies in radius
+        enemies_to_remove = []
+        for enemy in self.enemy_grid.query_radius(center, radius):
+            if enemy.take_damage(damage):
+                enemies_to_remove.append(enemy)
+                self.score += ENEMY_POINTS * self.score_multiplier
+                self.particle_system.add_explosion(enemy.rect.centerx, 
+                                                  enemy.rect.centery, 
+                                                  ORANGE, 10)
+        
+        # Remove enemies after iteration
+        for enemy in enemies_to_remove:
+            if enemy in self.enemy_grid:
+                self.remove_enemy(enemy)
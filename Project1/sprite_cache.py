@@ -0,0 +1,153 @@
+import os
+import sys
+import mmap
+import struct
+import hashlib
+import types
+import pygame
+
+# On-disk cache for the procedurally drawn sprites, so a warm start maps
+# pixel buffers straight back into surfaces instead of redrawing them.
+#
+# Every entry is keyed by a hash of the generator's code, its
+# arguments, the pygame version and CACHE_VERSION. Editing a generator
+# changes its key, so stale pixels are never picked up; the old file for
+# that sprite is deleted when the new one is written.
+#
+# File layout: a small header, then the raw pixels as pygame.image.tobytes
+# writes them (RGBA for per-pixel alpha, RGB otherwise).
+
+CACHE_VERSION = 1
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.sprite_cache')
+MAGIC = b'SPRC'
+HEADER = struct.Struct('<4sHIIB?3B')  # magic, version, width, height, alpha, keyed, key rgb
+SUFFIX = '.sprite'
+
+
+def hash_code(digest, code):
+    # Bytecode, names and constants, recursing into nested functions.
+    # Reading the source back would be slower than just drawing the sprite.
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            hash_code(digest, const)
+        else:
+            digest.update(repr(const).encode())
+
+
+def generator_key(generator, args):
+    digest = hashlib.sha1(repr((CACHE_VERSION, sys.version, pygame.version.ver, args)).encode())
+    hash_code(digest, getattr(generator, '__func__', generator).__code__)
+    return digest.hexdigest()[:20]
+
+
+class SpriteCache:
+    def __init__(self, directory=None):
+        self.directory = directory or os.environ.get('SPRITE_CACHE_DIR') or CACHE_DIR
+        self.maps = []  # mmaps backing surfaces that were not converted
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, name, key):
+        return os.path.join(self.directory, f"{name}-{key}{SUFFIX}")
+
+    def get(self, name, generator, *args):
+        # Load `name` from disk, or build it with generator(*args) and save
+        key = generator_key(generator, args)
+        path = self.path(name, key)
+        surface = self.load(path)
+        if surface is not None:
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = generator(*args)
+        if surface is not None:
+            self.save(path, surface)
+            self.prune(name, path)
+        return surface
+
+    def load(self, path):
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            return None
+        with f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                return None
+        if len(mapped) < HEADER.size:
+            mapped.close()
+            return None
+        magic, version, width, height, alpha, keyed, *colorkey = HEADER.unpack_from(mapped)
+        fmt = 'RGBA' if alpha else 'RGB'
+        if (magic != MAGIC or version != CACHE_VERSION or
+                len(mapped) != HEADER.size + width * height * len(fmt)):
+            mapped.close()
+            return None
+
+        pixels = memoryview(mapped)[HEADER.size:]
+        surface = pygame.image.frombuffer(pixels, (width, height), fmt)
+        if keyed:
+            surface.set_colorkey(colorkey)
+
+        # Copy into the display format when there is one; otherwise keep the
+        # mapping alive for as long as the surface uses it
+        if pygame.display.get_init() and pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha() if alpha else surface.convert()
+            if keyed:
+                surface.set_colorkey(colorkey)
+            del pixels
+            try:
+                mapped.close()
+            except BufferError:
+                self.maps.append(mapped)
+        else:
+            self.maps.append(mapped)
+        return surface
+
+    def save(self, path, surface):
+        alpha = bool(surface.get_flags() & pygame.SRCALPHA)
+        colorkey = surface.get_colorkey()
+        keyed = colorkey is not None
+        header = HEADER.pack(MAGIC, CACHE_VERSION, surface.get_width(), surface.get_height(),
+                             alpha, keyed, *(colorkey[:3] if keyed else (0, 0, 0)))
+        pixels = pygame.image.tobytes(surface, 'RGBA' if alpha else 'RGB')
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write to a temp name and rename, so a crash never leaves half
+            # a file under the real name
+            temp = f"{path}.{os.getpid()}.tmp"
+            with open(temp, 'wb') as f:
+                f.write(header)
+                f.write(pixels)
+            os.replace(temp, path)
+        except OSError:
+            pass  # a read-only checkout just means no cache
+
+    def prune(self, name, keep):
+        # Remove entries for this sprite left behind by older generators
+        try:
+            entries = os.listdir(self.directory)
+        except OSError:
+            return
+        prefix = f"{name}-"
+        for entry in entries:
+            path = os.path.join(self.directory, entry)
+            if (entry.startswith(prefix) and entry.endswith(SUFFIX) and path != keep and
+                    '-' not in entry[len(prefix):-len(SUFFIX)]):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def clear(self):
+        try:
+            entries = os.listdir(self.directory)
+        except OSError:
+            return
+        for entry in entries:
+            if entry.endswith(SUFFIX):
+                os.remove(os.path.join(self.directory, entry))
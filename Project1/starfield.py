@@ -0,0 +1,146 @@
+import pygame
+import numpy as np
+from constants import *
+
+# Parallax star field. Each layer is a tile of stars built once (through
+# the AssetManager, so it is cached on disk) and stacked twice into a tile
+# twice the screen height. Scrolling is then a single blit of a
+# screen-sized window out of that tile, wherever it wraps, so the whole
+# background is one blit per layer however many stars there are.
+#
+# The far layer is opaque and replaces clearing the screen; nearer layers
+# are colorkeyed and drawn over it, moving faster the closer they are.
+#
+# The dirty-rect renderer never blits the far layer whole. An RLE eraser
+# (a layer's stars in black) wipes a moved layer's stars from where they
+# were, the caller fills what it drew last frame with black, and then every
+# layer's stars alone are drawn over the whole screen in order. Stars are
+# sparse, so those are RLE blits of a couple of microseconds each, far
+# cheaper than blitting the field back one rect at a time. Anywhere no star
+# ends up is black, as it is in the field.
+
+STAR_DENSITY = 600  # stars across all layers
+ERASER_KEY = (255, 0, 255)  # not a star colour, so the transparent part of an eraser
+
+# (share of the stars, speed relative to bg_offset, star size, brightness)
+STAR_LAYERS = [
+    (0.60, 0.25, 1, 140),
+    (0.30, 0.5, 1, 210),
+    (0.10, 1.0, 2, 255),
+]
+
+
+class StarField:
+    def __init__(self, asset_manager, density=STAR_DENSITY, size=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+        self.width, self.height = size
+        self.layers = []
+        for index, (share, speed, star_size, brightness) in enumerate(STAR_LAYERS):
+            opaque = index == 0
+            layer = asset_manager.get_star_layer(index, self.width, self.height,
+                                                 max(0, round(density * share)), star_size,
+                                                 brightness, opaque)
+            self.layers.append((self.stack(layer, opaque), speed))
+
+        # bg_offset can wrap once every layer is back where it started
+        self.period = self.height / min(speed for _, speed in self.layers)
+        # Per layer star counts, stars-only tiles and erasers, only built
+        # for the dirty-rect renderer by prepare_erase
+        self.star_counts = None
+        self.star_layers = None
+        self.erasers = None
+
+    def stack(self, layer, opaque):
+        tile = pygame.Surface((self.width, self.height * 2))
+        tile.fill(BLACK)
+        tile.blit(layer, (0, 0))
+        tile.blit(layer, (0, self.height))
+        if pygame.display.get_init() and pygame.display.get_surface() is not None:
+            tile = tile.convert()
+        if not opaque:
+            tile.set_colorkey(BLACK, pygame.RLEACCEL)
+        return tile
+
+    def scroll_top(self, offset, speed):
+        # Row of a layer's stacked tile that sits at the top of the screen
+        return self.height - int(offset * speed) % self.height
+
+    def draw(self, screen, offset):
+        # Stars drift down the screen as offset grows
+        height = self.height
+        for tile, speed in self.layers:
+            top = self.scroll_top(offset, speed)
+            screen.blit(tile, (0, 0), (0, top, self.width, height))
+
+    def find_star_counts(self, tile_size):
+        # Per layer, a running count down two stacked copies of the layer of
+        # which tile columns have stars in each row: (2 * height + 1, cols),
+        # so the stars in any band of rows, wrapped or not, are one
+        # subtraction
+        cols = -(-self.width // tile_size)
+        found = []
+        for tile, _ in self.layers:
+            pixels = pygame.surfarray.array2d(tile)[:, :self.height]
+            stars = np.zeros((self.height, cols * tile_size), dtype=np.bool_)
+            stars[:, :self.width] = (pixels != tile.map_rgb(BLACK)).T
+            rows = stars.reshape(self.height, cols, tile_size).any(axis=2)
+            counts = np.zeros((2 * self.height + 1, cols), dtype=np.int32)
+            np.cumsum(np.concatenate((rows, rows)), axis=0, out=counts[1:])
+            found.append(counts)
+        # Layer rows at the top of each row of tiles, and the screen bottom
+        self.tile_edges = np.append(np.arange(0, self.height, tile_size), self.height)
+        return found
+
+    def star_tiles(self, counts, top):
+        # Tiles with a star in them with the layer scrolled to top
+        edges = self.tile_edges + top
+        return counts[edges[1:]] != counts[edges[:-1]]
+
+    def find_erasers(self):
+        # The stars of each layer over a colorkey (the far layer's black
+        # made transparent too), and the same stars in black over a colorkey
+        stars_only = []
+        erasers = []
+        on_display = pygame.display.get_init() and pygame.display.get_surface() is not None
+        for tile, _ in self.layers:
+            stars = tile
+            if tile.get_colorkey() is None:
+                stars = tile.copy()
+                stars.set_colorkey(BLACK, pygame.RLEACCEL)
+            eraser = pygame.mask.from_surface(stars).to_surface(
+                pygame.Surface(tile.get_size()), setcolor=BLACK, unsetcolor=ERASER_KEY)
+            if on_display:
+                eraser = eraser.convert()
+            eraser.set_colorkey(ERASER_KEY, pygame.RLEACCEL)
+            stars_only.append(stars)
+            erasers.append(eraser)
+        return stars_only, erasers
+
+    def prepare_erase(self, tile_size):
+        # Everything erase() and draw_stars() need, for screen tiles of
+        # tile_size
+        self.star_counts = self.find_star_counts(tile_size)
+        self.star_layers, self.erasers = self.find_erasers()
+
+    def erase(self, screen, old_offset, new_offset):
+        # Black out the stars of every layer that moved between old_offset
+        # and new_offset, where they were. Returns the screen tiles that
+        # change once draw_stars puts them back at new_offset, as a (rows,
+        # cols) bool array, or None if no layer moved a whole pixel. A star
+        # leaving a tile changes it as much as one arriving, so both
+        # positions count.
+        changed = None
+        for (_, speed), counts, eraser in zip(self.layers, self.star_counts, self.erasers):
+            old_top = self.scroll_top(old_offset, speed)
+            new_top = self.scroll_top(new_offset, speed)
+            if old_top == new_top:
+                continue
+            screen.blit(eraser, (0, 0), (0, old_top, self.width, self.height))
+            tiles = self.star_tiles(counts, old_top) | self.star_tiles(counts, new_top)
+            changed = tiles if changed is None else changed | tiles
+        return changed
+
+    def draw_stars(self, screen, offset):
+        # Every layer's stars and nothing else, nearest last as in draw()
+        for stars, (_, speed) in zip(self.star_layers, self.layers):
+            top = self.scroll_top(offset, speed)
+            screen.blit(stars, (0, 0), (0, top, self.width, self.height))
@@ -0,0 +1,64 @@
+import pygame
+from collections import OrderedDict
+
+# Fonts are loaded once per size and rendered strings are kept in an LRU so
+# the HUD, powerup labels and game over screen stop rasterizing the same
+# text every frame. Numbers that change often (score, level) are drawn from
+# per-digit glyphs so a new score never renders a whole new string.
+
+MAX_ENTRIES = 512
+
+
+class TextCache:
+    def __init__(self, max_entries=MAX_ENTRIES, font_name=None):
+        self.max_entries = max_entries
+        self.font_name = font_name
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+
+    def font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(self.font_name, size)
+        return font
+
+    def render(self, text, size, color, antialias=True):
+        key = (text, size, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        surface = self.font(size).render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def draw(self, screen, text, size, color, pos=None, center=None, antialias=True):
+        # Blit cached text at a top-left pos or centred on a point, returns
+        # the rect drawn
+        surface = self.render(text, size, color, antialias)
+        if center is not None:
+            return screen.blit(surface, surface.get_rect(center=center))
+        return screen.blit(surface, pos)
+
+    def draw_counter(self, screen, pos, label, value, size, color, antialias=True):
+        # Cached label followed by the value one digit glyph at a time
+        x, y = pos
+        label_surface = self.render(label, size, color, antialias)
+        area = screen.blit(label_surface, (x, y))
+        x += label_surface.get_width()
+        for digit in str(value):
+            glyph = self.render(digit, size, color, antialias)
+            area.union_ip(screen.blit(glyph, (x, y)))
+            x += glyph.get_width()
+        return area
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+# Shared by everything that draws text. Fonts load on first use, so this is
+# safe to build before pygame.font is initialised.
+text_cache = TextCache()